@@ -1,12 +1,13 @@
 from fastapi import APIRouter
 
 from app.api.api_v1.endpoints import (
-    login, users,  splats, feedbacks, payments, admin, public, payos, order)
+    login, users,  splats, feedbacks, payments, admin, public, payos, order, images)
 
 api_router = APIRouter()
 api_router.include_router(login.router, tags=["login"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(splats.router, prefix="/splats", tags=["splats"])
+api_router.include_router(images.router, prefix="/images", tags=["images"])
 api_router.include_router(feedbacks.router, prefix="/feedbacks", tags=["feedbacks"])
 api_router.include_router(payments.router, prefix="/payments", tags=["payments"])
 api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
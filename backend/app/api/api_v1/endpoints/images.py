@@ -0,0 +1,67 @@
+from typing import Any
+import mimetypes
+import os
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse, Response
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.utils.http_files import is_not_modified
+from app.utils.image_store import BlobStore, image_manifest_path, resolve_image
+
+router = APIRouter()
+
+# Blobs never change, but an image name of a splat may point to a new blob
+# when the splat is re-processed, so clients revalidate once a day.
+IMAGE_CACHE_CONTROL = "public, max-age=86400"
+
+
+@router.get("/{splat_id}/{filename}")
+async def get_splat_image(
+    *,
+    request: Request,
+    splat_id: str,
+    filename: str,
+) -> Any:
+    """
+    Lấy một ảnh của splat (ảnh dùng để dựng mô hình).
+
+    **Yêu cầu Header:**
+    - Không
+
+    **Đầu vào (Request Parameters):**
+    - **splat_id**: ID của splat.
+    - **filename**: Tên ảnh, giống tên ảnh trong `cameras.json`.
+
+    **Đầu ra (Response):**
+    - 200 OK: Trả về nội dung ảnh.
+    - 304 Not Modified: Nếu header `If-None-Match` trùng với ETag của ảnh.
+    - 404 Not Found: Nếu không tìm thấy ảnh.
+
+    **Giải thích:**
+    - Ảnh được lưu một lần duy nhất trong kho blob theo mã băm SHA-256 của nội dung.
+    - Tên ảnh được tra trong manifest của splat để tìm blob tương ứng; ETag chính là mã băm.
+    - Với các splat cũ chưa có manifest, ảnh được đọc từ thư mục `MODEL_IMAGES_DIR/<splat_id>` như trước.
+    """
+    if os.sep in filename or filename.startswith("."):
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    store = BlobStore(settings.MODEL_BLOBS_DIR)
+    manifest_path = image_manifest_path(settings.MODEL_IMAGES_DIR, splat_id)
+    entry = await run_in_threadpool(resolve_image, store, manifest_path, filename)
+    media_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+    if entry is not None:
+        etag = f'"{entry["digest"]}"'
+        headers = {"ETag": etag, "Cache-Control": IMAGE_CACHE_CONTROL}
+        if is_not_modified(request, etag):
+            return Response(status_code=304, headers=headers)
+        return FileResponse(entry["path"], media_type=media_type, headers=headers)
+
+    # Splats processed before the blob store keep a plain image directory
+    legacy_path = os.path.join(settings.MODEL_IMAGES_DIR, os.path.basename(splat_id), filename)
+    if os.path.isfile(legacy_path):
+        return FileResponse(legacy_path, media_type=media_type)
+    raise HTTPException(status_code=404, detail="Image not found")
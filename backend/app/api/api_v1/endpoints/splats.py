@@ -1,4 +1,4 @@
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 from sqlalchemy.orm import Session  # type: ignore
 from app.api import deps
 from app import schemas
@@ -9,20 +9,32 @@ from app.celery import celery_app
 from fastapi_pagination.ext.sqlalchemy import paginate
 from fastapi_pagination import Params, Page
 from fastapi import (APIRouter,  Depends, HTTPException,
-                     File, UploadFile, Form, BackgroundTasks)
-from fastapi.responses import FileResponse, JSONResponse
+                     File, UploadFile, Form, Query, Header)
+from fastapi.responses import FileResponse, Response
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
 import os
 import uuid
+from datetime import datetime
 from app.core.config import settings
+from app.utils.async_io import WRITE_CHUNK_SIZE, FileTooLarge, SingleFlight, run_io, save_upload
+from app.utils.conversion_cache import ConversionCache, model_digest
+from app.utils.http_files import file_etag, is_not_modified, iter_file, ranged_file_response, splice_files
+from app.utils.image_store import BlobStore, image_manifest_path, release_images
+from app.utils.pipeline_manifest import PipelineManifest
+from app.utils.splat_chunks import chunk_index_path, chunks_by_distance, read_chunk_index
+from app.utils.splat_compression import compressed_model_path
+from app.utils.splat_format import SPLAT_DTYPE, ply_to_splat, splat_to_ply
+from app.utils.upload_sessions import (ChunkError, SessionBusy, SessionClosed, UploadSession,
+                                       cleanup_expired_sessions)
+from app.utils.colmap_archive import archive_path, build_colmap_archive, read_archive_info
 import shutil
 import subprocess
 import mimetypes
+import numpy as np
 
 from fastapi.responses import StreamingResponse
-import asyncio
 
-import zipfile
-from io import BytesIO
 
 MAX_FILE_SIZE = 5 * 1024 * 1024 * 1024  # 5GB in bytes
 
@@ -35,6 +47,183 @@ def delete_file(path: str):
 router = APIRouter()
 
 
+def _dataset_dirs(task_dir: str):
+    """Directories receiving the uploaded videos and images of a splat."""
+    return (os.path.join(task_dir, "workspace", "videos"),
+            os.path.join(task_dir, "workspace", "images"))
+
+
+def _classify_uploads(filenames: List[str]) -> str:
+    """Return "video" or "image"; a splat is made from one kind of file only."""
+    has_video = False
+    has_image = False
+    for filename in filenames:
+        mime_type, _ = mimetypes.guess_type(filename)
+        if mime_type and mime_type.startswith("video"):
+            has_video = True
+        elif mime_type and mime_type.startswith("image"):
+            has_image = True
+        else:
+            raise HTTPException(status_code=400, detail=f"Unsupported file type: {filename}")
+
+    if has_video and has_image:
+        raise HTTPException(status_code=400, detail="Cannot upload both images and videos together.")
+    if not has_video and not has_image:
+        raise HTTPException(status_code=400, detail="No valid files uploaded.")
+    return "video" if has_video else "image"
+
+
+def _create_thumbnail(splat_id: str, dataset_dir: str, is_video: bool) -> Optional[str]:
+    """Create the thumbnail of a new splat from its first video or image."""
+    thumbnail_url = None
+    thumbnail_filename = f"{splat_id}_thumbnail.jpg"
+    os.makedirs(settings.MODEL_THUMBNAILS_DIR, exist_ok=True)
+    thumbnail_path = os.path.join(settings.MODEL_THUMBNAILS_DIR, thumbnail_filename)
+
+    if is_video:
+        # Use the first video
+        video_files = sorted([f for f in os.listdir(dataset_dir) if f.lower().endswith((".mp4", ".avi", ".mov"))])
+        if video_files:
+            first_video_path = os.path.join(dataset_dir, video_files[0])
+            
+            # Use subprocess to call ffmpeg to extract the first frame
+            try:
+                ffmpeg_cmd = [
+                    'ffmpeg',
+                    '-i', first_video_path,    # Input file
+                    '-vframes', '1',           # Extract only 1 frame
+                    '-an',                     # Disable audio
+                    '-ss', '0',                # Start from the beginning
+                    '-y',                      # Overwrite output file if it exists
+                    thumbnail_path             # Output file
+                ]
+                
+                # Run the FFmpeg command
+                result = subprocess.run(
+                    ffmpeg_cmd,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    check=True
+                )
+                
+                # If successful, set the thumbnail URL
+                if os.path.exists(thumbnail_path):
+                    thumbnail_url = f"/thumbnails/{thumbnail_filename}"
+            except subprocess.CalledProcessError as e:
+                print(f"Error generating thumbnail with FFmpeg: {e}")
+                print(f"FFmpeg stderr: {e.stderr.decode() if e.stderr else 'None'}")
+            except Exception as e:
+                print(f"Unexpected error generating thumbnail: {e}")
+    else:
+        # Use the first image
+        image_files = sorted([f for f in os.listdir(dataset_dir) if f.lower().endswith((".jpg", ".jpeg", ".png"))])
+        if image_files:
+            first_image_path = os.path.join(dataset_dir, image_files[0])
+            shutil.copy(first_image_path, thumbnail_path)
+            thumbnail_url = f"/thumbnails/{thumbnail_filename}"
+    return thumbnail_url
+
+
+async def _create_splat(db: Session, *, owner_id: int, splat_id: str, title: str,
+                        task_dir: str, dataset_dir: str) -> models.Splat:
+    """Create the splat of uploaded files, with its thumbnail."""
+    is_video = dataset_dir == _dataset_dirs(task_dir)[0]
+    thumbnail_url = await run_io(_create_thumbnail, splat_id, dataset_dir, is_video)
+
+    # Save to DB
+    splat_in = schemas.SplatCreate(
+        id=splat_id,
+        title=title,
+        image_url=thumbnail_url
+    )
+
+    return crud.splat.create_with_owner(db, obj_in=splat_in, owner_id=owner_id)
+
+
+async def _start_splat(db: Session, *, owner_id: int, splat_id: str, title: str,
+                       task_dir: str, dataset_dir: str, num_iterations: int,
+                       splat: Optional[models.Splat] = None) -> models.Splat:
+    """Create the splat of uploaded files, unless given, and start its reconstruction."""
+    if splat is None:
+        splat = await _create_splat(db, owner_id=owner_id, splat_id=splat_id, title=title,
+                                    task_dir=task_dir, dataset_dir=dataset_dir)
+
+    # Start Celery Task
+    await run_in_threadpool(
+        celery_app.process_video,
+        task_id=splat.id,
+        workspace_path=task_dir,
+        dataset_dir=dataset_dir,
+        num_iterations=num_iterations
+    )
+
+    return splat
+
+
+def _upload_session_max_age() -> float:
+    return settings.UPLOAD_SESSION_EXPIRE_HOURS * 3600
+
+
+def _get_upload_session(upload_id: str, current_user: models.User) -> UploadSession:
+    """Load an upload session of the current user."""
+    try:
+        uuid.UUID(upload_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    task_dir = os.path.join(settings.MODEL_WORKSPACES_DIR, str(current_user.id), upload_id)
+    session = UploadSession(task_dir)
+    if not session.exists or session.data["owner_id"] != current_user.id \
+            or session.expired(_upload_session_max_age()):
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return session
+
+
+def _upload_session_out(upload_id: str, session: UploadSession) -> Dict[str, Any]:
+    expires_at = session.expires_at(_upload_session_max_age())
+    return {
+        "id": upload_id,
+        "title": session.data["title"],
+        "status": session.data["status"],
+        "chunk_size": settings.UPLOAD_CHUNK_SIZE,
+        "files": session.status(),
+        "expires_at": datetime.fromtimestamp(expires_at) if expires_at is not None else None,
+    }
+
+
+# Conversions of models to .ply, shared by concurrent download requests
+PLY_CONVERSIONS = SingleFlight()
+
+
+# COLMAP archives built on first download, shared by concurrent requests
+COLMAP_ARCHIVES = SingleFlight()
+
+
+def _conversion_cache() -> ConversionCache:
+    return ConversionCache(settings.MODEL_CONVERSIONS_DIR)
+
+
+def _get_viewable_splat(db: Session, id: str, current_user: Optional[models.User]) -> models.Splat:
+    """Return a finished splat the current (possibly anonymous) user may view."""
+    splat = crud.splat.get(db=db, id=id)
+    if not splat:
+        raise HTTPException(status_code=404, detail="Splat not found")
+    if not current_user:
+        if not splat.is_public:
+            raise HTTPException(status_code=400, detail="Not enough permissions")
+    else:
+        if not current_user.is_superuser and current_user.id != splat.owner_id and not splat.is_public:
+            raise HTTPException(status_code=400, detail="Not enough permissions")
+
+    if splat.status != 'SUCCESS':
+        raise HTTPException(
+            status_code=404,
+            detail=f"Result not ready or task failed. Current state: {splat.status}"
+        )
+    if not splat.model_url or not os.path.exists(splat.model_url):
+        raise HTTPException(status_code=404, detail="Input .splat file not found")
+    return splat
+
+
 @router.get("", response_model=Page[schemas.Splat], responses={
     401: {"model": schemas.Detail, "description": "User unathorized"}
 })
@@ -77,6 +266,9 @@ def read_splats(
 @router.get("/public", response_model=Page[schemas.Splat])
 def read_public_splats(
     params: Params = Depends(),
+    sort: Optional[str] = Query(None, regex="^-?complexity$"),
+    min_gaussians: Optional[int] = Query(None, ge=0),
+    max_gaussians: Optional[int] = Query(None, ge=0),
     db: Session = Depends(deps.get_db),
 ) -> Any:
     """
@@ -87,6 +279,8 @@ def read_public_splats(
 
     **Đầu vào (Request Parameters):**
     - **params**: Các tham số phân trang (page size, page number).
+    - **sort** (tùy chọn): `complexity` sắp xếp theo số Gaussian tăng dần, `-complexity` giảm dần; mặc định theo thứ tự tạo.
+    - **min_gaussians**, **max_gaussians** (tùy chọn): Chỉ lấy các splat có số Gaussian trong khoảng này.
 
     **Đầu ra (Response):**
     - 200 OK: Trả về danh sách các splat công khai dưới dạng phân trang (page).
@@ -97,14 +291,19 @@ def read_public_splats(
 
     **Chi tiết về các hành động:**
     - Lấy tất cả các splat có thuộc tính `is_public=True`.
+    - Lọc và sắp xếp theo số Gaussian (`num_gaussians`, được tính sau khi mô hình hoàn tất); các splat chưa có thống kê bị loại khi lọc và xếp cuối khi sắp xếp.
     - Dữ liệu sẽ được phân trang và trả về cho người dùng dưới dạng `Page[schemas.Splat]`.
     """
-    public_splats = crud.splat.get_multi_by_public(db=db)
+    public_splats = crud.splat.get_multi_by_public(
+        db=db, sort=sort, min_gaussians=min_gaussians, max_gaussians=max_gaussians)
     return paginate(public_splats, params)
 
 @router.get("/gallery", response_model=Page[schemas.Splat])
 def read_gallery_splats(
     params: Params = Depends(),
+    sort: Optional[str] = Query(None, regex="^-?complexity$"),
+    min_gaussians: Optional[int] = Query(None, ge=0),
+    max_gaussians: Optional[int] = Query(None, ge=0),
     db: Session = Depends(deps.get_db),
 ) -> Any:
     """
@@ -115,6 +314,8 @@ def read_gallery_splats(
 
     **Đầu vào (Request Parameters):**
     - **params**: Các tham số phân trang (page size, page number).
+    - **sort** (tùy chọn): `complexity` sắp xếp theo số Gaussian tăng dần, `-complexity` giảm dần; mặc định theo thứ tự tạo.
+    - **min_gaussians**, **max_gaussians** (tùy chọn): Chỉ lấy các splat có số Gaussian trong khoảng này.
 
     **Đầu ra (Response):**
     - 200 OK: Trả về danh sách các splat trong gallery dưới dạng phân trang (page).
@@ -125,9 +326,11 @@ def read_gallery_splats(
 
     **Chi tiết về các hành động:**
     - Lấy tất cả các splat có thuộc tính `is_gallery=True`.
+    - Lọc và sắp xếp theo số Gaussian (`num_gaussians`, được tính sau khi mô hình hoàn tất); các splat chưa có thống kê bị loại khi lọc và xếp cuối khi sắp xếp.
     - Dữ liệu sẽ được phân trang và trả về cho người dùng dưới dạng `Page[schemas.Splat]`.
     """
-    gallery_splats = crud.splat.get_multi_by_gallery(db=db)
+    gallery_splats = crud.splat.get_multi_by_gallery(
+        db=db, sort=sort, min_gaussians=min_gaussians, max_gaussians=max_gaussians)
     return paginate(gallery_splats, params)
 
 @router.post("", response_model=schemas.Splat, responses={
@@ -143,7 +346,7 @@ async def create_splat(
 ) -> Any:
     """
     Tạo một splat mới từ các tệp tải lên (có thể là video hoặc hình ảnh, không thể tải lên cả hai).
-    Nếu video được tải lên, hệ thống sẽ trích xuất các khung hình với tốc độ 2fps.
+    Nếu video được tải lên, hệ thống sẽ trích xuất các khung hình và chọn ra các khung hình chính (keyframe) rõ nét.
 
     **Yêu cầu Header:**
     - Cần xác thực người dùng qua token JWT trong header `Authorization`.
@@ -160,14 +363,14 @@ async def create_splat(
 
     **Giải thích:**
     - Endpoint này cho phép người dùng tạo một splat mới bằng cách tải lên các tệp video hoặc hình ảnh.
-    - Nếu video được tải lên, hệ thống sẽ trích xuất các khung hình với tốc độ 2fps và lưu chúng vào thư mục làm việc.
+    - Nếu video được tải lên, hệ thống sẽ trích xuất các khung hình, chọn các khung hình chính và lưu chúng vào thư mục làm việc.
     - Nếu hình ảnh được tải lên, hệ thống sẽ di chuyển các tệp hình ảnh vào thư mục làm việc.
     - Sau khi các tệp được xử lý, một thumbnail sẽ được tạo từ hình ảnh đầu tiên (nếu có) và được lưu vào thư mục thumbnail.
     - Một tác vụ xử lý video (hoặc hình ảnh) sẽ được đưa vào hàng đợi Celery để xử lý tiếp.
 
     **Chi tiết về các hành động:**
     - Kiểm tra loại tệp tải lên (video hoặc hình ảnh) và đảm bảo chỉ tải lên một loại tệp.
-    - Nếu video được tải lên, trích xuất khung hình với tốc độ 2fps và lưu vào thư mục làm việc.
+    - Nếu video được tải lên, trích xuất khung hình, chọn các khung hình chính và lưu vào thư mục làm việc.
     - Nếu hình ảnh được tải lên, di chuyển chúng vào thư mục làm việc.
     - Tạo thumbnail từ hình ảnh đầu tiên (nếu có) và lưu vào thư mục thumbnail.
     - Tạo một đối tượng splat mới và lưu vào cơ sở dữ liệu.
@@ -176,114 +379,253 @@ async def create_splat(
     print(files)
     splat_id = str(uuid.uuid4())
     task_dir = os.path.join(settings.MODEL_WORKSPACES_DIR, str(current_user.id), splat_id)
-    os.makedirs(task_dir, exist_ok=True)
+    kind = _classify_uploads([file.filename for file in files])
 
-    video_dir = os.path.join(task_dir, "workspace", "videos")
-    image_dir = os.path.join(task_dir, "workspace", "images")
+    video_dir, image_dir = _dataset_dirs(task_dir)
     os.makedirs(video_dir, exist_ok=True)
     os.makedirs(image_dir, exist_ok=True)
+    dataset_dir = video_dir if kind == "video" else image_dir
 
-    has_video = False
-    has_image = False
-
+    # Write the files from the I/O executor, the event loop keeps serving
+    # other requests meanwhile
     for file in files:
-        mime_type, _ = mimetypes.guess_type(file.filename)
-        is_video = mime_type and mime_type.startswith("video")
-        is_image = mime_type and mime_type.startswith("image")
+        target_path = os.path.join(dataset_dir, os.path.basename(file.filename))
+        await save_upload(file.file, target_path)
 
-        if is_video:
-            has_video = True
-        elif is_image:
-            has_image = True
-        else:
-            raise HTTPException(status_code=400, detail=f"Unsupported file type: {file.filename}")
+    return await _start_splat(
+        db,
+        owner_id=current_user.id,
+        splat_id=splat_id,
+        title=title,
+        task_dir=task_dir,
+        dataset_dir=dataset_dir,
+        num_iterations=num_iterations,
+    )
 
-    if has_video and has_image:
-        raise HTTPException(status_code=400, detail="Cannot upload both images and videos together.")
 
-    dataset_dir = None
+@router.post("/uploads", response_model=schemas.UploadSession, responses={
+    401: {"model": schemas.Detail, "description": "User unauthorized"},
+    400: {"model": schemas.Detail, "description": "Invalid files"},
+    413: {"model": schemas.Detail, "description": "Upload too large (max 5GB)"},
+})
+async def create_upload_session(
+    *,
+    current_user: models.User = Depends(deps.get_current_active_user),
+    upload_in: schemas.UploadSessionCreate,
+) -> Any:
+    """
+    Tạo một phiên tải lên có thể tiếp tục (resumable) cho một splat mới.
 
-    for file in files:
-        mime_type, _ = mimetypes.guess_type(file.filename)
-        target_dir = video_dir if mime_type.startswith("video") else image_dir
-        target_path = os.path.join(target_dir, file.filename)
+    **Yêu cầu Header:**
+    - Cần xác thực người dùng qua token JWT trong header `Authorization`.
 
-        with open(target_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+    **Đầu vào (Request Body):**
+    - **title**: Tiêu đề cho splat mới.
+    - **num_iterations**: Số vòng lặp cho lệnh opensplat (mặc định là 10000).
+    - **files**: Danh sách các tệp sẽ tải lên, mỗi tệp gồm `name` và `size` (byte).
 
-    # Determine dataset_dir and generate thumbnail
-    thumbnail_url = None
-    thumbnail_filename = f"{splat_id}_thumbnail.jpg"
-    os.makedirs(settings.MODEL_THUMBNAILS_DIR, exist_ok=True)
-    thumbnail_path = os.path.join(settings.MODEL_THUMBNAILS_DIR, thumbnail_filename)
+    **Đầu ra (Response):**
+    - 200 OK: Trả về phiên tải lên với `id`, `chunk_size` gợi ý và trạng thái từng tệp.
+    - 401 Unauthorized: Nếu người dùng chưa xác thực hoặc token không hợp lệ.
+    - 400 Bad Request: Nếu tệp có kiểu không hợp lệ, trùng tên, hoặc có cả video và hình ảnh.
+    - 413 Request Entity Too Large: Nếu tổng dung lượng vượt quá 5GB.
 
-    if has_video:
-        dataset_dir = video_dir
-        # Use the first video
-        video_files = sorted([f for f in os.listdir(video_dir) if f.lower().endswith((".mp4", ".avi", ".mov"))])
-        if video_files:
-            first_video_path = os.path.join(video_dir, video_files[0])
-            
-            # Use subprocess to call ffmpeg to extract the first frame
-            try:
-                ffmpeg_cmd = [
-                    'ffmpeg',
-                    '-i', first_video_path,    # Input file
-                    '-vframes', '1',           # Extract only 1 frame
-                    '-an',                     # Disable audio
-                    '-ss', '0',                # Start from the beginning
-                    '-y',                      # Overwrite output file if it exists
-                    thumbnail_path             # Output file
-                ]
-                
-                # Run the FFmpeg command
-                result = subprocess.run(
-                    ffmpeg_cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    check=True
-                )
-                
-                # If successful, set the thumbnail URL
-                if os.path.exists(thumbnail_path):
-                    thumbnail_url = f"/thumbnails/{thumbnail_filename}"
-            except subprocess.CalledProcessError as e:
-                print(f"Error generating thumbnail with FFmpeg: {e}")
-                print(f"FFmpeg stderr: {e.stderr.decode() if e.stderr else 'None'}")
-            except Exception as e:
-                print(f"Unexpected error generating thumbnail: {e}")
-    elif has_image:
-        dataset_dir = image_dir
-        # Use the first image
-        image_files = sorted([f for f in os.listdir(image_dir) if f.lower().endswith((".jpg", ".jpeg", ".png"))])
-        if image_files:
-            first_image_path = os.path.join(image_dir, image_files[0])
-            shutil.copy(first_image_path, thumbnail_path)
-            thumbnail_url = f"/thumbnails/{thumbnail_filename}"
+    **Giải thích:**
+    - Các tệp sau đó được gửi theo từng phần bằng `PUT /uploads/{upload_id}/files/{filename}?offset=...`.
+    - Khi mất kết nối, client gọi `GET /uploads/{upload_id}` để biết số byte đã nhận và gửi tiếp từ đó.
+    - Sau khi tải lên xong, gọi `POST /uploads/{upload_id}/finalize` để tạo splat và bắt đầu xử lý.
+    - Phiên chưa hoàn tất bị xóa sau `UPLOAD_SESSION_EXPIRE_HOURS` giờ không nhận thêm dữ liệu (`expires_at`);
+      các phiên hết hạn của người dùng được dọn dẹp khi họ tạo phiên mới.
+    """
+    names = [file.name for file in upload_in.files]
+    if len(set(names)) != len(names) or any(name != os.path.basename(name) or name.startswith(".")
+                                            for name in names):
+        raise HTTPException(status_code=400, detail="File names must be unique plain file names")
+    _classify_uploads(names)
+    if sum(file.size for file in upload_in.files) > MAX_FILE_SIZE:
+        raise HTTPException(status_code=413, detail="Upload too large (max 5GB)")
+
+    owner_dir = os.path.join(settings.MODEL_WORKSPACES_DIR, str(current_user.id))
+    await run_io(cleanup_expired_sessions, owner_dir, _upload_session_max_age())
+
+    upload_id = str(uuid.uuid4())
+    task_dir = os.path.join(owner_dir, upload_id)
+    session = await run_in_threadpool(
+        UploadSession.create,
+        task_dir,
+        owner_id=current_user.id,
+        title=upload_in.title,
+        num_iterations=upload_in.num_iterations,
+        files={file.name: file.size for file in upload_in.files},
+    )
+    return _upload_session_out(upload_id, session)
 
-    if not dataset_dir:
-        raise HTTPException(status_code=400, detail="No valid files uploaded.")
 
-    # Save to DB
-    splat_in = schemas.SplatCreate(
-        id=splat_id,
-        title=title,
-        image_url=thumbnail_url
-    )
+@router.get("/uploads/{upload_id}", response_model=schemas.UploadSession, responses={
+    401: {"model": schemas.Detail, "description": "User unauthorized"},
+    404: {"model": schemas.Detail, "description": "Upload session not found"},
+})
+async def get_upload_session(
+    *,
+    current_user: models.User = Depends(deps.get_current_active_user),
+    upload_id: str,
+) -> Any:
+    """
+    Lấy trạng thái của một phiên tải lên.
 
-    splat: models.Splat = crud.splat.create_with_owner(
-        db, obj_in=splat_in, owner_id=current_user.id)
+    **Yêu cầu Header:**
+    - Cần xác thực người dùng qua token JWT trong header `Authorization`.
 
-    # Start Celery Task
-    celery_app.process_video.delay(
-        task_id=splat.id,
-        workspace_path=task_dir,
-        dataset_dir=dataset_dir,
-        num_iterations=num_iterations
-    )
+    **Đầu vào (Request Parameters):**
+    - **upload_id**: ID của phiên tải lên (dưới dạng URL parameter).
 
-    return splat
+    **Đầu ra (Response):**
+    - 200 OK: Trả về phiên tải lên với số byte đã nhận của từng tệp.
+    - 401 Unauthorized: Nếu người dùng chưa xác thực hoặc token không hợp lệ.
+    - 404 Not Found: Nếu phiên tải lên không tồn tại hoặc không thuộc về người dùng.
+
+    **Giải thích:**
+    - Dùng để tiếp tục tải lên sau khi mất kết nối: mỗi tệp được gửi tiếp từ `received`.
+    """
+    session = await run_in_threadpool(_get_upload_session, upload_id, current_user)
+    return _upload_session_out(upload_id, session)
+
+
+@router.put("/uploads/{upload_id}/files/{filename}", response_model=schemas.UploadFileStatus, responses={
+    401: {"model": schemas.Detail, "description": "User unauthorized"},
+    400: {"model": schemas.Detail, "description": "Invalid chunk"},
+    404: {"model": schemas.Detail, "description": "Upload session not found"},
+    409: {"model": schemas.Detail, "description": "Upload already finalized or being finalized"},
+    413: {"model": schemas.Detail, "description": "Chunk too large"},
+})
+async def upload_chunk(
+    *,
+    request: Request,
+    current_user: models.User = Depends(deps.get_current_active_user),
+    upload_id: str,
+    filename: str,
+    offset: int = Query(..., ge=0, description="Byte offset of the chunk in the file"),
+    x_chunk_sha256: Optional[str] = Header(None, description="SHA-256 (hex) of the chunk"),
+) -> Any:
+    """
+    Tải lên một phần (chunk) của một tệp trong phiên tải lên.
+
+    **Yêu cầu Header:**
+    - Cần xác thực người dùng qua token JWT trong header `Authorization`.
+    - `X-Chunk-SHA256` (tùy chọn): Mã băm SHA-256 của phần dữ liệu, dùng để kiểm tra tính toàn vẹn.
+
+    **Đầu vào (Request Parameters):**
+    - **upload_id**: ID của phiên tải lên (dưới dạng URL parameter).
+    - **filename**: Tên tệp đã khai báo khi tạo phiên (dưới dạng URL parameter).
+    - **offset**: Vị trí byte bắt đầu của phần dữ liệu (dưới dạng query parameter).
+    - Nội dung request là dữ liệu nhị phân của phần đó.
 
+    **Đầu ra (Response):**
+    - 200 OK: Trả về trạng thái của tệp (`received`, `complete`).
+    - 400 Bad Request: Nếu offset không hợp lệ, vượt quá kích thước tệp hoặc sai checksum.
+    - 404 Not Found: Nếu phiên tải lên không tồn tại.
+    - 409 Conflict: Nếu phiên tải lên đã được hoàn tất hoặc đang được hoàn tất.
+    - 413 Request Entity Too Large: Nếu phần dữ liệu lớn hơn `UPLOAD_MAX_CHUNK_SIZE`.
+
+    **Giải thích:**
+    - `offset` phải nhỏ hơn hoặc bằng số byte đã nhận; gửi lại phần cuối cùng là an toàn.
+    - Dữ liệu được ghi trực tiếp vào thư mục làm việc của splat khi nhận, ngoài event loop, và không giữ cả phần trong bộ nhớ.
+    - Nếu sai checksum, tệp được cắt lại tại `offset`.
+    """
+    session = await run_in_threadpool(_get_upload_session, upload_id, current_user)
+    try:
+        # Shared with other chunks, finalize waits for the chunks being written
+        with session.writing():
+            writer = await run_io(session.open_chunk, filename, offset)
+            try:
+                buffer = bytearray()
+                async for part in request.stream():
+                    if writer.written + len(buffer) + len(part) > settings.UPLOAD_MAX_CHUNK_SIZE:
+                        raise HTTPException(status_code=413, detail="Chunk too large")
+                    buffer += part
+                    if len(buffer) >= WRITE_CHUNK_SIZE:
+                        await run_io(writer.write, bytes(buffer))
+                        buffer.clear()
+                await run_io(writer.write, bytes(buffer))
+                return await run_io(writer.close, x_chunk_sha256)
+            except BaseException:
+                await run_io(writer.abort)
+                raise
+    except (SessionBusy, SessionClosed) as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ChunkError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/uploads/{upload_id}/finalize", response_model=schemas.Splat, responses={
+    401: {"model": schemas.Detail, "description": "User unauthorized"},
+    400: {"model": schemas.Detail, "description": "Upload incomplete"},
+    404: {"model": schemas.Detail, "description": "Upload session not found"},
+    409: {"model": schemas.Detail, "description": "Upload already finalized or being finalized"},
+})
+async def finalize_upload_session(
+    *,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+    upload_id: str,
+) -> Any:
+    """
+    Hoàn tất phiên tải lên, tạo splat và đưa tác vụ xử lý vào hàng đợi.
+
+    **Yêu cầu Header:**
+    - Cần xác thực người dùng qua token JWT trong header `Authorization`.
+
+    **Đầu vào (Request Parameters):**
+    - **upload_id**: ID của phiên tải lên (dưới dạng URL parameter).
+
+    **Đầu ra (Response):**
+    - 200 OK: Trả về đối tượng splat mới, có cùng ID với phiên tải lên.
+    - 400 Bad Request: Nếu còn tệp chưa tải lên đủ.
+    - 404 Not Found: Nếu phiên tải lên không tồn tại hoặc đã hết hạn.
+    - 409 Conflict: Nếu phiên tải lên đã được hoàn tất trước đó hoặc đang được hoàn tất bởi một yêu cầu khác.
+
+    **Giải thích:**
+    - Các tệp đã tải lên được chuyển vào thư mục dữ liệu của splat (không sao chép lại).
+    - Sau đó xử lý giống như `POST /splats`: tạo thumbnail, lưu splat và gửi tác vụ Celery.
+    - Phiên được khóa trong khi hoàn tất, nên hai yêu cầu đồng thời không thể cùng tạo splat
+      và không phần dữ liệu nào được ghi trong lúc đó.
+    - Sau khi splat được tạo, các tệp của phiên (`upload.json`, `uploads/`) bị xóa.
+    - Nếu lần gọi trước bị gián đoạn (mất kết nối, worker bị dừng), gọi lại sẽ tiếp tục từ bước còn dang dở:
+      tệp đã chuyển và splat đã tạo được giữ nguyên.
+    """
+    session = await run_in_threadpool(_get_upload_session, upload_id, current_user)
+    try:
+        with session.finalizing():
+            if session.data["status"] == "finalized":
+                # Interrupted while removing the session files
+                await run_io(session.close)
+                raise HTTPException(status_code=409, detail="Upload already finalized")
+
+            kind = _classify_uploads(list(session.files))
+            video_dir, image_dir = _dataset_dirs(session.workspace_path)
+            dataset_dir = video_dir if kind == "video" else image_dir
+            if session.data["status"] == "open":
+                try:
+                    await run_io(session.finalize, {name: dataset_dir for name in session.files})
+                except ChunkError as e:
+                    raise HTTPException(status_code=400, detail=str(e))
+
+            # Created by an interrupted finalize
+            existing = await run_in_threadpool(crud.splat.get, db, id=upload_id)
+            splat = await _start_splat(
+                db,
+                owner_id=current_user.id,
+                splat_id=upload_id,
+                title=session.data["title"],
+                task_dir=session.workspace_path,
+                dataset_dir=dataset_dir,
+                num_iterations=session.data["num_iterations"],
+                splat=existing,
+            )
+            await run_io(session.close)
+            return splat
+    except (SessionBusy, SessionClosed) as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
 
 @router.post("/model-upload", response_model=schemas.Splat, responses={
@@ -317,16 +659,17 @@ async def upload_splat(
     **Đầu ra (Response):**
     - 200 OK: Trả về đối tượng Splat vừa được tạo trong cơ sở dữ liệu.
     - 401 Unauthorized: Nếu người dùng chưa xác thực hoặc token không hợp lệ.
-    - 400 Bad Request: Nếu file không phải định dạng .ply hoặc .splat.
+    - 400 Bad Request: Nếu file không phải định dạng .ply hoặc .splat, hoặc file .ply không phải mô hình Gaussian splat hợp lệ.
     - 413 Payload Too Large: Nếu kích thước file vượt quá giới hạn 5GB.
     - 500 Internal Server Error: Nếu có lỗi trong quá trình tải lên hoặc chuyển đổi file.
 
     **Giải thích:**
     - Endpoint này cho phép người dùng tải lên một mô hình 3D và thumbnail của mô hình.
-    - Mô hình có thể là file .ply hoặc .splat. Nếu là .ply, file sẽ được chuyển đổi thành .splat sử dụng công cụ Go (gsbox).
+    - Mô hình có thể là file .ply hoặc .splat. Nếu là .ply (định dạng 3DGS), file sẽ được chuyển đổi thành .splat.
     - Thumbnail sẽ được lưu trữ trong thư mục riêng biệt.
     - Sau khi tải lên và chuyển đổi (nếu cần), thông tin mô hình sẽ được lưu trữ trong cơ sở dữ liệu, bao gồm đường dẫn tới mô hình và thumbnail.
     - Kích thước của mô hình sẽ được tính toán và lưu trữ trong cơ sở dữ liệu.
+    - Bản nén `.qsplat` của mô hình được tạo trong nền (xem `download-splat?variant=compressed`).
     """
     # Instead of checking model.size, we need to check the file size after it's saved
     if not (model.filename.endswith(".ply") or model.filename.endswith(".splat")):
@@ -342,52 +685,40 @@ async def upload_splat(
     thumbnail_path = os.path.join(settings.MODEL_THUMBNAILS_DIR, thumbnail_filename)
 
     # Save the thumbnail file
-    with open(thumbnail_path, "wb") as f:
-        shutil.copyfileobj(thumbnail.file, f)
+    await save_upload(thumbnail.file, thumbnail_path)
 
     # --- For .ply File: Save and Convert to .splat ---
     if model.filename.endswith(".ply"):
-        # Save the .ply file temporarily
-        with open(model_path, "wb") as f:
-            shutil.copyfileobj(model.file, f)
-        
-        # Check file size after saving
-        file_size = os.path.getsize(model_path)
-        if file_size > MAX_FILE_SIZE:
-            os.remove(model_path)  # Clean up the file
+        # Save the .ply file temporarily, the size is checked while copying
+        try:
+            await save_upload(model.file, model_path, max_size=MAX_FILE_SIZE)
+        except FileTooLarge:
             raise HTTPException(status_code=413, detail="File too large (max 5GB)")
 
-        # Convert the .ply to .splat using Go tool
+        # Convert the .ply to .splat
         splat_path = os.path.join(modeling_task_dir, f"{splat_id}.splat")
         try:
-            subprocess.run(
-                ['gsbox', 'p2s', '-i', model_path, '-o', splat_path],
-                check=True
-            )
-        except subprocess.CalledProcessError:
-            os.remove(model_path)  # Cleanup in case of failure
-            raise HTTPException(status_code=500, detail="Conversion to .splat failed")
+            await run_io(ply_to_splat, model_path, splat_path)
+        except ValueError as e:
+            await run_io(os.remove, model_path)  # Cleanup in case of failure
+            raise HTTPException(status_code=400, detail=f"Conversion to .splat failed: {e}")
 
         # Cleanup the temporary .ply file
-        os.remove(model_path)
+        await run_io(os.remove, model_path)
 
     # --- For .splat File: Directly Save ---
     elif model.filename.endswith(".splat"):
-        # Save the .splat file directly
-        with open(model_path, "wb") as f:
-            shutil.copyfileobj(model.file, f)
-        
-        # Check file size after saving
-        file_size = os.path.getsize(model_path)
-        if file_size > MAX_FILE_SIZE:
-            os.remove(model_path)  # Clean up the file
+        # Save the .splat file directly, the size is checked while copying
+        try:
+            await save_upload(model.file, model_path, max_size=MAX_FILE_SIZE)
+        except FileTooLarge:
             raise HTTPException(status_code=413, detail="File too large (max 5GB)")
             
         splat_path = model_path
 
     # --- Create Database Entry ---
     # Calculate model file size (in MB)
-    model_size = round(os.path.getsize(splat_path) / (1024 * 1024), 2)
+    model_size = round(await run_io(os.path.getsize, splat_path) / (1024 * 1024), 2)
     thumbnail_url = f"/thumbnails/{thumbnail_filename}"
     # Create the Splat entry in the database
     splat_in = schemas.SplatCreate(
@@ -404,6 +735,9 @@ async def upload_splat(
         db, obj_in=splat_in, owner_id=current_user.id
     )
 
+    # Derive the compressed variant in the background
+    await run_in_threadpool(celery_app.postprocess_model.delay, splat.id)
+
     # Return the Splat object (now stored in DB)
     return splat
 
@@ -498,19 +832,40 @@ def delete_splat(
     if not current_user.is_superuser and (splat.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
 
-    dir_path = os.path.join(settings.MODEL_WORKSPACES_DIR, str(current_user.id), splat.id)
+    # Drop the cached .ply conversion while the model is still there to hash
+    if splat.model_url and os.path.exists(splat.model_url):
+        try:
+            _conversion_cache().remove(model_digest(splat.model_url), ".ply")
+        except Exception as e:
+            print(f"Error removing conversions of {splat.id}: {str(e)}")
+
+    # Deleting a splat also abandons any unfinished or failed pipeline run,
+    # so its kept workspace is removed together with the results and the
+    # cached COLMAP archive.
+    dir_path = os.path.join(settings.MODEL_WORKSPACES_DIR, str(splat.owner_id), splat.id)
     try:
         shutil.rmtree(dir_path)
         print(f"Directory {dir_path} has been removed.")
     except Exception as e:
         print(f"Error removing directory {dir_path}: {str(e)}")
 
-    images_path = os.path.join(settings.MODEL_IMAGES_DIR, splat.id)
+    # Images are shared through the blob store, only free the blobs that
+    # no other splat references
+    manifest_path = image_manifest_path(settings.MODEL_IMAGES_DIR, splat.id)
     try:
-        shutil.rmtree(images_path)
-        print(f"Directory {images_path} has been removed.")
+        freed = release_images(db, BlobStore(settings.MODEL_BLOBS_DIR), manifest_path)
+        print(f"Released images of {splat.id}, {len(freed)} blobs freed.")
     except Exception as e:
-        print(f"Error removing directory {images_path}: {str(e)}")
+        print(f"Error releasing images of {splat.id}: {str(e)}")
+
+    # Splats processed before the blob store have a plain image directory
+    images_path = os.path.join(settings.MODEL_IMAGES_DIR, splat.id)
+    if os.path.isdir(images_path):
+        try:
+            shutil.rmtree(images_path)
+            print(f"Directory {images_path} has been removed.")
+        except Exception as e:
+            print(f"Error removing directory {images_path}: {str(e)}")
 
     thumbnail_filename = f"{splat.id}_thumbnail.jpg"
     thumbnail_path = os.path.join(settings.MODEL_THUMBNAILS_DIR, thumbnail_filename)
@@ -525,6 +880,56 @@ def delete_splat(
     splat = crud.splat.remove(db=db, id=id)
     return {"detail": f'Splat deleted successfully {id}'}
 
+@router.post("/{id}/retry", response_model=schemas.Splat, responses={
+    401: {"model": schemas.Detail, "description": "User unathorized"}
+})
+def retry_splat(
+    *,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+    id: str,
+) -> Any:
+    """
+    Chạy lại quá trình xử lý của một splat bị lỗi, bỏ qua các bước đã hoàn thành.
+
+    **Yêu cầu Header:**
+    - Cần xác thực người dùng qua token JWT trong header `Authorization`.
+
+    **Đầu vào (Request Parameters):**
+    - **id**: ID của splat cần chạy lại (dưới dạng URL parameter).
+
+    **Đầu ra (Response):**
+    - 200 OK: Trả về đối tượng splat với trạng thái `PENDING`.
+    - 401 Unauthorized: Nếu người dùng chưa xác thực hoặc token không hợp lệ.
+    - 400 Bad Request: Nếu không có quyền, splat không ở trạng thái `FAILURE` hoặc không còn workspace để tiếp tục.
+    - 404 Not Found: Nếu splat không tồn tại.
+
+    **Giải thích:**
+    - Mỗi bước của pipeline (trích xuất khung hình, COLMAP, OpenSplat, ...) được ghi lại trong `manifest.json` của workspace.
+    - Khi chạy lại, các bước đã hoàn thành (và còn đầy đủ kết quả) sẽ được bỏ qua, ví dụ lỗi ở OpenSplat không cần chạy lại bước matching.
+    """
+    splat = crud.splat.get(db=db, id=id)
+    if not splat:
+        raise HTTPException(status_code=404, detail="Splat not found")
+    if not current_user.is_superuser and (splat.owner_id != current_user.id):
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    if splat.status != 'FAILURE':
+        raise HTTPException(status_code=400, detail=f"Only failed splats can be retried. Current state: {splat.status}")
+
+    task_dir = os.path.join(settings.MODEL_WORKSPACES_DIR, str(splat.owner_id), splat.id)
+    if not PipelineManifest.exists(task_dir):
+        raise HTTPException(status_code=400, detail="No resumable workspace found for this splat")
+
+    splat_in = schemas.SplatUpdate(status="PENDING")
+    splat = crud.splat.update(db=db, db_obj=splat, obj_in=splat_in)
+
+    celery_app.resume_video(
+        task_id=splat.id,
+        workspace_path=task_dir,
+    )
+    return splat
+
+
 @router.get("/{id}", response_model=schemas.Splat, responses={
     401: {"model": schemas.Detail, "description": "User unathorized"}
 })
@@ -580,6 +985,7 @@ def download_splat(
     db: Session = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_guess_user),
     id: str,
+    variant: str = Query("original", regex="^(original|compressed)$"),
 ) -> Any:
     """
     Tải xuống splat đã hoàn thành.
@@ -589,18 +995,21 @@ def download_splat(
 
     **Đầu vào (Request Parameters):**
     - **id**: ID của splat cần tải xuống (dưới dạng URL parameter).
+    - **variant**: `original` (mặc định) để tải file `.splat` gốc, hoặc `compressed` để tải bản nén `.qsplat`.
 
     **Đầu ra (Response):**
     - 200 OK: Trả về file splat dưới dạng tải xuống.
     - 401 Unauthorized: Nếu người dùng chưa xác thực hoặc token không hợp lệ.
     - 400 Bad Request: Nếu splat không tồn tại, trạng thái không thành công, hoặc không có quyền truy cập.
-    - 404 Not Found: Nếu file không tìm thấy tại đường dẫn đầu ra.
+    - 404 Not Found: Nếu file không tìm thấy tại đường dẫn đầu ra, hoặc bản nén chưa được tạo.
 
     **Giải thích:**
     - Endpoint này cho phép người dùng tải xuống một splat nếu có quyền truy cập.
     - Nếu người dùng không xác thực và splat không công khai, truy cập sẽ bị từ chối.
     - Nếu splat chưa hoàn tất hoặc thất bại, yêu cầu tải xuống sẽ không được xử lý.
     - Trạng thái của splat cần là `SUCCESS` và file phải có sẵn tại đường dẫn output.
+    - Bản nén được tạo trong nền sau khi mô hình hoàn thành; tỉ lệ nén và sai số lượng tử hóa
+      được lưu trong `compression_info` của splat.
     """
     splat = crud.splat.get(db=db, id=id)
     if not splat:
@@ -626,6 +1035,11 @@ def download_splat(
             detail=f"Output file not found at: {output_path}"
         )
 
+    if variant == "compressed":
+        output_path = compressed_model_path(output_path)
+        if not os.path.exists(output_path):
+            raise HTTPException(status_code=404, detail="Compressed variant not available")
+
     # Return the file as a download response
     return FileResponse(
         path=output_path,
@@ -639,10 +1053,10 @@ def download_splat(
 })
 async def download_ply(
     *,
+    request: Request,
     db: Session = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_guess_user),
     id: str,
-    background_tasks: BackgroundTasks,
 ) -> Any:
     """
     Tải xuống file PLY chuyển đổi từ file .splat.
@@ -652,10 +1066,11 @@ async def download_ply(
 
     **Đầu vào (Request Parameters):**
     - **id**: ID của splat cần tải xuống (dưới dạng URL parameter).
-    - **background_tasks**: Được sử dụng để lên lịch dọn dẹp file sau khi tải xuống.
 
     **Đầu ra (Response):**
     - 200 OK: Trả về file PLY dưới dạng tải xuống.
+    - 206 Partial Content: Nếu có header `Range`, chỉ trả về đoạn byte được yêu cầu.
+    - 304 Not Modified: Nếu header `If-None-Match` trùng với ETag của file PLY.
     - 401 Unauthorized: Nếu người dùng chưa xác thực hoặc token không hợp lệ.
     - 400 Bad Request: Nếu không có quyền truy cập, file không tồn tại, hoặc trạng thái splat không thành công.
     - 404 Not Found: Nếu splat không tồn tại.
@@ -665,8 +1080,10 @@ async def download_ply(
     - Endpoint này cho phép người dùng tải xuống một file PLY chuyển đổi từ file `.splat`.
     - Chỉ người dùng có quyền truy cập (superuser hoặc chủ sở hữu) mới có thể tải xuống file.
     - File `.splat` cần có trạng thái `SUCCESS` và tồn tại trên hệ thống.
-    - Sử dụng lệnh `gsbox` để chuyển đổi từ `.splat` sang `.ply`. Quá trình này diễn ra bất đồng bộ.
-    - Sau khi tải xuống, file sẽ được lên lịch dọn dẹp trong nền.
+    - File `.splat` được chuyển đổi sang `.ply` (định dạng 3DGS) ngay trong tiến trình, không cần công cụ bên ngoài.
+    - File PLY được lưu trong bộ nhớ đệm theo mã băm của file `.splat`, nên chỉ chuyển đổi một lần;
+      các yêu cầu đồng thời cho cùng một mô hình dùng chung một lần chuyển đổi.
+    - File được trả về kèm `Content-Length`, `ETag` và hỗ trợ header `Range`.
     """
     splat = crud.splat.get(db=db, id=id)
     if not splat:
@@ -689,33 +1106,221 @@ async def download_ply(
     if not input_path or not os.path.exists(input_path):
         raise HTTPException(status_code=400, detail="Input .splat file not found")
 
-    output_path = input_path.replace('.splat', '.ply')
-
-    # Run the Go command asynchronously
-    loop = asyncio.get_event_loop()
+    # Converted once per model content, concurrent requests share the work
+    digest = await run_io(model_digest, input_path)
     try:
-        await loop.run_in_executor(
-            None,
-            lambda: subprocess.run(
-                ['gsbox', 's2p', '-i', input_path, '-o', output_path],
-                check=True
-            )
+        output_path = await PLY_CONVERSIONS.do(
+            digest,
+            lambda: run_io(_conversion_cache().get_or_convert, input_path, digest, ".ply", splat_to_ply),
         )
-    except subprocess.CalledProcessError:
+    except (ValueError, FileNotFoundError):
         raise HTTPException(status_code=500, detail="Failed to convert .splat to .ply")
 
-    # Check again just in case
-    if not os.path.exists(output_path):
-        raise HTTPException(status_code=500, detail="Converted .ply file not found")
+    filename = os.path.basename(input_path).replace('.splat', '.ply')
+    return ranged_file_response(
+        request,
+        output_path,
+        etag=f'"{digest}-ply"',
+        filename=filename,
+    )
+
+
+@router.get("/{id}/lod", responses={
+    401: {"model": schemas.Detail, "description": "User unauthorized"}
+})
+def get_splat_lod(
+    *,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_guess_user),
+    id: str,
+) -> Any:
+    """
+    Lấy danh sách các mức chi tiết (LOD) của mô hình để tải dần.
 
-    # Schedule cleanup
-    background_tasks.add_task(delete_file, output_path)
+    **Yêu cầu Header:**
+    - Cần xác thực người dùng qua token JWT trong header `Authorization` (không bắt buộc với splat công khai).
+
+    **Đầu vào (Request Parameters):**
+    - **id**: ID của splat (dưới dạng URL parameter).
+
+    **Đầu ra (Response):**
+    - 200 OK: Trả về `levels`, mỗi mức gồm `level`, `num_gaussians` và `size` (byte).
+    - 400 Bad Request: Nếu không có quyền truy cập.
+    - 404 Not Found: Nếu splat không tồn tại, chưa hoàn thành hoặc chưa có các mức LOD.
+
+    **Giải thích:**
+    - Mức 0 là mức thô nhất (vài trăm KB), mỗi mức sau có nhiều Gaussian hơn; mức cuối cùng là mô hình đầy đủ.
+    - Viewer nên tải mức 0 qua `GET /{id}/lod/0` để hiển thị ngay, sau đó thay bằng các mức chi tiết hơn.
+    - Các mức được tạo trong nền sau khi mô hình hoàn thành.
+    """
+    splat = _get_viewable_splat(db, id, current_user)
+    if not splat.lod_info:
+        raise HTTPException(status_code=404, detail="Level of detail not available")
+    return {
+        "levels": [
+            {key: value for key, value in level.items() if key != "file"}
+            for level in splat.lod_info["levels"]
+        ]
+    }
+
+
+@router.get("/{id}/lod/{level}", responses={
+    401: {"model": schemas.Detail, "description": "User unauthorized"}
+})
+async def download_splat_lod(
+    *,
+    request: Request,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_guess_user),
+    id: str,
+    level: int,
+) -> Any:
+    """
+    Tải xuống một mức chi tiết (LOD) của mô hình dưới dạng file `.splat`.
+
+    **Yêu cầu Header:**
+    - Cần xác thực người dùng qua token JWT trong header `Authorization` (không bắt buộc với splat công khai).
+    - Hỗ trợ `Range` và `If-None-Match`.
+
+    **Đầu vào (Request Parameters):**
+    - **id**: ID của splat (dưới dạng URL parameter).
+    - **level**: Mức chi tiết, từ 0 (thô nhất) đến mức cuối cùng (mô hình đầy đủ).
 
-    # Stream the file back
+    **Đầu ra (Response):**
+    - 200 OK / 206 Partial Content: File `.splat` của mức được yêu cầu.
+    - 304 Not Modified: Nếu ETag trùng khớp.
+    - 400 Bad Request: Nếu không có quyền truy cập.
+    - 404 Not Found: Nếu splat hoặc mức chi tiết không tồn tại.
+    """
+    splat = _get_viewable_splat(db, id, current_user)
+    levels = (splat.lod_info or {}).get("levels", [])
+    if not 0 <= level < len(levels):
+        raise HTTPException(status_code=404, detail="Level not found")
+    path = os.path.join(os.path.dirname(splat.model_url), levels[level]["file"])
+    etag = await run_in_threadpool(file_etag, path, salt=f"{id}:lod:{level}")
+    if etag is None:
+        raise HTTPException(status_code=404, detail="Level not found")
+    return ranged_file_response(
+        request,
+        path,
+        etag=etag,
+        filename=f"{id}_lod{level}.splat",
+    )
+
+
+def _parse_camera(camera: str) -> np.ndarray:
+    try:
+        values = [float(value) for value in camera.split(",")]
+    except ValueError:
+        values = []
+    if len(values) != 3 or not np.all(np.isfinite(values)):
+        raise HTTPException(status_code=400, detail="camera must be x,y,z")
+    return np.array(values)
+
+
+@router.get("/{id}/chunks", responses={
+    401: {"model": schemas.Detail, "description": "User unauthorized"}
+})
+async def get_splat_chunks(
+    *,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_guess_user),
+    id: str,
+    camera: Optional[str] = Query(None, description="Camera position x,y,z; chunks nearest to it come first"),
+) -> Any:
+    """
+    Lấy chỉ mục các chunk của mô hình (đã được sắp xếp theo không gian) để tải dần.
+
+    **Yêu cầu Header:**
+    - Cần xác thực người dùng qua token JWT trong header `Authorization` (không bắt buộc với splat công khai).
+
+    **Đầu vào (Request Parameters):**
+    - **id**: ID của splat (dưới dạng URL parameter).
+    - **camera**: (Tùy chọn) Vị trí camera `x,y,z`; khi có, các chunk được sắp xếp từ gần đến xa camera.
+
+    **Đầu ra (Response):**
+    - 200 OK: `num_gaussians`, `chunk_size`, `record_size` và danh sách `chunks`,
+      mỗi chunk gồm `index`, `offset`, `length` (byte trong file `.splat`) và hộp bao `min`, `max`.
+    - 400 Bad Request: Nếu không có quyền truy cập hoặc `camera` không hợp lệ.
+    - 404 Not Found: Nếu splat không tồn tại, chưa hoàn thành hoặc chưa được chia chunk.
+
+    **Giải thích:**
+    - Các Gaussian của mô hình được sắp xếp theo đường cong Morton, nên mỗi chunk là một vùng nhỏ gọn của cảnh.
+    - Viewer tải các chunk gần camera trước qua `GET /{id}/chunks/data`.
+    """
+    splat = _get_viewable_splat(db, id, current_user)
+    index = await run_io(read_chunk_index, splat.model_url)
+    if index is None:
+        raise HTTPException(status_code=404, detail="Chunk index not available")
+
+    order = range(len(index.bounds))
+    if camera is not None:
+        order = chunks_by_distance(index, _parse_camera(camera))
+    chunks = []
+    for i in order:
+        offset, length = index.byte_range(int(i), 1)
+        chunks.append({
+            "index": int(i),
+            "offset": offset,
+            "length": length,
+            "min": index.bounds[i, 0].tolist(),
+            "max": index.bounds[i, 1].tolist(),
+        })
+    return {
+        "num_gaussians": index.num_gaussians,
+        "chunk_size": index.chunk_size,
+        "record_size": SPLAT_DTYPE.itemsize,
+        "chunks": chunks,
+    }
+
+
+@router.get("/{id}/chunks/data", responses={
+    401: {"model": schemas.Detail, "description": "User unauthorized"}
+})
+async def download_splat_chunks(
+    *,
+    request: Request,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_guess_user),
+    id: str,
+    start: int = Query(..., ge=0, description="First chunk"),
+    count: int = Query(1, ge=1, description="Number of consecutive chunks"),
+) -> Any:
+    """
+    Tải xuống một dãy chunk liên tiếp của mô hình dưới dạng các bản ghi `.splat`.
+
+    **Yêu cầu Header:**
+    - Cần xác thực người dùng qua token JWT trong header `Authorization` (không bắt buộc với splat công khai).
+    - Hỗ trợ `If-None-Match`.
+
+    **Đầu vào (Request Parameters):**
+    - **id**: ID của splat (dưới dạng URL parameter).
+    - **start**: Chỉ số chunk đầu tiên.
+    - **count**: Số chunk liên tiếp cần tải (mặc định 1).
+
+    **Đầu ra (Response):**
+    - 200 OK: Các bản ghi `.splat` (32 byte mỗi Gaussian) của các chunk được yêu cầu.
+    - 304 Not Modified: Nếu ETag trùng khớp.
+    - 400 Bad Request: Nếu không có quyền truy cập.
+    - 404 Not Found: Nếu splat không tồn tại, chưa được chia chunk hoặc chunk nằm ngoài phạm vi.
+    """
+    splat = _get_viewable_splat(db, id, current_user)
+    index = await run_io(read_chunk_index, splat.model_url)
+    if index is None:
+        raise HTTPException(status_code=404, detail="Chunk index not available")
+    if start >= len(index.bounds):
+        raise HTTPException(status_code=404, detail="Chunk not found")
+
+    etag = await run_in_threadpool(
+        file_etag, splat.model_url, chunk_index_path(splat.model_url), salt=f"{id}:{start}:{count}")
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    offset, length = index.byte_range(start, count)
     return StreamingResponse(
-        open(output_path, 'rb'),
+        iter_file(splat.model_url, start=offset, length=length),
         media_type="application/octet-stream",
-        headers={"Content-Disposition": f"attachment; filename={os.path.basename(output_path)}"}
+        headers={"Content-Length": str(length), "ETag": etag},
     )
 
 import json
@@ -724,9 +1329,11 @@ import json
 })
 async def get_splat_metadata(
     *,
+    request: Request,
     db: Session = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_guess_user),
     id: str,
+    points_format: str = Query("json", regex="^(json|binary)$"),
 ) -> Any:
     """
     Lấy metadata bao gồm cameras.json, points.json và images_url từ thư mục của file .splat.
@@ -736,9 +1343,12 @@ async def get_splat_metadata(
 
     **Đầu vào (Request Parameters):**
     - **id**: ID của splat cần lấy metadata (dưới dạng URL parameter).
+    - **points_format**: `json` (mặc định) hoặc `binary`. Với `binary`, trường `points` chỉ chứa
+      đường dẫn tới `/{id}/metadata/points` (file points.bin) thay vì toàn bộ danh sách điểm.
 
     **Đầu ra (Response):**
     - 200 OK: Trả về JSON chứa dữ liệu từ cameras.json, points.json và danh sách images_url.
+    - 304 Not Modified: Nếu header `If-None-Match` khớp với ETag hiện tại của các file metadata.
     - 401 Unauthorized: Nếu người dùng chưa xác thực hoặc token không hợp lệ.
     - 400 Bad Request: Nếu không có quyền truy cập, file không tồn tại, hoặc trạng thái splat không thành công.
     - 404 Not Found: Nếu splat không tồn tại.
@@ -749,78 +1359,115 @@ async def get_splat_metadata(
     - Chỉ người dùng có quyền truy cập (superuser hoặc chủ sở hữu) mới có thể truy cập metadata.
     - File `.splat` cần có trạng thái `SUCCESS` và tồn tại trên hệ thống.
     - Endpoint sẽ tìm và đọc file cameras.json, points.json, và liệt kê đường dẫn images trong cùng thư mục với file splat.
+    - Nội dung các file được ghép và stream trực tiếp theo từng chunk (không parse JSON), việc đọc file
+      được thực hiện trong threadpool để không chặn event loop.
+    - ETag được tính từ mtime và kích thước file; client gửi lại `If-None-Match` sẽ nhận 304.
     """
-    # Kiểm tra splat có tồn tại
-    splat = crud.splat.get(db=db, id=id)
-    if not splat:
-        raise HTTPException(status_code=404, detail="Splat not found")
-
-    # Kiểm tra quyền truy cập
-    if not current_user:
-        if not splat.is_public:
-            raise HTTPException(status_code=400, detail="Not enough permissions")
-    else:
-        if not current_user.is_superuser and current_user.id != splat.owner_id and not splat.is_public:
-            raise HTTPException(status_code=400, detail="Not enough permissions")
-
-    # Kiểm tra trạng thái
-    if splat.status != 'SUCCESS':
-        raise HTTPException(
-            status_code=404,
-            detail=f"Result not ready or task failed. Current state: {splat.status}"
-        )
-
-    # Lấy đường dẫn thư mục từ model_url
-    splat_file_path = splat.model_url
-    if not splat_file_path or not os.path.exists(splat_file_path):
-        raise HTTPException(status_code=404, detail="Input .splat file not found")
+    # Kiểm tra splat, quyền truy cập và trạng thái
+    splat = _get_viewable_splat(db, id, current_user)
 
     # Lấy thư mục chứa splat file
-    dir_path = os.path.dirname(splat_file_path)
-    
+    dir_path = os.path.dirname(splat.model_url)
+
     # Đường dẫn đến các file metadata
     cameras_json_path = os.path.join(dir_path, 'cameras.json')
     points_json_path = os.path.join(dir_path, 'points.json')
-    
-    # Đọc dữ liệu từ các file JSON
+    points_bin_path = os.path.join(dir_path, 'points.bin')
+    points_path = points_bin_path if points_format == "binary" else points_json_path
+
+    # ETag dựa trên mtime và kích thước file, không đọc nội dung file
+    etag = await run_in_threadpool(
+        file_etag, cameras_json_path, points_path, salt=f"{id}:{points_format}")
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
     try:
-        cameras_data = {}
-        if os.path.exists(cameras_json_path):
-            with open(cameras_json_path, 'r') as f:
-                cameras_data = json.load(f)
+        # Ghép trực tiếp nội dung các file JSON vào response mà không parse
+        parts: List[Any] = [b'{"cameras": ']
+        if await run_in_threadpool(os.path.exists, cameras_json_path):
+            parts.append(cameras_json_path)
         else:
-            cameras_data = {"error": "cameras.json not found"}
-            
-        points_data = {}
-        if os.path.exists(points_json_path):
-            with open(points_json_path, 'r') as f:
-                points_data = json.load(f)
+            parts.append(json.dumps({"error": "cameras.json not found"}).encode())
+
+        parts.append(b', "points": ')
+        if points_format == "binary":
+            if await run_in_threadpool(os.path.exists, points_bin_path):
+                points_data = {
+                    "format": "binary",
+                    "url": f"/splats/{id}/metadata/points",
+                    "size": await run_in_threadpool(os.path.getsize, points_bin_path),
+                }
+            else:
+                points_data = {"error": "points.bin not found"}
+            parts.append(json.dumps(points_data).encode())
+        elif await run_in_threadpool(os.path.exists, points_json_path):
+            parts.append(points_json_path)
         else:
-            points_data = {"error": "points.json not found"}
-            
-        # Tìm tất cả các file hình ảnh trong thư mục
-        images_url =  "/images/" + id
-                
-        # Tạo response JSON kết hợp
-        combined_response = {
-            "cameras": cameras_data,
-            "points": points_data,
-            "images": images_url,
-        }
-        
-        return JSONResponse(content=combined_response)
-        
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=500, detail="Error parsing JSON metadata files")
+            parts.append(json.dumps({"error": "points.json not found"}).encode())
+
+        # Đường dẫn tới thư mục hình ảnh
+        images_url = "/images/" + id
+        parts.append(b', "images": ' + json.dumps(images_url).encode() + b'}')
+
+        headers = {"Cache-Control": "no-cache"}
+        if etag:
+            headers["ETag"] = etag
+        return StreamingResponse(
+            splice_files(parts),
+            media_type="application/json",
+            headers=headers,
+        )
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving metadata: {str(e)}")
-    
+
+
+@router.get("/{id}/metadata/points", responses={
+    401: {"model": schemas.Detail, "description": "User unauthorized"}
+})
+def get_splat_points_binary(
+    *,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_guess_user),
+    id: str,
+) -> Any:
+    """
+    Lấy các điểm 3D thưa (sparse points) của splat dưới dạng nhị phân (points.bin).
+
+    **Yêu cầu Header:**
+    - Cần xác thực người dùng qua token JWT trong header `Authorization`.
+
+    **Đầu vào (Request Parameters):**
+    - **id**: ID của splat (dưới dạng URL parameter).
+
+    **Đầu ra (Response):**
+    - 200 OK: Trả về file points.bin (`application/octet-stream`).
+    - 400 Bad Request: Nếu không có quyền truy cập.
+    - 404 Not Found: Nếu splat, trạng thái hoặc file points.bin không tồn tại.
+
+    **Giải thích:**
+    - File gồm header 16 byte (magic `P3D\\0`, version, count, reserved), sau đó là `count * 3` float32 (xyz)
+      và `count * 3` uint8 (rgb), có thể đọc trực tiếp bằng `Float32Array`/`Uint8Array` phía client.
+    - Nhỏ hơn khoảng 10 lần so với points.json và không cần parse/encode JSON trên server.
+    """
+    splat = _get_viewable_splat(db, id, current_user)
+    points_bin_path = os.path.join(os.path.dirname(splat.model_url), 'points.bin')
+    if not os.path.exists(points_bin_path):
+        raise HTTPException(status_code=404, detail="points.bin not found")
+
+    return FileResponse(
+        path=points_bin_path,
+        filename=f"{id}_points.bin",
+        media_type="application/octet-stream"
+    )
+
 
 @router.get("/{id}/download-colmap", responses={
     401: {"model": schemas.Detail, "description": "User unauthorized"}
 })
 async def download_colmap_files(
     *,
+    request: Request,
     db: Session = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_guess_user),
     id: str,
@@ -837,6 +1484,8 @@ async def download_colmap_files(
 
     **Đầu ra (Response):**
     - 200 OK: Trả về file ZIP chứa các file COLMAP và thư mục images.
+    - 206 Partial Content: Nếu có header `Range`, chỉ trả về đoạn byte được yêu cầu.
+    - 304 Not Modified: Nếu header `If-None-Match` trùng với ETag của file ZIP.
     - 401 Unauthorized: Nếu người dùng chưa xác thực hoặc token không hợp lệ.
     - 400 Bad Request: Nếu không có quyền truy cập, file không tồn tại, hoặc trạng thái splat không thành công.
     - 404 Not Found: Nếu splat không tồn tại hoặc thư mục COLMAP không tồn tại.
@@ -845,7 +1494,10 @@ async def download_colmap_files(
     - Endpoint này cho phép người dùng tải xuống các file COLMAP liên quan đến splat dưới dạng file ZIP.
     - Chỉ người dùng có quyền truy cập (superuser hoặc chủ sở hữu) mới có thể tải xuống.
     - File ZIP sẽ chứa: cameras.bin, images.bin, points3D.bin và thư mục images.
-    - File ZIP được tạo trong bộ nhớ và gửi đi mà không lưu trữ tạm thời trên ổ đĩa.
+    - File ZIP được tạo một lần khi xuất mô hình (hoặc ở lần tải đầu tiên với splat cũ) và lưu cạnh mô hình.
+    - ETag là mã băm SHA-256 của file ZIP; hỗ trợ tải tiếp bằng header `Range`.
+    - Ảnh JPEG/PNG được lưu nguyên (ZIP_STORED), chỉ các file .bin được nén (deflate).
+    - File ZIP bị xóa cùng thư mục làm việc khi splat bị xóa.
     """
     # Kiểm tra splat có tồn tại
     splat = crud.splat.get(db=db, id=id)
@@ -867,46 +1519,22 @@ async def download_colmap_files(
             detail=f"Result not ready or task failed. Current state: {splat.status}"
         )
 
-    # Tìm thư mục colmap
-    user_id = splat.owner_id
-    colmap_dir = os.path.join(settings.MODEL_WORKSPACES_DIR, str(user_id), splat.id, "colmap")
-    
-    if not os.path.exists(colmap_dir):
-        raise HTTPException(status_code=404, detail="COLMAP directory not found")
-
-    # Tạo file ZIP trong bộ nhớ
-    zip_buffer = BytesIO()
-    
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        # Thêm các file .bin
-        bin_files = ['cameras.bin', 'images.bin', 'points3D.bin']
-        for bin_file in bin_files:
-            bin_path = os.path.join(colmap_dir, bin_file)
-            if os.path.exists(bin_path):
-                zip_file.write(bin_path, arcname=bin_file)
-            else:
-                raise HTTPException(status_code=404, detail=f"{bin_file} not found")
-        
-        # Thêm thư mục images và các file bên trong
-        images_dir = os.path.join(colmap_dir, "images")
-        if os.path.exists(images_dir):
-            for root, dirs, files in os.walk(images_dir):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    # Tạo đường dẫn tương đối cho file trong zip
-                    arcname = os.path.relpath(file_path, colmap_dir)
-                    zip_file.write(file_path, arcname=arcname)
-        else:
-            raise HTTPException(status_code=404, detail="Images directory not found")
-    
-    # Di chuyển con trỏ về đầu buffer
-    zip_buffer.seek(0)
-    
-    # Trả về file ZIP dưới dạng streaming response
-    return StreamingResponse(
-        zip_buffer,
+    # File ZIP được tạo một lần và lưu cạnh mô hình
+    workspace_path = os.path.join(settings.MODEL_WORKSPACES_DIR, str(splat.owner_id), splat.id)
+    info = await run_io(read_archive_info, workspace_path)
+    if info is None:
+        # Splat cũ chưa có file ZIP dựng sẵn: tạo ngay lần đầu được yêu cầu
+        if not os.path.exists(os.path.join(workspace_path, "colmap")):
+            raise HTTPException(status_code=404, detail="COLMAP directory not found")
+        try:
+            info = await COLMAP_ARCHIVES.do(splat.id, lambda: run_io(build_colmap_archive, workspace_path))
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+
+    return ranged_file_response(
+        request,
+        archive_path(workspace_path),
+        etag=f'"{info["sha256"]}"',
         media_type="application/zip",
-        headers={
-            "Content-Disposition": f"attachment; filename=colmap_files_{id}.zip"
-        }
+        filename=f"colmap_files_{id}.zip",
     )
\ No newline at end of file
@@ -1,10 +1,11 @@
 import os
+import time
 from time import sleep
-import subprocess
 import shutil
-from typing import Any, Dict
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
 
-from celery import Celery, states  # type: ignore
+from celery import Celery, chain, states  # type: ignore
 from celery.utils.log import get_task_logger  # type: ignore
 from celery.exceptions import Ignore
 from celery.app.task import Task
@@ -16,7 +17,25 @@ from app import crud
 from app import schemas
 from app.db.session import SessionLocal
 
+from app.utils.colmap_archive import archive_path, build_colmap_archive
+from app.utils.conversion_cache import ConversionCache, model_digest
 from app.utils.export_to_json import process_colmap_model
+from app.utils.frame_extraction import extract_frames
+from app.utils.image_store import BlobStore, image_manifest_path, ingest_images
+from app.utils.keyframes import select_keyframes
+from app.utils.matcher_strategy import (choose_matcher, has_gps_priors,
+                                        matcher_command, matcher_info)
+from app.utils.pipeline_manifest import PipelineManifest
+from app.utils.process_runner import (CommandResult, ProgressParser, colmap_progress,
+                                      opensplat_progress, run_command)
+from app.utils.splat_chunks import sort_splat
+from app.utils.splat_compression import compress_splat, compressed_model_path
+from app.utils.splat_lod import build_lod
+from app.utils.splat_prune import prune_splat
+from app.utils.splat_stats import compute_stats
+from app.utils.staging import stage_file, stage_files, stage_tree
+from app.utils.training_planner import (available_resources, fixed_plan, load_cost_model,
+                                        opensplat_arguments, plan_training, scene_size)
 
 celery_app = Celery('tasks')
 celery_app.conf.broker_url = os.environ.get(
@@ -28,6 +47,9 @@ celery_app.conf.result_backend = os.environ.get(
 celery_app.conf.task_ignore_result = True
 celery_app.conf.task_store_errors_even_if_ignored = True
 celery_app.conf.update(imports=['app.celery.celery_app'])
+# Pipeline stages are long-running: only reserve one message at a time so a
+# busy worker does not hold back stages that another worker could start.
+celery_app.conf.worker_prefetch_multiplier = 1
 celery_log = get_task_logger(__name__)
 
 
@@ -63,277 +85,626 @@ def send_email_async(
         smtp_options["password"] = config.SMTP_PASSWORD
     message.send(to=email_to, render=environment, smtp=smtp_options)
 
-@celery_app.task(bind=True, ignore_result=True, queue='heavy_tasks')
-def process_video(self: Task,
-                  task_id: str,
-                  workspace_path:str,
-                  dataset_dir: str,
-                  num_iterations: int = 10000,
-                  ) -> Any:
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp')
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv")
+
+
+def _job_paths(workspace_path: str) -> Dict[str, str]:
+    """Directories used by the reconstruction pipeline of one splat."""
+    dataset_path = os.path.join(workspace_path, "workspace")
+    return {
+        "dataset_path": dataset_path,
+        "database_path": os.path.join(dataset_path, "database.db"),
+        "sparse_dir": os.path.join(dataset_path, "sparse"),
+        "dense_dir": os.path.join(dataset_path, "dense"),
+        "opensplat_dir": os.path.join(dataset_path, "to_opensplat"),
+        "outputs_dir": os.path.join(dataset_path, "outputs"),
+        "colmap_folder": os.path.join(workspace_path, "colmap"),
+    }
+
+
+def _count_images(img_dir: str) -> int:
+    return len([f for f in os.listdir(img_dir) if f.lower().endswith(IMAGE_EXTENSIONS)])
+
+
+def _update_splat(task_id: str, **fields: Any) -> None:
+    """Update columns of the splat from inside a pipeline stage."""
     db = SessionLocal()
-    """Process video to generate 3D Gaussian Splatting model"""
     try:
-        if not os.path.exists(dataset_dir):
-            raise FileNotFoundError(f"Dataset directory does not exist: {dataset_dir}")
-        celery_log.info(f"Starting task {task_id} for dataset {dataset_dir}")
+        splat = crud.splat.get(db, id=task_id)
+        crud.splat.update(db=db, db_obj=splat, obj_in=schemas.SplatUpdate(**fields))
+    finally:
+        db.close()
 
-        # Update task state to started
-        self.update_state(state=states.STARTED,
-                          meta={"status": "Started processing"})
-        
-        splat_in = schemas.SplatUpdate(status = "STARTED")
-        splat = crud.splat.get(db, id= task_id)
-        crud.splat.update(db = db, db_obj=splat, obj_in=splat_in)
 
-        # Create workspace directory
-        dataset_path = os.path.join(workspace_path, "workspace")
-        os.makedirs(dataset_path, exist_ok=True)
-
-        # Create output directory
-        is_video_dir = "videos" in dataset_dir
-        img_dir = os.path.join(dataset_path, "images")
-        os.makedirs(img_dir, exist_ok=True)
-        
-         # If processing videos, extract frames with ffmpeg
-        if is_video_dir:
-            self.update_state(state="PROGRESS",
-                            meta={"status": "Extracting frames from videos"})
-            
-            video_files = [f for f in os.listdir(dataset_dir) if os.path.isfile(os.path.join(dataset_dir, f)) and 
-                           f.lower().endswith((".mp4", ".avi", ".mov", ".mkv"))]
-            
-            for i, video_file in enumerate(video_files):
-                video_path = os.path.join(dataset_dir, video_file)
-                output_pattern = os.path.join(img_dir, f"video{i+1}_%04d.png")
-                
-                # Extract frames at 2fps
-                cmd = [
-                    "ffmpeg", "-i", video_path, 
-                    "-vf", "fps=2", 
-                    "-q:v", "1",  # High quality
-                    output_pattern
-                ]
-                run_command(cmd)
-        else:
-            # If dataset_dir is already the images directory, use it directly
-            img_dir = dataset_dir
-
-        # 3. Run COLMAP feature extraction
+def _run_stage_command(self: Task, task_id: str, workspace_path: str, stage: str,
+                       cmd: List[str], status: str,
+                       parser: Optional[ProgressParser] = None) -> CommandResult:
+    """Run an external command of a stage, reporting its progress as the task state."""
+    def on_progress(fraction: float) -> None:
         self.update_state(state="PROGRESS",
-                          meta={"status": "Running COLMAP feature extraction"})
-        
-        splat_in = schemas.SplatUpdate(status = "PROGRESS")
-        splat = crud.splat.get(db, id= task_id)
-        crud.splat.update(db = db, db_obj=splat, obj_in=splat_in)
+                          meta={"status": status, "stage": stage,
+                                "progress": round(100 * fraction, 1)})
+
+    celery_log.info(f"Task {task_id}: running {' '.join(cmd)}")
+    result = run_command(
+        cmd,
+        log_path=os.path.join(workspace_path, "logs", "pipeline.log"),
+        parser=parser,
+        on_progress=on_progress,
+        timeout=settings.STAGE_TIMEOUT_SECONDS.get(stage),
+        memory_limit_mb=settings.STAGE_MEMORY_LIMIT_MB.get(stage),
+        cgroup_root=settings.PIPELINE_CGROUP_ROOT,
+        env={"QT_QPA_PLATFORM": "offscreen"},
+        log_max_bytes=settings.PIPELINE_LOG_MAX_BYTES,
+        log_backups=settings.PIPELINE_LOG_BACKUPS,
+    )
+    celery_log.info(f"Task {task_id}: {cmd[0]} finished in {result.seconds:.0f} s, "
+                    f"peak memory {result.peak_memory_bytes / (1024 * 1024):.0f} MB")
+    return result
 
-        cmd = [
-            "colmap", "feature_extractor",
-            "--database_path", os.path.join(dataset_path, "database.db"),
-            "--image_path", img_dir,
-            "--SiftExtraction.use_gpu", "1",
-        ]
-        run_command(cmd)
 
-        # 4. Run COLMAP sequential matcher
-        self.update_state(state="PROGRESS",
-                          meta={"status": "Running COLMAP matcher"})
-
-        cmd = [
-            "colmap", "exhaustive_matcher",
-            "--database_path", os.path.join(dataset_path, "database.db"),
-            "--SiftMatching.use_gpu", "1"
-        ]
-        run_command(cmd)
-        sparse_dir = os.path.join(dataset_path, "sparse")
-        os.makedirs(sparse_dir, exist_ok=True)
-
-        # 6. Run COLMAP mapper
-        self.update_state(state="PROGRESS",
-                          meta={"status": "Running COLMAP mapper"})
-        num_images = len([f for f in os.listdir(img_dir) if f.lower().endswith(('.png', '.jpg', '.jpeg'))])
-        max_num_tracks = num_images * 1000
-        cmd = [
-            "glomap", "mapper",
-            "--database_path", os.path.join(dataset_path, "database.db"),
-            "--image_path", img_dir,
-            "--output_path", sparse_dir,
-            "--GlobalPositioning.use_gpu", "1",
-            "--BundleAdjustment.use_gpu", "1",
-            "--TrackEstablishment.max_num_tracks", str(max_num_tracks)
-        ]
-        run_command(cmd)
-
-
-        # 7. Create dense directory
-        dense_dir = os.path.join(dataset_path, "dense")
-        os.makedirs(dense_dir, exist_ok=True)
-
-        # 8. Run COLMAP image undistorter
-        self.update_state(state="PROGRESS",
-                          meta={"status": "Running COLMAP image undistorter"})
-
-        cmd = [
-            "colmap", "image_undistorter",
-            "--image_path", img_dir,
-            "--input_path", os.path.join(sparse_dir, "0"),
-            "--output_path", dense_dir,
-            "--output_type", "COLMAP"
-        ]
-        run_command(cmd)
-
-        # 9. Create to_opensplat directory
-        opensplat_dir = os.path.join(dataset_path, "to_opensplat")
-        outputs_dir = os.path.join(dataset_path, "outputs")
-        os.makedirs(opensplat_dir, exist_ok=True)
-        os.makedirs(outputs_dir, exist_ok=True)
-
-        # 10. Create symbolic links
-
-        # Copy directory (images)
-        shutil.copytree(os.path.join(dense_dir, "images"),
-                        os.path.join(opensplat_dir, "images"),
-                        dirs_exist_ok=True)  # Only in Python 3.8+
-
-        # Copy individual .bin files
-        shutil.copy(os.path.join(dense_dir, "sparse", "cameras.bin"),
-                    os.path.join(opensplat_dir, "cameras.bin"))
-
-        shutil.copy(os.path.join(dense_dir, "sparse", "images.bin"),
-                    os.path.join(opensplat_dir, "images.bin"))
-
-        shutil.copy(os.path.join(dense_dir, "sparse", "points3D.bin"),
-                    os.path.join(opensplat_dir, "points3D.bin"))
-
-        #Save colmap metadata to JSON
-        process_colmap_model(opensplat_dir, ".bin", workspace_path)
-        
-        colmap_folder = os.path.join(workspace_path, "colmap")
-        os.makedirs(colmap_folder, exist_ok=True)
-
-        # Copy COLMAP binary files to the colmap folder
-        shutil.copy(os.path.join(opensplat_dir, "cameras.bin"),
-                    os.path.join(colmap_folder, "cameras.bin"))
-        shutil.copy(os.path.join(opensplat_dir, "images.bin"),
-                    os.path.join(colmap_folder, "images.bin"))
-        shutil.copy(os.path.join(opensplat_dir, "points3D.bin"),
-                    os.path.join(colmap_folder, "points3D.bin"))
-
-        # Copy images directory to the colmap folder
-        shutil.copytree(os.path.join(opensplat_dir, "images"),
-                        os.path.join(colmap_folder, "images"),
-                        dirs_exist_ok=True)
-
-        # Keep the existing copy to MODEL_IMAGES_DIR
-        shutil.copytree(os.path.join(opensplat_dir, "images"),
-                        os.path.join(settings.MODEL_IMAGES_DIR, task_id),
-                        dirs_exist_ok=True)
-        
-
-        # 11. Run opensplat
+def _image_dir(manifest: PipelineManifest) -> str:
+    """Directory of the images fed to COLMAP, i.e. the selected keyframes."""
+    return manifest.outputs("select_keyframes")["img_dir"]
+
+
+def stage_extract_frames(self: Task, manifest: PipelineManifest, task_id: str,
+                         workspace_path: str) -> Dict[str, Any]:
+    dataset_dir = manifest.params["dataset_dir"]
+    paths = _job_paths(workspace_path)
+    os.makedirs(paths["dataset_path"], exist_ok=True)
+
+    # If processing videos, extract frames with ffmpeg
+    if "videos" not in dataset_dir:
+        # If dataset_dir is already the images directory, use it directly
+        return {"frames_dir": dataset_dir, "from_videos": False}
+
+    frames_dir = os.path.join(paths["dataset_path"], "frames")
+    os.makedirs(frames_dir, exist_ok=True)
+    self.update_state(state="PROGRESS",
+                      meta={"status": "Extracting frames from videos", "progress": 0})
+
+    video_files = sorted(f for f in os.listdir(dataset_dir) if os.path.isfile(os.path.join(dataset_dir, f)) and
+                         f.lower().endswith(VIDEO_EXTENSIONS))
+
+    def on_progress(fraction: float) -> None:
         self.update_state(state="PROGRESS",
-                          meta={"status": "Running OpenSplat"})
-        
-        downscale_factor = 1  # Default
-        try:
-            first_image = next(f for f in os.listdir(img_dir) if f.lower().endswith(('.png', '.jpg', '.jpeg')))
-            from PIL import Image
-            with Image.open(os.path.join(img_dir, first_image)) as img:
-                width, height = img.size
-                if max(width, height) > 1600:
-                    downscale_factor = 2
-        except Exception as e:
-            celery_log.warning(f"Could not determine image width: {str(e)}")
-
-        output_model = f"{task_id}_model.splat"
-        cmd = [
-            "opensplat",
-            os.path.join(dataset_path, "to_opensplat"),
-            "-n", str(num_iterations),
-            "-o", os.path.join(dataset_path, "outputs", output_model),
-            "--downscale-factor", str(downscale_factor)
-        ]
-
-        # Change to dataset path for opensplat execution
-        current_dir = os.getcwd()
-        print(current_dir)
-        run_command(cmd)
-        os.chdir(current_dir)
-
-        # 12. Copy the result to output directory
-
-        src_path = os.path.join(dataset_path, "outputs", output_model)
-        dst_path = os.path.join(workspace_path, output_model)
-
-        if os.path.exists(src_path):
-            shutil.copy(src_path, dst_path)
-            celery_log.info(f"Model saved to {dst_path}")
-        else:
-            raise Exception(f"Expected output file {src_path} not found")
-        
-        # Check if compression was successful
-        if os.path.exists(dst_path):
-            celery_log.info(f"Compressed model saved to {dst_path}")
-            
-            # Calculate the size of the compressed model in MB
-            size = round(os.path.getsize(dst_path) / (1024 * 1024), 2)
-            
-            # Update the model_url to point to the compressed file and include model_size
-            
-            splat_in = schemas.SplatUpdate(status="SUCCESS", model_url=dst_path, model_size=size)
+                          meta={"status": "Extracting frames from videos",
+                                "progress": round(100 * fraction, 1)})
+
+    # One ffmpeg per video, bounded by the configured pool size and CPU budget
+    extract_frames(
+        [os.path.join(dataset_dir, f) for f in video_files],
+        frames_dir,
+        fps=settings.FRAME_EXTRACTION_FPS,
+        image_format=settings.FRAME_IMAGE_FORMAT,
+        max_workers=settings.FRAME_EXTRACTION_MAX_WORKERS,
+        cpu_budget=settings.FRAME_EXTRACTION_CPU_BUDGET,
+        on_progress=on_progress,
+        log_path=os.path.join(workspace_path, "logs", "pipeline.log"),
+        timeout=settings.STAGE_TIMEOUT_SECONDS.get("extract_frames"),
+        memory_limit_mb=settings.STAGE_MEMORY_LIMIT_MB.get("extract_frames"),
+        cgroup_root=settings.PIPELINE_CGROUP_ROOT,
+        log_max_bytes=settings.PIPELINE_LOG_MAX_BYTES,
+        log_backups=settings.PIPELINE_LOG_BACKUPS,
+    )
+    return {"frames_dir": frames_dir, "from_videos": True}
+
+
+def stage_select_keyframes(self: Task, manifest: PipelineManifest, task_id: str,
+                           workspace_path: str) -> Dict[str, Any]:
+    extracted = manifest.outputs("extract_frames")
+    # Manifests written before keyframe selection recorded img_dir instead
+    frames_dir = extracted.get("frames_dir", extracted.get("img_dir"))
+    # Uploaded photo sets are not a sequence, keep every image
+    if not extracted.get("from_videos") or not settings.KEYFRAME_SELECTION_ENABLED:
+        return {"img_dir": frames_dir}
+
+    img_dir = os.path.join(_job_paths(workspace_path)["dataset_path"], "images")
+    if os.path.exists(img_dir):
+        shutil.rmtree(img_dir)
+    self.update_state(state="PROGRESS",
+                      meta={"status": "Selecting keyframes"})
+
+    counts = select_keyframes(
+        frames_dir,
+        img_dir,
+        target_count=settings.KEYFRAME_TARGET_COUNT,
+        min_motion=settings.KEYFRAME_MIN_MOTION,
+        blur_ratio=settings.KEYFRAME_BLUR_RATIO,
+    )
+    celery_log.info(f"Task {task_id}: kept {counts['num_keyframes']} of "
+                    f"{counts['num_frames']} extracted frames")
+    return {"img_dir": img_dir, **counts}
+
+
+def stage_feature_extraction(self: Task, manifest: PipelineManifest, task_id: str,
+                             workspace_path: str) -> Dict[str, Any]:
+    img_dir = _image_dir(manifest)
+    paths = _job_paths(workspace_path)
+    status = "Running COLMAP feature extraction"
+    self.update_state(state="PROGRESS", meta={"status": status})
+
+    # Start from a fresh database so a half-written one is never reused
+    if os.path.exists(paths["database_path"]):
+        os.remove(paths["database_path"])
+    cmd = [
+        "colmap", "feature_extractor",
+        "--database_path", paths["database_path"],
+        "--image_path", img_dir,
+        "--SiftExtraction.use_gpu", "1",
+    ]
+    _run_stage_command(self, task_id, workspace_path, "feature_extraction", cmd, status, colmap_progress)
+    return {"database_path": paths["database_path"]}
+
+
+def stage_matching(self: Task, manifest: PipelineManifest, task_id: str,
+                   workspace_path: str) -> Dict[str, Any]:
+    img_dir = _image_dir(manifest)
+    paths = _job_paths(workspace_path)
+    num_images = _count_images(img_dir)
+    from_videos = bool(manifest.outputs("extract_frames").get("from_videos"))
+
+    # Exhaustive matching is quadratic in the number of images, only use it
+    # when the dataset is small or there is nothing better
+    strategy = choose_matcher(
+        num_images,
+        from_videos,
+        exhaustive_max_images=settings.MATCHER_EXHAUSTIVE_MAX_IMAGES,
+        vocab_tree_path=settings.MATCHER_VOCAB_TREE_PATH,
+        has_gps=not from_videos and has_gps_priors(img_dir),
+        forced=settings.MATCHER_STRATEGY,
+    )
+    status = f"Running COLMAP {strategy} matcher"
+    self.update_state(state="PROGRESS", meta={"status": status})
+
+    cmd = matcher_command(
+        strategy,
+        paths["database_path"],
+        vocab_tree_path=settings.MATCHER_VOCAB_TREE_PATH,
+        sequential_overlap=settings.MATCHER_SEQUENTIAL_OVERLAP,
+        vocab_tree_num_images=settings.MATCHER_VOCAB_TREE_NUM_IMAGES,
+    )
+    started = time.monotonic()
+    _run_stage_command(self, task_id, workspace_path, "matching", cmd, status, colmap_progress)
+    info = matcher_info(strategy, num_images, from_videos, time.monotonic() - started)
+    celery_log.info(f"Task {task_id}: matching {info}")
+    _update_splat(task_id, matcher_info=info)
+    return {"database_path": paths["database_path"], "matcher": info}
+
+
+def stage_mapping(self: Task, manifest: PipelineManifest, task_id: str,
+                  workspace_path: str) -> Dict[str, Any]:
+    img_dir = _image_dir(manifest)
+    paths = _job_paths(workspace_path)
+    sparse_dir = paths["sparse_dir"]
+    if os.path.exists(sparse_dir):
+        shutil.rmtree(sparse_dir)
+    os.makedirs(sparse_dir, exist_ok=True)
+
+    status = "Running COLMAP mapper"
+    self.update_state(state="PROGRESS", meta={"status": status})
+    max_num_tracks = _count_images(img_dir) * 1000
+    cmd = [
+        "glomap", "mapper",
+        "--database_path", paths["database_path"],
+        "--image_path", img_dir,
+        "--output_path", sparse_dir,
+        "--GlobalPositioning.use_gpu", "1",
+        "--BundleAdjustment.use_gpu", "1",
+        "--TrackEstablishment.max_num_tracks", str(max_num_tracks)
+    ]
+    _run_stage_command(self, task_id, workspace_path, "mapping", cmd, status)
+    return {"model_dir": os.path.join(sparse_dir, "0")}
+
+
+def stage_undistortion(self: Task, manifest: PipelineManifest, task_id: str,
+                       workspace_path: str) -> Dict[str, Any]:
+    img_dir = _image_dir(manifest)
+    dense_dir = _job_paths(workspace_path)["dense_dir"]
+    os.makedirs(dense_dir, exist_ok=True)
+
+    status = "Running COLMAP image undistorter"
+    self.update_state(state="PROGRESS", meta={"status": status})
+    cmd = [
+        "colmap", "image_undistorter",
+        "--image_path", img_dir,
+        "--input_path", manifest.outputs("mapping")["model_dir"],
+        "--output_path", dense_dir,
+        "--output_type", "COLMAP"
+    ]
+    _run_stage_command(self, task_id, workspace_path, "undistortion", cmd, status, colmap_progress)
+    return {"dense_dir": dense_dir}
+
+
+def stage_assets(self: Task, manifest: PipelineManifest, task_id: str,
+                 workspace_path: str) -> Dict[str, Any]:
+    paths = _job_paths(workspace_path)
+    dense_dir = paths["dense_dir"]
+    opensplat_dir = paths["opensplat_dir"]
+    colmap_folder = paths["colmap_folder"]
+    image_manifest = image_manifest_path(settings.MODEL_IMAGES_DIR, task_id)
+    os.makedirs(opensplat_dir, exist_ok=True)
+    os.makedirs(paths["outputs_dir"], exist_ok=True)
+
+    # The same undistorted images and COLMAP model end up in three places;
+    # hard link (or reflink) them instead of writing the bytes again
+    stats = Counter()
+    bin_files = ("cameras.bin", "images.bin", "points3D.bin")
+    stage_tree(os.path.join(dense_dir, "images"),
+               os.path.join(opensplat_dir, "images"), stats)
+    stage_files(os.path.join(dense_dir, "sparse"), opensplat_dir, bin_files, stats)
+
+    #Save colmap metadata to JSON
+    process_colmap_model(opensplat_dir, ".bin", workspace_path)
+
+    # COLMAP binary files and images for the colmap folder
+    stage_files(opensplat_dir, colmap_folder, bin_files, stats)
+    stage_tree(os.path.join(opensplat_dir, "images"),
+               os.path.join(colmap_folder, "images"), stats)
+
+    celery_log.info(
+        f"Task {task_id}: staged {sum(stats[m] for m in ('linked', 'reflinked', 'copied'))} files, "
+        f"{stats['bytes_saved'] / (1024 * 1024):.1f} MB saved, "
+        f"{stats['bytes_copied'] / (1024 * 1024):.1f} MB copied"
+    )
+
+    # Images served for the splat, stored once in the shared blob store
+    db = SessionLocal()
+    try:
+        blobs = ingest_images(db, BlobStore(settings.MODEL_BLOBS_DIR), image_manifest,
+                              os.path.join(opensplat_dir, "images"))
+    finally:
+        db.close()
+    celery_log.info(f"Task {task_id}: image store {blobs}")
+    return {
+        "opensplat_dir": opensplat_dir,
+        "colmap_dir": colmap_folder,
+        "image_manifest_path": image_manifest,
+        "cameras_json_path": os.path.join(workspace_path, "cameras.json"),
+        "staging": dict(stats),
+        "blobs": blobs,
+    }
+
+
+def stage_training(self: Task, manifest: PipelineManifest, task_id: str,
+                   workspace_path: str) -> Dict[str, Any]:
+    paths = _job_paths(workspace_path)
+    num_iterations = manifest.params.get("num_iterations", 10000)
+
+    scene = scene_size(paths["opensplat_dir"])
+    if settings.TRAINING_PLANNER_ENABLED:
+        resources = available_resources(settings.TRAINING_MEMORY_MB, settings.TRAINING_GPU_MEMORY_MB,
+                                        settings.TRAINING_THREADS)
+        plan = plan_training(
+            scene, resources, load_cost_model(settings.TRAINING_COST_MODEL_PATH),
+            target_seconds=settings.TRAINING_TARGET_SECONDS,
+            max_iterations=num_iterations,
+            min_iterations=settings.TRAINING_MIN_ITERATIONS,
+            max_image_size=settings.TRAINING_MAX_IMAGE_SIZE,
+            memory_fraction=settings.TRAINING_MEMORY_FRACTION,
+        )
+        if not plan["within_budget"]:
+            celery_log.warning(f"Task {task_id}: training is expected to exceed its time or memory budget")
+    else:
+        plan = fixed_plan(scene, num_iterations, settings.TRAINING_MAX_IMAGE_SIZE)
+    celery_log.info(f"Task {task_id}: training plan {plan}")
+    _update_splat(task_id, training_plan=plan)
+
+    status = "Running OpenSplat"
+    self.update_state(state="PROGRESS", meta={"status": status})
+
+    output_model = f"{task_id}_model.splat"
+    model_path = os.path.join(paths["outputs_dir"], output_model)
+    cmd = [
+        "opensplat",
+        paths["opensplat_dir"],
+        "-o", model_path,
+        *opensplat_arguments(plan),
+    ]
+
+    _run_stage_command(self, task_id, workspace_path, "training", cmd, status,
+                       opensplat_progress(plan["num_iterations"]))
+
+    if not os.path.exists(model_path):
+        raise Exception(f"Expected output file {model_path} not found")
+    return {"model_path": model_path, "plan": plan}
+
+
+def stage_publish_model(self: Task, manifest: PipelineManifest, task_id: str,
+                        workspace_path: str) -> Dict[str, Any]:
+    # Copy the result to output directory
+    src_path = manifest.outputs("training")["model_path"]
+    dst_path = os.path.join(workspace_path, os.path.basename(src_path))
+    stage_file(src_path, dst_path)
+    celery_log.info(f"Model saved to {dst_path}")
+    return {"model_path": dst_path}
+
+
+def stage_colmap_archive(self: Task, manifest: PipelineManifest, task_id: str,
+                         workspace_path: str) -> Dict[str, Any]:
+    # Prebuild the COLMAP download, it never changes once the splat succeeded.
+    # Not fatal: the download endpoint builds it on first request otherwise.
+    try:
+        info = build_colmap_archive(workspace_path)
+    except Exception as e:
+        celery_log.warning(f"Task {task_id}: could not build the COLMAP archive: {str(e)}")
+        return {}
+    celery_log.info(f"Task {task_id}: COLMAP archive {info}")
+    return {"archive_path": archive_path(workspace_path), **info}
+
+
+# Ordered stages of the reconstruction pipeline. Each stage receives the
+# manifest, reads what it needs from the outputs of earlier stages and
+# returns its own outputs, which are recorded once it completes.
+PIPELINE_STAGES = {
+    "extract_frames": stage_extract_frames,
+    "select_keyframes": stage_select_keyframes,
+    "feature_extraction": stage_feature_extraction,
+    "matching": stage_matching,
+    "mapping": stage_mapping,
+    "undistortion": stage_undistortion,
+    "stage_assets": stage_assets,
+    "training": stage_training,
+    "publish_model": stage_publish_model,
+    "colmap_archive": stage_colmap_archive,
+}
+
+
+def cleanup_workspace(workspace_path: str) -> None:
+    """Remove the intermediate pipeline workspace of a splat."""
+    try:
+        dataset_path = os.path.join(workspace_path, "workspace")
+        if os.path.exists(dataset_path):
+            shutil.rmtree(dataset_path)
+            celery_log.info(f"Cleaned up workspace at {dataset_path}")
+    except Exception as cleanup_error:
+        celery_log.warning(f"Failed to remove workspace: {str(cleanup_error)}")
+
+
+def run_stages(self: Task, task_id: str, workspace_path: str, stages: List[str]) -> None:
+    """
+    Run the given pipeline stages, skipping those already completed.
+
+    On failure the splat is marked FAILURE and Ignore is raised, which also
+    stops the rest of the chain. The workspace is kept so the job can be
+    resumed later; it is only removed once the model has been published,
+    or when the splat is deleted (abandoned).
+    """
+    db = SessionLocal()
+    manifest = PipelineManifest(workspace_path)
+    stage = None
+    try:
+        dataset_dir = manifest.params["dataset_dir"]
+        if not os.path.exists(dataset_dir):
+            raise FileNotFoundError(f"Dataset directory does not exist: {dataset_dir}")
+
+        for stage in stages:
+            if manifest.is_done(stage):
+                celery_log.info(f"Task {task_id}: skipping completed stage {stage}")
+                continue
+            celery_log.info(f"Task {task_id}: running stage {stage}")
+            status = "STARTED" if stage == "extract_frames" else "PROGRESS"
+            self.update_state(state=status, meta={"status": f"Running {stage}", "stage": stage})
+            splat_in = schemas.SplatUpdate(status=status, stage=stage)
             splat = crud.splat.get(db, id=task_id)
             crud.splat.update(db=db, db_obj=splat, obj_in=splat_in)
-        else:
-            raise Exception(f"Compression failed: {dst_path} not found")
 
-        # Return the result
-        return {
-            "status": "Completed",
-            "message": "3D model generated and compressed successfully",
-            "output_path": dst_path,
-            "task_id": task_id
-        }
+            manifest.mark_started(stage)
+            outputs = PIPELINE_STAGES[stage](self, manifest, task_id, workspace_path)
+            manifest.mark_done(stage, outputs)
 
     except Exception as e:
         celery_log.error(f"Task {task_id} failed: {str(e)}")
+        if stage is not None:
+            manifest.mark_failed(stage, str(e))
         self.update_state(
             state=states.FAILURE,
-            meta={"status": "Failed", "error": str(e)}
+            meta={"status": "Failed", "error": str(e), "stage": stage}
         )
         splat_in = schemas.SplatUpdate(status = "FAILURE")
         splat = crud.splat.get(db, id= task_id)
         crud.splat.update(db = db, db_obj=splat, obj_in=splat_in)
-        
-        images_path = os.path.join(settings.MODEL_IMAGES_DIR, splat.id)    
-        try:
-            shutil.rmtree(images_path)
-            print(f"Directory {images_path} has been removed.")
-        except Exception as e:
-            print(f"Error removing directory {images_path}: {str(e)}")
         raise Ignore()
     finally:
-        # Clean up the workspace after processing
-        try:
-            dataset_path = os.path.join(workspace_path, "workspace")
-            if os.path.exists(dataset_path):
-                shutil.rmtree(dataset_path)
-                celery_log.info(f"Cleaned up workspace at {dataset_path}")
-        except Exception as cleanup_error:
-            celery_log.warning(f"Failed to remove workspace: {str(cleanup_error)}")
-
-def run_command(cmd):
-    """Run a shell command and handle errors"""
+        db.close()
+
+
+@celery_app.task(bind=True, ignore_result=True, queue='cpu_prep')
+def prepare_frames(self: Task, task_id: str, workspace_path: str) -> None:
+    """Extract the input frames of a splat and select the keyframes"""
+    celery_log.info(f"Starting task {task_id} in {workspace_path}")
+    run_stages(self, task_id, workspace_path, ["extract_frames", "select_keyframes"])
+
+
+@celery_app.task(bind=True, ignore_result=True, queue='sfm')
+def run_sfm(self: Task, task_id: str, workspace_path: str) -> None:
+    """Run COLMAP/GLOMAP structure-from-motion and undistort the images"""
+    run_stages(self, task_id, workspace_path,
+               ["feature_extraction", "matching", "mapping", "undistortion"])
+
+
+@celery_app.task(bind=True, ignore_result=True, queue='cpu_prep')
+def prepare_training(self: Task, task_id: str, workspace_path: str) -> None:
+    """Stage the undistorted dataset for OpenSplat and export COLMAP metadata"""
+    run_stages(self, task_id, workspace_path, ["stage_assets"])
+
+
+@celery_app.task(bind=True, ignore_result=True, queue='train')
+def train_model(self: Task, task_id: str, workspace_path: str) -> None:
+    """Train the 3D Gaussian Splatting model with OpenSplat"""
+    run_stages(self, task_id, workspace_path, ["training"])
+
+
+@celery_app.task(bind=True, ignore_result=True, queue='export')
+def export_model(self: Task, task_id: str, workspace_path: str) -> Any:
+    """Publish the trained model and mark the splat as finished"""
+    run_stages(self, task_id, workspace_path, ["publish_model", "colmap_archive"])
+
+    manifest = PipelineManifest(workspace_path)
+    dst_path = manifest.outputs("publish_model")["model_path"]
+
+    # Calculate the size of the model in MB
+    size = round(os.path.getsize(dst_path) / (1024 * 1024), 2)
+
+    # Update the model_url to point to the published file and include model_size
+    db = SessionLocal()
     try:
-        os.environ["QT_QPA_PLATFORM"] = "offscreen"
-        celery_log.info(f"Running command: {' '.join(cmd)}")
-        result = subprocess.run(
-            cmd,
-            check=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        celery_log.info("Command completed successfully")
-        return result
-    except subprocess.CalledProcessError as e:
-        celery_log.error(f"Command failed with error: {e.stderr}")
-        raise Exception(f"Command failed: {e.stderr}")
+        splat_in = schemas.SplatUpdate(status="SUCCESS", stage=None, model_url=dst_path, model_size=size)
+        splat = crud.splat.get(db=db, id=task_id)
+        crud.splat.update(db=db, db_obj=splat, obj_in=splat_in)
+    finally:
+        db.close()
+
+    # The job is finished, the intermediate workspace is no longer needed
+    cleanup_workspace(workspace_path)
+
+    return {
+        "status": "Completed",
+        "message": "3D model generated successfully",
+        "output_path": dst_path,
+        "task_id": task_id
+    }
+
+
+def _model_cameras(task_id: str, model_path: str) -> Tuple[str, bool]:
+    """
+    cameras.json next to the model and whether the model is in OpenSplat's
+    normalized frame rather than the COLMAP frame of the cameras.
+
+    Models trained before plans asked for --keep-crs were saved normalized;
+    uploaded models have no cameras.json.
+    """
+    db = SessionLocal()
+    try:
+        splat = crud.splat.get(db, id=task_id)
+    finally:
+        db.close()
+    plan = (splat.training_plan if splat else None) or {}
+    return os.path.join(os.path.dirname(model_path), "cameras.json"), not plan.get("keep_crs")
+
+
+def postprocess_prune(task_id: str, model_path: str) -> None:
+    cameras_path, normalized_cameras = _model_cameras(task_id, model_path)
+    info = prune_splat(
+        model_path,
+        min_opacity=settings.MODEL_PRUNE_MIN_OPACITY,
+        min_size_ratio=settings.MODEL_PRUNE_MIN_SIZE_RATIO,
+        min_screen_pixels=settings.MODEL_PRUNE_MIN_SCREEN_PIXELS,
+        max_ratio=settings.MODEL_PRUNE_MAX_RATIO,
+        cameras_path=cameras_path,
+        normalized_cameras=normalized_cameras,
+    )
+    celery_log.info(f"Task {task_id}: pruned model {info}")
+    model_size = round(info["size_after"] / (1024 * 1024), 2)
+    _update_splat(task_id, prune_info=info, model_size=model_size)
+
+
+def postprocess_chunks(task_id: str, model_path: str) -> None:
+    # Rewrites the model, so it runs before the steps deriving files from it
+    info = sort_splat(model_path, chunk_size=settings.MODEL_CHUNK_SIZE)
+    celery_log.info(f"Task {task_id}: spatially sorted model {info}")
+
+
+def postprocess_compression(task_id: str, model_path: str) -> None:
+    info = compress_splat(model_path, compressed_model_path(model_path),
+                          chunk_size=settings.MODEL_COMPRESSION_CHUNK_SIZE)
+    celery_log.info(f"Task {task_id}: compressed model {info}")
+    _update_splat(task_id, compression_info=info)
+
+
+def postprocess_lod(task_id: str, model_path: str) -> None:
+    info = build_lod(model_path, base_count=settings.MODEL_LOD_BASE_COUNT,
+                     level_factor=settings.MODEL_LOD_LEVEL_FACTOR)
+    celery_log.info(f"Task {task_id}: built {len(info['levels'])} LOD levels")
+    _update_splat(task_id, lod_info=info)
+
+
+def postprocess_stats(task_id: str, model_path: str) -> None:
+    cameras_path, normalized_cameras = _model_cameras(task_id, model_path)
+    stats = compute_stats(model_path, cameras_path=cameras_path, normalized_cameras=normalized_cameras)
+    celery_log.info(f"Task {task_id}: {stats['num_gaussians']} Gaussians, bounds {stats['aabb']}")
+    _update_splat(task_id, num_gaussians=stats["num_gaussians"], stats=stats)
+
+
+@celery_app.task(bind=True, ignore_result=True, queue='export')
+def postprocess_model(self: Task, task_id: str) -> None:
+    """
+    Post-process a published model: prune it, sort it spatially, compute its
+    statistics and derive its level-of-detail pyramid and compressed variant.
+
+    Runs after export for reconstructed splats and after upload for
+    uploaded models. The splat is already usable, so a failing step is only
+    logged and does not change its status.
+    """
+    db = SessionLocal()
+    try:
+        splat = crud.splat.get(db, id=task_id)
+    finally:
+        db.close()
+    if not splat or splat.status != "SUCCESS" or not splat.model_url \
+            or not os.path.exists(splat.model_url):
+        celery_log.warning(f"Task {task_id}: no published model to post-process")
+        return
+
+    steps = []
+    # Pruning rewrites the model and is lossy, it only ever runs once
+    if settings.MODEL_PRUNE_ENABLED and not splat.prune_info:
+        steps.append(postprocess_prune)
+    if settings.MODEL_CHUNKS_ENABLED:
+        steps.append(postprocess_chunks)
+    if settings.MODEL_STATS_ENABLED:
+        steps.append(postprocess_stats)
+    if settings.MODEL_LOD_ENABLED:
+        steps.append(postprocess_lod)
+    if settings.MODEL_COMPRESSION_ENABLED:
+        steps.append(postprocess_compression)
+    # Pruning and sorting rewrite the model in place, a .ply conversion
+    # cached for an earlier content would never be used or removed again
+    digests = {model_digest(splat.model_url)}
+    for step in steps:
+        try:
+            step(task_id, splat.model_url)
+        except Exception as e:
+            celery_log.warning(f"Task {task_id}: {step.__name__} failed: {str(e)}")
+        digests.add(model_digest(splat.model_url))
+    digests.discard(model_digest(splat.model_url))
+    for digest in digests:
+        ConversionCache(settings.MODEL_CONVERSIONS_DIR).remove(digest, ".ply")
+        celery_log.info(f"Task {task_id}: removed the .ply conversion of {digest}")
+
+
+def video_pipeline(task_id: str, workspace_path: str) -> Any:
+    """
+    Celery canvas of the reconstruction pipeline.
+
+    Every stage task is routed to its own queue (cpu_prep, sfm, train,
+    export) so cheap CPU stages of one job can overlap the training of
+    another. Stages read their inputs from the workspace manifest, so the
+    same chain is used both to start and to resume a job.
+    """
+    return chain(
+        prepare_frames.si(task_id=task_id, workspace_path=workspace_path),
+        run_sfm.si(task_id=task_id, workspace_path=workspace_path),
+        prepare_training.si(task_id=task_id, workspace_path=workspace_path),
+        train_model.si(task_id=task_id, workspace_path=workspace_path),
+        export_model.si(task_id=task_id, workspace_path=workspace_path),
+        postprocess_model.si(task_id=task_id),
+    )
+
+
+def process_video(task_id: str,
+                  workspace_path: str,
+                  dataset_dir: str,
+                  num_iterations: int = 10000,
+                  ) -> Any:
+    """Process video to generate 3D Gaussian Splatting model"""
+    manifest = PipelineManifest(workspace_path)
+    manifest.set_params(dataset_dir=dataset_dir, num_iterations=num_iterations)
+    return video_pipeline(task_id, workspace_path).apply_async()
+
+
+def resume_video(task_id: str, workspace_path: str) -> Any:
+    """Resume a failed reconstruction, skipping the stages that already completed"""
+    return video_pipeline(task_id, workspace_path).apply_async()
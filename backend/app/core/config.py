@@ -57,7 +57,116 @@ class Settings(BaseSettings):
     MODEL_THUMBNAILS_DIR: str = MODEL_ASSETS_DIR + "/thumnails"
     MODEL_IMAGES_DIR: str = MODEL_ASSETS_DIR + "/images"
     MODEL_WORKSPACES_DIR: str = MODEL_ASSETS_DIR + "/workspaces"
+    # Content-addressed store of the images of all splats
+    MODEL_BLOBS_DIR: str = MODEL_ASSETS_DIR + "/blobs"
+    # Converted downloads (e.g. .ply), keyed by the hash of the model file
+    MODEL_CONVERSIONS_DIR: str = MODEL_ASSETS_DIR + "/conversions"
     PUBLIC_DIR:str = "public"
+
+    # Resumable uploads: chunk size suggested to clients and the largest
+    # chunk accepted in a single request (chunks are buffered in memory).
+    UPLOAD_CHUNK_SIZE: int = 8 * 1024 * 1024
+    UPLOAD_MAX_CHUNK_SIZE: int = 64 * 1024 * 1024
+    # Open upload sessions without any chunk for this long are removed
+    UPLOAD_SESSION_EXPIRE_HOURS: int = 48
+    # Threads of the executor running blocking file and process I/O of the
+    # API (uploads, conversions), kept apart from the default threadpool.
+    IO_EXECUTOR_WORKERS: int = 8
+
+    # Frame extraction from uploaded videos: frames per second to sample,
+    # output format (jpg, webp or png), number of ffmpeg processes run in
+    # parallel and the total number of CPU threads they may share.
+    # Frames are sampled densely and thinned out by keyframe selection.
+    FRAME_EXTRACTION_FPS: float = 4
+    FRAME_IMAGE_FORMAT: str = "jpg"
+    FRAME_EXTRACTION_MAX_WORKERS: int = 4
+    FRAME_EXTRACTION_CPU_BUDGET: int = os.cpu_count() or 1
+
+    # Keyframe selection between frame extraction and COLMAP: maximum number
+    # of keyframes kept per splat, minimum camera motion between keyframes
+    # (fraction of the frame width) and how much blurrier than the median a
+    # frame may be before it is only used as a last resort.
+    KEYFRAME_SELECTION_ENABLED: bool = True
+    KEYFRAME_TARGET_COUNT: int = 300
+    KEYFRAME_MIN_MOTION: float = 0.02
+    KEYFRAME_BLUR_RATIO: float = 0.35
+
+    # COLMAP feature matching: "auto" picks exhaustive matching for sets of
+    # up to MATCHER_EXHAUSTIVE_MAX_IMAGES images, sequential matching for
+    # video frames and spatial or vocabulary-tree matching for large photo
+    # sets; any other value forces that strategy. The vocabulary tree file
+    # (from the COLMAP website) enables vocab-tree matching and loop
+    # detection in sequential matching.
+    MATCHER_STRATEGY: str = "auto"
+    MATCHER_EXHAUSTIVE_MAX_IMAGES: int = 150
+    MATCHER_SEQUENTIAL_OVERLAP: int = 10
+    MATCHER_VOCAB_TREE_PATH: Optional[str] = None
+    MATCHER_VOCAB_TREE_NUM_IMAGES: int = 50
+
+    # External commands of the pipeline (ffmpeg, COLMAP, GLOMAP, OpenSplat):
+    # their output goes to a rotating log in the job workspace, each stage is
+    # killed after its timeout in seconds and, when set, held to a memory
+    # limit in MB (per ffmpeg process for extract_frames), with a cgroup v2
+    # under PIPELINE_CGROUP_ROOT when the worker may create one there,
+    # otherwise with an rlimit.
+    PIPELINE_LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    PIPELINE_LOG_BACKUPS: int = 3
+    STAGE_TIMEOUT_SECONDS: Dict[str, int] = {
+        "extract_frames": 2 * 3600,
+        "feature_extraction": 4 * 3600,
+        "matching": 12 * 3600,
+        "mapping": 12 * 3600,
+        "undistortion": 2 * 3600,
+        "training": 24 * 3600,
+    }
+    STAGE_MEMORY_LIMIT_MB: Dict[str, int] = {}
+    PIPELINE_CGROUP_ROOT: Optional[str] = None
+
+    # OpenSplat training plan: the downscale factor, iteration count (up to
+    # the one requested) and densification limits are chosen from the
+    # dataset size to finish in about TRAINING_TARGET_SECONDS and fit in
+    # TRAINING_MEMORY_FRACTION of the memory. Memory and threads are detected
+    # unless set; TRAINING_GPU_MEMORY_MB is the GPU memory holding the
+    # Gaussians on CUDA builds. Images are downscaled to at most
+    # TRAINING_MAX_IMAGE_SIZE pixels. TRAINING_COST_MODEL_PATH is the JSON
+    # written by scripts/calibrate_training.py, defaults are used without it.
+    TRAINING_PLANNER_ENABLED: bool = True
+    TRAINING_TARGET_SECONDS: int = 1800
+    TRAINING_MIN_ITERATIONS: int = 2000
+    TRAINING_MAX_IMAGE_SIZE: int = 1600
+    TRAINING_MEMORY_MB: Optional[int] = None
+    TRAINING_GPU_MEMORY_MB: Optional[int] = None
+    TRAINING_THREADS: Optional[int] = None
+    TRAINING_MEMORY_FRACTION: float = 0.8
+    TRAINING_COST_MODEL_PATH: Optional[str] = None
+
+    # Post-processing of finished models: write a quantized .qsplat variant
+    # next to the .splat, with positions and scales quantized within chunks
+    # of MODEL_COMPRESSION_CHUNK_SIZE Gaussians.
+    MODEL_COMPRESSION_ENABLED: bool = True
+    MODEL_COMPRESSION_CHUNK_SIZE: int = 256
+    # Pruning of finished models, before anything is derived from them:
+    # Gaussians with an opacity below MODEL_PRUNE_MIN_OPACITY, a volume below
+    # (MODEL_PRUNE_MIN_SIZE_RATIO x scene diagonal)^3 or, when camera poses
+    # are known, a projected radius below MODEL_PRUNE_MIN_SCREEN_PIXELS in
+    # every image are dropped, at most MODEL_PRUNE_MAX_RATIO of the model.
+    MODEL_PRUNE_ENABLED: bool = True
+    MODEL_PRUNE_MIN_OPACITY: float = 0.02
+    MODEL_PRUNE_MIN_SIZE_RATIO: float = 1e-4
+    MODEL_PRUNE_MIN_SCREEN_PIXELS: float = 0.5
+    MODEL_PRUNE_MAX_RATIO: float = 0.3
+    # Spatial ordering of models for progressive streaming: records are
+    # sorted along a Morton curve and indexed in chunks of this many.
+    MODEL_CHUNKS_ENABLED: bool = True
+    MODEL_CHUNK_SIZE: int = 4096
+    # Level-of-detail pyramid for progressive loading: Gaussians in the
+    # coarsest level (32 bytes each) and growth factor between levels.
+    MODEL_LOD_ENABLED: bool = True
+    MODEL_LOD_BASE_COUNT: int = 8192
+    MODEL_LOD_LEVEL_FACTOR: int = 4
+    # Gaussian count, bounding volumes, opacity histogram and camera
+    # coverage of finished models, for viewers and gallery filters.
+    MODEL_STATS_ENABLED: bool = True
     PROJECT_NAME: str = os.environ["PROJECT_NAME"]
 
     EMAIL_CONFIRMATION_TOKEN_EXPIRE_HOURS: int = 24
@@ -3,6 +3,7 @@ from .crud_splat import splat
 from .crud_feedback import feedback
 from .crud_payment import payment
 from .crud_order import order
+from .crud_image_blob import image_blob
 # For a new basic set of CRUD operations you could just do
 
 # from .base import CRUDBase
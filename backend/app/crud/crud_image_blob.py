@@ -0,0 +1,60 @@
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy.dialects.postgresql import insert  # type: ignore
+from sqlalchemy.orm import Session  # type: ignore
+
+from app.crud.base import CRUDBase
+from app.models.image_blob import ImageBlob
+from app.schemas.image_blob import ImageBlobCreate, ImageBlobUpdate
+
+
+class CRUDImageBlob(CRUDBase[ImageBlob, ImageBlobCreate, ImageBlobUpdate]):
+    def acquire(self, db: Session, *, sizes: Dict[str, int]) -> None:
+        """Take one reference on each blob, creating the missing rows."""
+        if not sizes:
+            return
+        stmt = insert(ImageBlob).values(
+            [{"id": digest, "size": size, "refcount": 1} for digest, size in sizes.items()]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ImageBlob.id],
+            set_={"refcount": ImageBlob.refcount + 1},
+        )
+        db.execute(stmt)
+        db.commit()
+
+    def release(
+        self, db: Session, *, digests: Iterable[str],
+        on_free: Optional[Callable[[str], None]] = None
+    ) -> List[str]:
+        """
+        Drop one reference on each blob and delete the unreferenced rows.
+
+        on_free is called for every freed blob before the transaction is
+        committed, while its row is still locked, so a concurrent acquire
+        waits until the blob file is gone and then writes it again.
+
+        :return: The digests of the freed blobs.
+        """
+        digests = list(digests)
+        if not digests:
+            return []
+        rows = (
+            db.query(ImageBlob)
+            .filter(ImageBlob.id.in_(digests))
+            .with_for_update()
+            .all()
+        )
+        freed = []
+        for row in rows:
+            row.refcount -= 1
+            if row.refcount <= 0:
+                freed.append(row.id)
+                if on_free is not None:
+                    on_free(row.id)
+                db.delete(row)
+        db.commit()
+        return freed
+
+
+image_blob = CRUDImageBlob(ImageBlob)
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session  # type: ignore
@@ -33,26 +33,49 @@ class CRUDSplat(CRUDBase[Splat, SplatCreate, SplatUpdate]):
             .order_by(Splat.id.desc())
         )
 
+    def filter_by_complexity(
+        self, query, *, sort: Optional[str] = None,
+        min_gaussians: Optional[int] = None, max_gaussians: Optional[int] = None
+    ):
+        """
+        Filter a splat query by Gaussian count and optionally sort by it
+        ("complexity" ascending, "-complexity" descending). Splats without
+        statistics yet are excluded by the bounds and sorted last.
+        """
+        if min_gaussians is not None:
+            query = query.filter(Splat.num_gaussians >= min_gaussians)
+        if max_gaussians is not None:
+            query = query.filter(Splat.num_gaussians <= max_gaussians)
+        if sort == "complexity":
+            query = query.order_by(None).order_by(Splat.num_gaussians.asc().nullslast(), Splat.id.desc())
+        elif sort == "-complexity":
+            query = query.order_by(None).order_by(Splat.num_gaussians.desc().nullslast(), Splat.id.desc())
+        return query
+
     def get_multi_by_public(
-        self, db: Session
+        self, db: Session, *, sort: Optional[str] = None,
+        min_gaussians: Optional[int] = None, max_gaussians: Optional[int] = None
     ) -> List[Splat]:
         """
         Get multiple splats filtered by public status.
         """
-        return (
+        query = (
             db.query(self.model)
             .filter(Splat.is_public == True)
             .options(joinedload(self.model.owner))
             .order_by(Splat.id.desc())
         )
+        return self.filter_by_complexity(query, sort=sort, min_gaussians=min_gaussians,
+                                         max_gaussians=max_gaussians)
     
     def get_multi_by_gallery(
-        self, db: Session
+        self, db: Session, *, sort: Optional[str] = None,
+        min_gaussians: Optional[int] = None, max_gaussians: Optional[int] = None
     ) -> List[Splat]:
         """
         Get multiple splats filtered by public status.
         """
-        return (
+        query = (
             db.query(self.model)
             .filter(self.model.is_public == True)
             .join(User, User.id == self.model.owner_id)  # Explicit join using foreign key
@@ -60,6 +83,8 @@ class CRUDSplat(CRUDBase[Splat, SplatCreate, SplatUpdate]):
             .options(joinedload(self.model.owner))  # Eager load owner data
             .order_by(self.model.id.asc())
         )
+        return self.filter_by_complexity(query, sort=sort, min_gaussians=min_gaussians,
+                                         max_gaussians=max_gaussians)
 
     def get_multi(
         self, db: Session
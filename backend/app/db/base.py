@@ -5,4 +5,5 @@ from app.models.user import User
 from app.models.splat import Splat
 from app.models.feedback import Feedback
 from app.models.payment import Payment
-from app.models.order import Order
\ No newline at end of file
+from app.models.order import Order
+from app.models.image_blob import ImageBlob
\ No newline at end of file
@@ -1,19 +1,53 @@
+from typing import Any, List, Tuple
+
+from sqlalchemy import text  # type: ignore
 from sqlalchemy.orm import Session  # type: ignore
 
 from app import crud, schemas
 from app.core.config import settings
 from app.db.base import Base
 from app.db.session import engine
+from app.models.splat import Splat
 
 # make sure all SQL Alchemy models are imported (app.db.base) before initializing DB
 # otherwise, SQL Alchemy might fail to initialize relationships properly
 # for more details: https://github.com/tiangolo/full-stack-fastapi-postgresql/issues/28
 
 
+# Columns added to existing tables, as (model, column name). create_all only
+# creates missing tables, so databases created before a column existed get
+# it (and its index) from add_missing_columns.
+ADDED_COLUMNS: List[Tuple[Any, str]] = [
+    (Splat, "stage"),
+    (Splat, "matcher_info"),
+    (Splat, "compression_info"),
+    (Splat, "lod_info"),
+    (Splat, "prune_info"),
+    (Splat, "num_gaussians"),
+    (Splat, "stats"),
+    (Splat, "training_plan"),
+]
+
+
+def add_missing_columns() -> None:
+    """Add the ADDED_COLUMNS a database does not have yet, idempotent."""
+    with engine.begin() as connection:
+        for model, name in ADDED_COLUMNS:
+            table = model.__table__
+            column = table.c[name]
+            column_type = column.type.compile(dialect=engine.dialect)
+            connection.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN IF NOT EXISTS "{name}" {column_type}'))
+            if column.index:
+                # Named like the indexes create_all makes
+                connection.execute(text(f'CREATE INDEX IF NOT EXISTS "ix_{table.name}_{name}" '
+                                        f'ON "{table.name}" ("{name}")'))
+
+
 def init_db(db: Session) -> None:
     # Tables should be created with Alembic migrations
     # But in this app we create during start of application
     Base.metadata.create_all(bind=engine)   # type: ignore
+    add_missing_columns()
     # Create user if not exist
     user = crud.user.get_by_email(db, email=settings.FIRST_SUPERUSER_EMAIL)
     if not user:
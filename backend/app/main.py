@@ -67,9 +67,9 @@ os.makedirs(settings.MODEL_ASSETS_DIR, exist_ok=True)
 os.makedirs(settings.MODEL_THUMBNAILS_DIR, exist_ok=True)
 os.makedirs(settings.MODEL_WORKSPACES_DIR, exist_ok=True)
 os.makedirs(settings.MODEL_IMAGES_DIR, exist_ok=True)
+os.makedirs(settings.MODEL_BLOBS_DIR, exist_ok=True)
 os.makedirs(settings.PUBLIC_DIR, exist_ok=True)
 app.mount(f"{settings.API_V1_STR}/thumbnails", StaticFiles(directory=settings.MODEL_THUMBNAILS_DIR), name="thumbnails")
-app.mount(f"{settings.API_V1_STR}/images", StaticFiles(directory=settings.MODEL_IMAGES_DIR), name="images")
 app.mount(f"{settings.API_V1_STR}/public", StaticFiles(directory=settings.PUBLIC_DIR), name="public")
 
 @app.get("/docs", include_in_schema=False)
@@ -3,5 +3,6 @@ from .splat import Splat
 from .feedback import Feedback
 from .payment import Payment
 from .order import Order
+from .image_blob import ImageBlob
 # from .notification import Notification
 # from .payment import Payment
\ No newline at end of file
@@ -0,0 +1,15 @@
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, Integer, BigInteger  # type: ignore
+
+from app.db.base_class import Base
+
+
+class ImageBlob(Base):
+    __tablename__ = 'image_blob'
+
+    # SHA-256 of the content, also the blob's key in the blob store
+    id = Column(String(64), primary_key=True, index=True)
+    size = Column(BigInteger, nullable=False)
+    # Number of splats whose image manifest lists this blob
+    refcount = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.now, nullable=False)
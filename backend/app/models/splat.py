@@ -1,6 +1,6 @@
 from datetime import datetime
 from sqlalchemy import (Column, ForeignKey, Integer,
-                        String, DateTime, Boolean, Float)  # type: ignore
+                        String, DateTime, Boolean, Float, JSON)  # type: ignore
 from sqlalchemy.orm import relationship  # type: ignore
 
 from app.db.base_class import Base
@@ -12,10 +12,18 @@ class Splat(Base):
     date_created = Column(DateTime, default=datetime.now())
     is_public=Column(Boolean(), default=False)
     status = Column(String(50), default='PENDING')
+    stage = Column(String(50), nullable=True)
 
     image_url = Column(String(500), nullable=False)
     model_url = Column(String(500), nullable=True)
     model_size = Column(Float, nullable=True)
+    matcher_info = Column(JSON, nullable=True)
+    training_plan = Column(JSON, nullable=True)
+    compression_info = Column(JSON, nullable=True)
+    lod_info = Column(JSON, nullable=True)
+    prune_info = Column(JSON, nullable=True)
+    num_gaussians = Column(Integer, nullable=True, index=True)
+    stats = Column(JSON, nullable=True)
 
     owner_id = Column(Integer, ForeignKey("user.id"), nullable=False)
     owner = relationship("User", back_populates="splats")
@@ -7,4 +7,6 @@ from .feedback import Feedback, FeedbackCreate, FeedbackDelete, FeedbackInDB, Fe
 from .stripe import CheckoutSessionRequest, CheckoutSessionReponse
 from .payment import Payment, PaymentCreate, PaymentDelete, PaymentInDB, PaymentUpdate, PaymentInDBBase
 from .env_variable import EnvVariableResponse, EnvVariableUpdate
+from .upload import UploadFileSpec, UploadSessionCreate, UploadFileStatus, UploadSession
+from .image_blob import ImageBlobCreate, ImageBlobUpdate
 from .order import OrderDelete, Order, OrderCreate, OrderUpdate, OrderInDBBase, OrderInDB
\ No newline at end of file
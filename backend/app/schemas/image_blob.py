@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+
+
+# Properties to receive on ImageBlob creation
+class ImageBlobCreate(BaseModel):
+    id: str
+    size: int
+    refcount: int = 1
+
+
+# Properties to receive on ImageBlob update
+class ImageBlobUpdate(BaseModel):
+    refcount: int
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Annotated, Optional
+from typing import Annotated, Any, Dict, Optional
 from datetime import datetime
 from app.schemas.user import User
 
@@ -32,8 +32,16 @@ class SplatUpdate(BaseModel):
     title: Optional[str]
     is_public: Optional[bool]
     status: Optional[str]
+    stage: Optional[str]
     model_url:Optional[str]
     model_size: Optional[float]
+    matcher_info: Optional[Dict[str, Any]]
+    training_plan: Optional[Dict[str, Any]]
+    compression_info: Optional[Dict[str, Any]]
+    lod_info: Optional[Dict[str, Any]]
+    prune_info: Optional[Dict[str, Any]]
+    num_gaussians: Optional[int]
+    stats: Optional[Dict[str, Any]]
 
 
 
@@ -58,6 +66,14 @@ class Splat(SplatInDBBase):
     model_size: Optional[float] = None
     is_public: bool
     status: str
+    stage: Optional[str] = None
+    matcher_info: Optional[Dict[str, Any]] = None
+    training_plan: Optional[Dict[str, Any]] = None
+    compression_info: Optional[Dict[str, Any]] = None
+    lod_info: Optional[Dict[str, Any]] = None
+    prune_info: Optional[Dict[str, Any]] = None
+    num_gaussians: Optional[int] = None
+    stats: Optional[Dict[str, Any]] = None
 
 # Properties properties stored in DB
 class SplatInDB(SplatInDBBase):
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+from typing import Annotated, List, Optional
+
+
+class UploadFileSpec(BaseModel):
+    name: Annotated[str, Field(min_length=1, max_length=255)]
+    size: Annotated[int, Field(gt=0)]
+
+
+# Properties to receive on upload session creation
+class UploadSessionCreate(BaseModel):
+    title: Annotated[str, Field(min_length=1)]
+    num_iterations: int = 10000
+    files: Annotated[List[UploadFileSpec], Field(min_items=1)]
+
+
+class UploadFileStatus(BaseModel):
+    name: str
+    size: int
+    received: int
+    complete: bool
+
+
+# Properties to return to client
+class UploadSession(BaseModel):
+    id: str
+    title: str
+    status: str
+    chunk_size: int
+    files: List[UploadFileStatus]
+    # When the session is removed if nothing more is uploaded, while it is open
+    expires_at: Optional[datetime] = None
@@ -0,0 +1,17 @@
+import asyncio
+import io
+
+import pytest
+
+from app.utils.async_io import FileTooLarge, save_upload
+
+
+def test_save_upload_enforces_size_limit(tmp_path) -> None:
+    target = tmp_path / "model.splat"
+
+    written = asyncio.run(save_upload(io.BytesIO(b"x" * 3000), str(target), chunk_size=1024))
+    assert written == 3000 and target.stat().st_size == 3000
+
+    with pytest.raises(FileTooLarge):
+        asyncio.run(save_upload(io.BytesIO(b"x" * 3000), str(target), max_size=2048, chunk_size=1024))
+    assert not target.exists()
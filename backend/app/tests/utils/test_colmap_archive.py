@@ -0,0 +1,39 @@
+import hashlib
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from app.utils.colmap_archive import archive_path, build_colmap_archive, read_archive_info
+
+
+def make_colmap_dir(tmp_path) -> None:
+    colmap_dir = tmp_path / "colmap"
+    (colmap_dir / "images").mkdir(parents=True)
+    for name in ("cameras.bin", "images.bin", "points3D.bin"):
+        (colmap_dir / name).write_bytes(name.encode() * 100)
+    (colmap_dir / "images" / "frame.jpg").write_bytes(b"jpeg")
+
+
+def test_build_colmap_archive(tmp_path) -> None:
+    make_colmap_dir(tmp_path)
+    assert read_archive_info(str(tmp_path)) is None
+    info = build_colmap_archive(str(tmp_path))
+
+    data = open(archive_path(str(tmp_path)), "rb").read()
+    assert info == read_archive_info(str(tmp_path))
+    assert info["size"] == len(data)
+    assert info["sha256"] == hashlib.sha256(data).hexdigest()
+    assert sorted(zipfile.ZipFile(archive_path(str(tmp_path))).namelist()) == [
+        "cameras.bin", "images.bin", "images/frame.jpg", "points3D.bin",
+    ]
+
+
+def test_concurrent_builds(tmp_path) -> None:
+    make_colmap_dir(tmp_path)
+    with ThreadPoolExecutor(8) as pool:
+        infos = list(pool.map(lambda _: build_colmap_archive(str(tmp_path)), range(16)))
+
+    data = open(archive_path(str(tmp_path)), "rb").read()
+    assert all(info == read_archive_info(str(tmp_path)) for info in infos)
+    assert infos[0]["sha256"] == hashlib.sha256(data).hexdigest()
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
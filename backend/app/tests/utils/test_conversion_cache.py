@@ -0,0 +1,36 @@
+import asyncio
+
+from app.utils.async_io import SingleFlight, run_io
+from app.utils.conversion_cache import ConversionCache, model_digest
+
+
+def test_concurrent_requests_convert_once(tmp_path) -> None:
+    model = tmp_path / "model.splat"
+    model.write_bytes(b"\x00" * 64)
+    cache = ConversionCache(str(tmp_path / "conversions"))
+    calls = []
+
+    def convert(src: str, dst: str) -> None:
+        calls.append(src)
+        with open(src, "rb") as f_in, open(dst, "wb") as f_out:
+            f_out.write(f_in.read()[::-1])
+
+    async def download(flight: SingleFlight, digest: str) -> str:
+        return await flight.do(
+            digest, lambda: run_io(cache.get_or_convert, str(model), digest, ".ply", convert))
+
+    async def main():
+        flight = SingleFlight()
+        digest = model_digest(str(model))
+        return digest, await asyncio.gather(*(download(flight, digest) for _ in range(8)))
+
+    digest, paths = asyncio.run(main())
+    assert len(calls) == 1
+    assert set(paths) == {cache.path(digest, ".ply")}
+
+    # A later request hits the cache
+    cache.get_or_convert(str(model), digest, ".ply", convert)
+    assert len(calls) == 1
+
+    cache.remove(digest, ".ply")
+    assert not (tmp_path / "conversions" / digest[:2] / (digest + ".ply")).exists()
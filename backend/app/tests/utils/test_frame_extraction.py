@@ -0,0 +1,46 @@
+import sys
+import time
+
+import pytest
+
+from app.utils import frame_extraction
+from app.utils.frame_extraction import extract_frames, frame_command
+
+# Stand-ins for ffmpeg, by the name of the video before the dash
+COMMANDS = {
+    # Fills a pipe many times over before printing its progress
+    "noisy": "import sys; sys.stderr.write('x' * 1000000); print('out_time_us=1000000', flush=True)",
+    "slow": "import time; time.sleep(60)",
+    "broken": "import sys, time; time.sleep(0.5); sys.exit('Invalid data found when processing input')",
+}
+
+
+@pytest.fixture
+def fake_ffmpeg(monkeypatch) -> None:
+    monkeypatch.setattr(frame_extraction, "probe_duration", lambda path: 1.0)
+    monkeypatch.setattr(frame_extraction, "frame_command",
+                        lambda video_path, *args: [sys.executable, "-c", COMMANDS[video_path.split("-")[0]]])
+
+
+def test_frame_command_limits_every_stage() -> None:
+    cmd = frame_command("in.mp4", "out_%04d.jpg", 2, "jpg", 3)
+    # Filter graph, decoder (before -i) and encoder (after it)
+    assert cmd[cmd.index("-filter_threads") + 1] == "3"
+    threads = [i for i, arg in enumerate(cmd) if arg == "-threads"]
+    assert len(threads) == 2 and threads[0] < cmd.index("-i") < threads[1]
+    assert all(cmd[i + 1] == "3" for i in threads)
+
+
+def test_large_stderr_does_not_block(tmp_path, fake_ffmpeg) -> None:
+    progress = []
+    extract_frames(["noisy-1.mp4", "noisy-2.mp4"], str(tmp_path), on_progress=progress.append, poll_interval=0.1)
+    assert progress[-1] == 1.0
+
+
+def test_failure_terminates_running_extractions(tmp_path, fake_ffmpeg) -> None:
+    started = time.monotonic()
+    with pytest.raises(Exception, match="Invalid data found"):
+        extract_frames(["slow-1.mp4", "broken-1.mp4", "slow-2.mp4", "slow-3.mp4"], str(tmp_path),
+                       max_workers=2, cpu_budget=4, poll_interval=0.1)
+    # Neither waited for the running extraction nor started the last ones
+    assert time.monotonic() - started < 10
@@ -0,0 +1,14 @@
+import pytest
+
+from app.utils.http_files import parse_range
+
+
+def test_parse_range() -> None:
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=990-2000", 1000) == (990, 999)
+    # Multiple ranges are not supported, the whole file is sent
+    assert parse_range("bytes=0-1,5-6", 1000) is None
+    with pytest.raises(ValueError):
+        parse_range("bytes=1000-", 1000)
@@ -0,0 +1,33 @@
+import os
+
+from app.utils.image_store import (BlobStore, file_digest, resolve_image,
+                                   write_image_manifest)
+
+
+def test_blob_store_deduplicates_by_content(tmp_path) -> None:
+    store = BlobStore(str(tmp_path / "blobs"))
+    first = tmp_path / "a.jpg"
+    second = tmp_path / "b.jpg"
+    first.write_bytes(b"same image")
+    second.write_bytes(b"same image")
+
+    digest = store.put(str(first))
+
+    assert store.put(str(second)) == digest == file_digest(str(second))
+    assert store.path(digest).endswith(os.path.join(digest[:2], digest[2:4], digest))
+    assert sum(len(files) for _, _, files in os.walk(tmp_path / "blobs")) == 1
+
+
+def test_resolve_image_through_manifest(tmp_path) -> None:
+    store = BlobStore(str(tmp_path / "blobs"))
+    image = tmp_path / "frame.jpg"
+    image.write_bytes(b"pixels")
+    digest = store.put(str(image))
+    manifest_path = str(tmp_path / "images" / "splat.json")
+    write_image_manifest(manifest_path, {"frame.jpg": {"digest": digest, "size": 6}})
+
+    entry = resolve_image(store, manifest_path, "frame.jpg")
+
+    assert entry["path"] == store.path(digest)
+    assert resolve_image(store, manifest_path, "missing.jpg") is None
+    assert resolve_image(store, str(tmp_path / "none.json"), "frame.jpg") is None
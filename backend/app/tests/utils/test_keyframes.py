@@ -0,0 +1,38 @@
+import numpy as np
+
+from app.utils.keyframes import frame_shift, laplacian_variance, pick_keyframes
+
+
+def _texture(seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.uniform(0, 255, size=(96, 256)).astype(np.float32)
+
+
+def test_frame_shift_recovers_translation() -> None:
+    scene = _texture()
+    previous = scene[:, 20:148]
+    current = scene[:, 28:156]
+
+    assert abs(frame_shift(previous, current) - 8 / 128) < 1e-6
+    assert frame_shift(previous, previous) == 0
+
+
+def test_blurred_frame_scores_lower() -> None:
+    sharp = _texture()
+    blurred = (sharp + np.roll(sharp, 1, 0) + np.roll(sharp, 1, 1) + np.roll(sharp, (1, 1), (0, 1))) / 4
+
+    assert laplacian_variance(blurred) < laplacian_variance(sharp)
+
+
+def test_pick_keyframes_spaces_by_motion_and_skips_blur() -> None:
+    # A pan over the first 10 frames, then the camera stops
+    motion = np.array([0.0] + [0.1] * 9 + [0.0] * 10)
+    sharpness = np.full(20, 100.0)
+    sharpness[5] = 1.0  # motion blur
+
+    picked = pick_keyframes(sharpness, motion, count=3, blur_ratio=0.35)
+
+    assert len(picked) == 3
+    assert 5 not in picked
+    # The static tail collapses into a single keyframe
+    assert sum(i >= 10 for i in picked) <= 1
@@ -0,0 +1,30 @@
+import pytest
+
+from app.utils.matcher_strategy import choose_matcher, matcher_command
+
+
+def test_choose_matcher(tmp_path) -> None:
+    vocab_tree = tmp_path / "vocab_tree.bin"
+    vocab_tree.write_bytes(b"")
+
+    assert choose_matcher(80, True) == "exhaustive"
+    assert choose_matcher(400, True) == "sequential"
+    assert choose_matcher(400, False, has_gps=True) == "spatial"
+    assert choose_matcher(400, False, vocab_tree_path=str(vocab_tree)) == "vocab_tree"
+    # Without a vocabulary tree there is nothing better than exhaustive
+    assert choose_matcher(400, False) == "exhaustive"
+    assert choose_matcher(80, False, forced="sequential") == "sequential"
+    with pytest.raises(ValueError):
+        choose_matcher(80, False, forced="bogus")
+
+
+def test_sequential_loop_detection_needs_vocab_tree(tmp_path) -> None:
+    vocab_tree = tmp_path / "vocab_tree.bin"
+
+    cmd = matcher_command("sequential", "db.db", vocab_tree_path=str(vocab_tree))
+    assert cmd[:2] == ["colmap", "sequential_matcher"]
+    assert "--SequentialMatching.loop_detection" not in cmd
+
+    vocab_tree.write_bytes(b"")
+    cmd = matcher_command("sequential", "db.db", vocab_tree_path=str(vocab_tree))
+    assert cmd[cmd.index("--SequentialMatching.vocab_tree_path") + 1] == str(vocab_tree)
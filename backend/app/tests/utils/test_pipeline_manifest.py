@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from app.utils import pipeline_manifest
+from app.utils.pipeline_manifest import PipelineManifest
+
+
+def make_manifest(tmp_path) -> PipelineManifest:
+    manifest = PipelineManifest(str(tmp_path))
+    manifest.set_params(dataset_dir=str(tmp_path / "videos"), num_iterations=1000)
+    return manifest
+
+
+def test_completed_stage_is_skipped(tmp_path) -> None:
+    manifest = make_manifest(tmp_path)
+    assert not manifest.is_done("extract_frames")
+    manifest.mark_started("extract_frames")
+    assert not PipelineManifest(str(tmp_path)).is_done("extract_frames")
+
+    (tmp_path / "frames").mkdir()
+    manifest.mark_done("extract_frames", {"frames_dir": str(tmp_path / "frames"), "from_videos": True})
+    reloaded = PipelineManifest(str(tmp_path))
+    assert reloaded.is_done("extract_frames")
+    assert reloaded.outputs("extract_frames")["from_videos"] is True
+
+
+def test_stage_with_missing_output_runs_again(tmp_path) -> None:
+    manifest = make_manifest(tmp_path)
+    model_path = tmp_path / "model.splat"
+    model_path.write_bytes(b"")
+    (tmp_path / "sparse").mkdir()
+    manifest.mark_done("training", {"model_path": str(model_path), "plan": {"num_iterations": 1000}})
+    manifest.mark_done("mapping", {"model_dir": str(tmp_path / "sparse")})
+
+    model_path.unlink()
+    (tmp_path / "sparse").rmdir()
+    reloaded = PipelineManifest(str(tmp_path))
+    assert not reloaded.is_done("training") and not reloaded.is_done("mapping")
+
+
+def test_changed_params_run_stages_again(tmp_path) -> None:
+    manifest = make_manifest(tmp_path)
+    manifest.mark_done("training", {})
+    manifest.set_params(num_iterations=1000)
+    assert PipelineManifest(str(tmp_path)).is_done("training")
+
+    manifest.set_params(num_iterations=30000)
+    assert not PipelineManifest(str(tmp_path)).is_done("training")
+    manifest.mark_done("training", {})
+    assert PipelineManifest(str(tmp_path)).is_done("training")
+
+
+def test_save_is_atomic(tmp_path, monkeypatch) -> None:
+    manifest = make_manifest(tmp_path)
+    manifest.mark_done("extract_frames", {})
+    before = (tmp_path / "manifest.json").read_text()
+
+    def interrupted(data, f, **kwargs) -> None:
+        f.write('{"params": {')
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(pipeline_manifest.json, "dump", interrupted)
+    with pytest.raises(OSError):
+        manifest.mark_done("select_keyframes", {})
+    monkeypatch.undo()
+
+    # The previous manifest is intact and still loads
+    assert (tmp_path / "manifest.json").read_text() == before
+    reloaded = PipelineManifest(str(tmp_path))
+    assert reloaded.is_done("extract_frames") and not reloaded.is_done("select_keyframes")
+    assert json.loads(before)["params"]["num_iterations"] == 1000
@@ -0,0 +1,32 @@
+import numpy as np
+
+from app.utils.pose_utils import camera_poses, qvecs_to_rotmats
+from app.utils.read_write_model import qvec2rotmat, rotmat2qvec
+
+
+def test_camera_poses_match_per_image_conversion() -> None:
+    rng = np.random.default_rng(0)
+    qvecs = rng.normal(size=(16, 4))
+    qvecs /= np.linalg.norm(qvecs, axis=1, keepdims=True)
+    tvecs = rng.normal(size=(16, 3))
+
+    poses = camera_poses(qvecs, tvecs)
+    for i in range(len(qvecs)):
+        R_cw = qvec2rotmat(qvecs[i])
+        np.testing.assert_allclose(poses.centers[i], -R_cw.T @ tvecs[i], atol=1e-12)
+        np.testing.assert_allclose(poses.qvecs[i], rotmat2qvec(R_cw), atol=1e-9)
+        np.testing.assert_allclose(poses.rotmats[i], R_cw.T, atol=1e-12)
+    np.testing.assert_allclose(
+        qvecs_to_rotmats(poses.orientations), poses.rotmats, atol=1e-12
+    )
+
+
+def test_qvecs_to_rotmats_round_trip() -> None:
+    rng = np.random.default_rng(1)
+    qvecs = rng.normal(size=(8, 4))
+    qvecs /= np.linalg.norm(qvecs, axis=1, keepdims=True)
+    qvecs[qvecs[:, 0] < 0] *= -1
+
+    np.testing.assert_allclose(
+        [rotmat2qvec(R) for R in qvecs_to_rotmats(qvecs)], qvecs, atol=1e-9
+    )
@@ -0,0 +1,94 @@
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+
+import pytest
+
+from app.utils.process_runner import (CommandCancelled, CommandFailed, CommandTimeout, colmap_progress,
+                                      opensplat_progress, run_command)
+
+
+def python(code: str) -> list:
+    return [sys.executable, "-c", code]
+
+
+def test_parsers() -> None:
+    assert colmap_progress("I0101 feature_extraction.cc:250] Processed file [25/100]") == 0.25
+    assert colmap_progress("Matching block [2/4, 1/4]") == 5 / 16
+    assert colmap_progress("Undistorting image [10/10]") == 1.0
+    assert colmap_progress("Elapsed time: 0.1 [minutes]") is None
+    assert opensplat_progress(2000)("Step 500: 0.0432 (25%)") == 0.25
+    assert opensplat_progress(2000)("Step 30/60") == 0.5
+    assert opensplat_progress(2000)("Loading images") is None
+
+
+def test_streams_output_to_log_and_progress(tmp_path) -> None:
+    log_path = str(tmp_path / "logs" / "pipeline.log")
+    code = ("import sys, os\n"
+            "for i in range(1, 5): print(f'Step {i}/4', flush=True)\n"
+            "print('warning', file=sys.stderr)\n"
+            "print(os.environ['RUNNER_TEST'])")
+    progress = []
+    result = run_command(python(code), log_path=log_path, parser=opensplat_progress(4),
+                         on_progress=progress.append, progress_interval=0, env={"RUNNER_TEST": "set"})
+
+    assert result.returncode == 0 and result.peak_memory_bytes > 0
+    # Once per change, wherever the stderr line landed
+    assert progress == [0.25, 0.5, 0.75, 1.0]
+    assert "RUNNER_TEST" not in os.environ
+    log = open(log_path).read()
+    assert "[out] Step 3/4" in log and "[err] warning" in log and "[out] set" in log
+    assert "Exit status 0" in log
+
+
+def test_failure_keeps_output_tail(tmp_path) -> None:
+    code = "import sys\nfor i in range(100): print(i)\nsys.exit(3)"
+    with pytest.raises(CommandFailed) as error:
+        run_command(python(code), log_path=str(tmp_path / "job.log"))
+    assert "status 3" in str(error.value)
+    assert "\n99" in str(error.value) and "\n10\n" not in str(error.value)
+
+
+def test_timeout_kills_command() -> None:
+    started = time.monotonic()
+    with pytest.raises(CommandTimeout):
+        run_command(python("import time; time.sleep(60)"), timeout=1)
+    assert time.monotonic() - started < 10
+
+
+def test_cancel_kills_command() -> None:
+    cancel = threading.Event()
+    threading.Timer(0.5, cancel.set).start()
+    started = time.monotonic()
+    with pytest.raises(CommandCancelled):
+        run_command(python("import time; time.sleep(60)"), cancel=cancel)
+    assert time.monotonic() - started < 10
+
+
+def test_parallel_commands_share_the_log(tmp_path) -> None:
+    log_path = str(tmp_path / "pipeline.log")
+    code = "for i in range(200): print(f'{sys.argv[1]} {i}')"
+    threads = [threading.Thread(target=run_command,
+                                args=([sys.executable, "-c", f"import sys\n{code}", str(n)],),
+                                kwargs={"log_path": log_path}) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    lines = open(log_path).read().splitlines()
+    # Every line once, through a single handler closed by the last command
+    assert sum("[out] " in line for line in lines) == 800
+    assert len([line for line in lines if line.endswith("[out] 2 199")]) == 1
+    assert not logging.getLogger(f"app.utils.process_runner.{log_path}").handlers
+
+
+def test_memory_limit() -> None:
+    with pytest.raises(CommandFailed):
+        # 64 MB cannot hold a 256 MB buffer
+        run_command(python("b = bytearray(256 * 1024 * 1024)"), memory_limit_mb=64)
+    # The limit only applies to the command
+    run_command(python("pass"), memory_limit_mb=512)
+    assert resource.getrlimit(resource.RLIMIT_DATA)[0] != 512 * 1024 * 1024
@@ -0,0 +1,162 @@
+import numpy as np
+import pytest
+
+import app.utils.read_write_model as read_write_model
+from app.utils.read_write_model import (
+    Image,
+    Point3D,
+    read_images_binary,
+    read_images_binary_columnar,
+    read_points3D_binary,
+    read_points3D_binary_columnar,
+    write_images_binary,
+    write_points3D_binary,
+)
+
+
+def _make_points3D():
+    return {
+        7: Point3D(
+            id=7,
+            xyz=np.array([1.0, -2.0, 3.5]),
+            rgb=np.array([10, 20, 30]),
+            error=0.25,
+            image_ids=np.array([1, 2, 5]),
+            point2D_idxs=np.array([11, 12, 15]),
+        ),
+        3: Point3D(
+            id=3,
+            xyz=np.array([0.0, 0.5, -1.0]),
+            rgb=np.array([255, 0, 128]),
+            error=1.5,
+            image_ids=np.array([], dtype=np.int64),
+            point2D_idxs=np.array([], dtype=np.int64),
+        ),
+        42: Point3D(
+            id=42,
+            xyz=np.array([9.0, 8.0, 7.0]),
+            rgb=np.array([1, 2, 3]),
+            error=0.0,
+            image_ids=np.array([4]),
+            point2D_idxs=np.array([99]),
+        ),
+    }
+
+
+def test_read_points3D_binary_columnar(tmp_path) -> None:
+    path = str(tmp_path / "points3D.bin")
+    points3D = _make_points3D()
+    write_points3D_binary(points3D, path)
+
+    arrays = read_points3D_binary_columnar(path)
+    assert arrays.ids.tolist() == [7, 3, 42]
+    assert arrays.xyz.shape == (3, 3)
+    assert arrays.rgb.dtype == np.uint8
+    assert arrays.track_offsets.tolist() == [0, 3, 3, 4]
+    assert arrays.tracks["image_id"].tolist() == [1, 2, 5, 4]
+    assert arrays.tracks["point2D_idx"].tolist() == [11, 12, 15, 99]
+    np.testing.assert_allclose(arrays.error, [0.25, 1.5, 0.0])
+
+
+def test_read_points3D_binary_columnar_across_scan_windows(tmp_path, monkeypatch) -> None:
+    # Windows smaller than a few records, track lengths that look like
+    # record starts at other offsets
+    monkeypatch.setattr(read_write_model, "POINT3D_SCAN_WINDOW", 256)
+    rng = np.random.default_rng(0)
+    points3D = {}
+    for point_id in range(1, 301):
+        track_length = int(rng.integers(0, 12))
+        points3D[point_id] = Point3D(
+            id=point_id,
+            xyz=rng.normal(size=3),
+            rgb=rng.integers(0, 256, 3),
+            error=float(rng.random()),
+            image_ids=rng.integers(1, 5, track_length),
+            point2D_idxs=rng.integers(0, 3, track_length),
+        )
+    path = tmp_path / "points3D.bin"
+    write_points3D_binary(points3D, str(path))
+
+    arrays = read_points3D_binary_columnar(str(path))
+    assert arrays.ids.tolist() == list(points3D)
+    assert np.diff(arrays.track_offsets).tolist() == [len(p.image_ids) for p in points3D.values()]
+    assert arrays.tracks["image_id"].tolist() == np.concatenate([p.image_ids for p in points3D.values()]).tolist()
+    np.testing.assert_allclose(arrays.xyz, [p.xyz for p in points3D.values()])
+
+    path.write_bytes(path.read_bytes()[:-3])
+    with pytest.raises(ValueError):
+        read_points3D_binary_columnar(str(path))
+
+    write_points3D_binary({}, str(path))
+    assert len(read_points3D_binary_columnar(str(path)).ids) == 0
+
+
+def test_read_points3D_binary_matches_dict_api(tmp_path) -> None:
+    path = str(tmp_path / "points3D.bin")
+    points3D = _make_points3D()
+    write_points3D_binary(points3D, path)
+
+    read_back = read_points3D_binary(path)
+    assert sorted(read_back) == sorted(points3D)
+    for point_id, expected in points3D.items():
+        actual = read_back[point_id]
+        np.testing.assert_allclose(actual.xyz, expected.xyz)
+        assert actual.rgb.tolist() == expected.rgb.tolist()
+        assert actual.error == expected.error
+        assert actual.image_ids.tolist() == expected.image_ids.tolist()
+        assert actual.point2D_idxs.tolist() == expected.point2D_idxs.tolist()
+
+
+def _make_images():
+    return {
+        2: Image(
+            id=2,
+            qvec=np.array([1.0, 0.0, 0.0, 0.0]),
+            tvec=np.array([0.1, 0.2, 0.3]),
+            camera_id=1,
+            name="video1_0002.png",
+            xys=np.array([[10.5, 20.5], [30.0, 40.0]]),
+            point3D_ids=np.array([7, -1]),
+        ),
+        1: Image(
+            id=1,
+            qvec=np.array([0.5, 0.5, 0.5, 0.5]),
+            tvec=np.array([1.0, 2.0, 3.0]),
+            camera_id=1,
+            name="video1_0001.png",
+            xys=np.zeros((0, 2)),
+            point3D_ids=np.array([], dtype=np.int64),
+        ),
+    }
+
+
+def test_read_images_binary_columnar(tmp_path) -> None:
+    path = str(tmp_path / "images.bin")
+    write_images_binary(_make_images(), path)
+
+    with read_images_binary_columnar(path) as images:
+        assert len(images) == 2
+        assert images.ids.tolist() == [2, 1]
+        assert images.names == ["video1_0002.png", "video1_0001.png"]
+        np.testing.assert_allclose(images.tvecs[1], [1.0, 2.0, 3.0])
+
+        xys, point3D_ids = images.observations(images.index_of(2))
+        np.testing.assert_allclose(xys, [[10.5, 20.5], [30.0, 40.0]])
+        assert point3D_ids.tolist() == [7, -1]
+        assert len(images.observations(images.index_of(1))[0]) == 0
+
+
+def test_read_images_binary_matches_dict_api(tmp_path) -> None:
+    path = str(tmp_path / "images.bin")
+    expected = _make_images()
+    write_images_binary(expected, path)
+
+    read_back = read_images_binary(path)
+    assert sorted(read_back) == sorted(expected)
+    for image_id, image in expected.items():
+        assert read_back[image_id].name == image.name
+        np.testing.assert_allclose(read_back[image_id].qvec, image.qvec)
+        np.testing.assert_allclose(read_back[image_id].xys, image.xys)
+        assert (
+            read_back[image_id].point3D_ids.tolist() == image.point3D_ids.tolist()
+        )
@@ -0,0 +1,43 @@
+import numpy as np
+
+from app.utils.splat_chunks import chunks_by_distance, read_chunk_index, sort_splat
+from app.utils.splat_format import SPLAT_DTYPE, read_splat
+
+
+def test_sort_splat_indexes_compact_chunks(tmp_path) -> None:
+    rng = np.random.default_rng(0)
+    records = np.zeros(10000, dtype=SPLAT_DTYPE)
+    records["position"] = rng.uniform(-10, 10, size=(10000, 3))
+    records["color"] = rng.integers(0, 256, size=(10000, 4))
+    model_path = tmp_path / "model.splat"
+    records.tofile(model_path)
+
+    info = sort_splat(str(model_path), chunk_size=1000)
+    assert info == {"num_gaussians": 10000, "chunk_size": 1000, "num_chunks": 10, "reordered": True}
+    # Same records, new order
+    sorted_records = np.asarray(read_splat(str(model_path)))
+    assert sorted(map(bytes, sorted_records)) == sorted(map(bytes, records))
+
+    index = read_chunk_index(str(model_path))
+    assert index.byte_range(9, 5) == (9000 * 32, 1000 * 32)
+    for i in range(10):
+        chunk = sorted_records["position"][i * 1000:(i + 1) * 1000]
+        np.testing.assert_array_equal(index.bounds[i, 0], chunk.min(axis=0))
+        np.testing.assert_array_equal(index.bounds[i, 1], chunk.max(axis=0))
+    # Chunks are much smaller than the scene
+    assert np.prod(index.bounds[:, 1] - index.bounds[:, 0], axis=1).mean() < 0.5 * 20 ** 3
+
+    assert sort_splat(str(model_path), chunk_size=1000)["reordered"] is False
+
+
+def test_chunks_by_distance(tmp_path) -> None:
+    records = np.zeros(4, dtype=SPLAT_DTYPE)
+    records["position"] = [[0, 0, 0], [0, 0, 1], [10, 0, 0], [10, 0, 1]]
+    model_path = tmp_path / "model.splat"
+    records.tofile(model_path)
+    sort_splat(str(model_path), chunk_size=2)
+
+    index = read_chunk_index(str(model_path))
+    near_origin = int(np.argmin(index.bounds[:, 0, 0]))
+    assert chunks_by_distance(index, np.array([-1.0, 0, 0]))[0] == near_origin
+    assert chunks_by_distance(index, np.array([11.0, 0, 0]))[0] == 1 - near_origin
@@ -0,0 +1,61 @@
+import numpy as np
+
+from app.utils.splat_compression import (
+    compress_splat, decompress_splat, morton_codes, pack_rotations, unpack_rotations,
+)
+from app.utils.splat_format import SPLAT_DTYPE
+
+
+def random_splat(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    records = np.zeros(n, dtype=SPLAT_DTYPE)
+    records["position"] = rng.normal(scale=5, size=(n, 3))
+    records["scale"] = np.exp(rng.normal(-4, 1, size=(n, 3)))
+    # A few hundred distinct colors, like a real scene's dominant tones
+    records["color"] = rng.integers(0, 256, size=(300, 4))[rng.integers(0, 300, size=n)]
+    q = rng.normal(size=(n, 4))
+    records["rotation"] = np.clip(np.rint(q / np.linalg.norm(q, axis=1, keepdims=True) * 128 + 128), 0, 255)
+    return records
+
+
+def test_rotation_packing() -> None:
+    q = np.random.default_rng(1).normal(size=(1000, 4))
+    q /= np.linalg.norm(q, axis=1, keepdims=True)
+    decoded = unpack_rotations(pack_rotations(q))
+    # q and -q are the same rotation
+    assert np.abs(np.abs((q * decoded).sum(axis=1)) - 1).max() < 1e-5
+
+
+def test_morton_codes_follow_space() -> None:
+    positions = np.array([[0, 0, 0], [1, 1, 1], [0.01, 0, 0], [0.99, 1, 1]], dtype=np.float32)
+    order = np.argsort(morton_codes(positions))
+    assert {tuple(order[:2]), tuple(order[2:])} == {(0, 2), (3, 1)}
+
+
+def test_compress_round_trip(tmp_path) -> None:
+    records = random_splat(5000)
+    src, dst = tmp_path / "model.splat", tmp_path / "model.qsplat"
+    records.tofile(src)
+
+    info = compress_splat(str(src), str(dst), chunk_size=256)
+    assert info["num_gaussians"] == 5000
+    assert info["compressed_size"] == dst.stat().st_size
+    assert info["compression_ratio"] > 2
+    assert info["error"]["position_rmse_rel"] < 1e-4
+    # Few colors, the palette is exact
+    assert info["error"]["color_rmse"] == 0
+
+    decoded = decompress_splat(str(dst))
+    # Same Gaussians, in Morton order
+    original = records[np.argsort(morton_codes(records["position"]), kind="stable")]
+    np.testing.assert_allclose(decoded["position"], original["position"], atol=1e-3)
+    np.testing.assert_allclose(decoded["scale"], original["scale"], rtol=0.05)
+    np.testing.assert_array_equal(decoded["color"], original["color"])
+
+
+def test_compress_empty_model(tmp_path) -> None:
+    src, dst = tmp_path / "empty.splat", tmp_path / "empty.qsplat"
+    src.write_bytes(b"")
+    info = compress_splat(str(src), str(dst))
+    assert info["num_gaussians"] == 0
+    assert len(decompress_splat(str(dst))) == 0
@@ -0,0 +1,90 @@
+import math
+import struct
+
+import numpy as np
+import pytest
+
+from app.utils.splat_format import (
+    PLY_PROPERTIES, SPLAT_DTYPE, SH_C0, iter_ply_vertices, ply_to_splat, read_splat, splat_to_ply,
+)
+
+# Two Gaussians in the 3DGS .ply layout (with the SH rest coefficients a
+# trained model has) and the .splat records they must convert to
+PLY_FIXTURE_PROPERTIES = (
+    ["x", "y", "z", "nx", "ny", "nz", "f_dc_0", "f_dc_1", "f_dc_2"]
+    + [f"f_rest_{i}" for i in range(45)]
+    + ["opacity", "scale_0", "scale_1", "scale_2", "rot_0", "rot_1", "rot_2", "rot_3"]
+)
+PLY_FIXTURE_VERTICES = [
+    dict(x=1.0, y=-2.0, z=0.5, f_dc_0=0.0, f_dc_1=0.5 / SH_C0, f_dc_2=-0.5 / SH_C0,
+         opacity=0.0, scale_0=0.0, scale_1=math.log(2), scale_2=math.log(0.5),
+         rot_0=2.0, rot_1=0.0, rot_2=0.0, rot_3=0.0),
+    dict(x=0.0, y=0.0, z=0.0, f_dc_0=10.0, f_dc_1=-10.0, f_dc_2=0.0,
+         opacity=20.0, scale_0=-1.0, scale_1=-1.0, scale_2=-1.0,
+         rot_0=0.0, rot_1=0.0, rot_2=0.0, rot_3=-1.0),
+]
+SPLAT_FIXTURE = (
+    struct.pack("<6f", 1.0, -2.0, 0.5, 1.0, 2.0, 0.5) + bytes([128, 255, 0, 128, 255, 128, 128, 128])
+    + struct.pack("<6f", 0.0, 0.0, 0.0, *[math.exp(-1.0)] * 3) + bytes([255, 0, 128, 255, 128, 128, 128, 0])
+)
+
+
+def write_ply_fixture(path) -> None:
+    header = ["ply", "format binary_little_endian 1.0", "comment fixture",
+              f"element vertex {len(PLY_FIXTURE_VERTICES)}"]
+    header += [f"property float {name}" for name in PLY_FIXTURE_PROPERTIES]
+    header.append("end_header")
+    with open(path, "wb") as f:
+        f.write(("\n".join(header) + "\n").encode())
+        for vertex in PLY_FIXTURE_VERTICES:
+            f.write(struct.pack(f"<{len(PLY_FIXTURE_PROPERTIES)}f",
+                                *[vertex.get(name, 0.0) for name in PLY_FIXTURE_PROPERTIES]))
+
+
+def test_ply_to_splat_matches_fixture(tmp_path) -> None:
+    ply_path, splat_path = tmp_path / "model.ply", tmp_path / "model.splat"
+    write_ply_fixture(ply_path)
+
+    assert ply_to_splat(str(ply_path), str(splat_path), chunk_records=1) == 2
+    records, expected = read_splat(str(splat_path)), np.frombuffer(SPLAT_FIXTURE, dtype=SPLAT_DTYPE)
+    np.testing.assert_allclose(records["position"], expected["position"])
+    np.testing.assert_allclose(records["scale"], expected["scale"], rtol=1e-6)
+    np.testing.assert_array_equal(records["color"], expected["color"])
+    np.testing.assert_array_equal(records["rotation"], expected["rotation"])
+
+
+def test_splat_ply_round_trip(tmp_path) -> None:
+    rng = np.random.default_rng(0)
+    records = np.zeros(1000, dtype=SPLAT_DTYPE)
+    records["position"] = rng.normal(size=(1000, 3))
+    records["scale"] = rng.uniform(1e-4, 1.0, size=(1000, 3))
+    records["color"] = rng.integers(0, 256, size=(1000, 4))
+    rotation = rng.normal(size=(1000, 4))
+    rotation /= np.linalg.norm(rotation, axis=1, keepdims=True)
+    records["rotation"] = np.clip(np.rint(rotation * 128 + 128), 0, 255)
+    src, ply, back = tmp_path / "a.splat", tmp_path / "a.ply", tmp_path / "b.splat"
+    records.tofile(src)
+
+    assert splat_to_ply(str(src), str(ply), chunk_records=300) == 1000
+    vertices = np.concatenate(list(iter_ply_vertices(str(ply))))
+    assert vertices.dtype.names == PLY_PROPERTIES
+    ply_to_splat(str(ply), str(back), chunk_records=300)
+
+    result = read_splat(str(back))
+    np.testing.assert_array_equal(result["position"], records["position"])
+    np.testing.assert_allclose(result["scale"], records["scale"], rtol=1e-6)
+    np.testing.assert_array_equal(result["color"], records["color"])
+    # Quaternions are renormalized, which can move a quantized component by one step
+    assert np.abs(result["rotation"].astype(int) - records["rotation"]).max() <= 1
+
+
+def test_rejects_invalid_input(tmp_path) -> None:
+    ascii_ply = tmp_path / "ascii.ply"
+    ascii_ply.write_bytes(b"ply\nformat ascii 1.0\nelement vertex 1\nproperty float x\nend_header\n0\n")
+    with pytest.raises(ValueError):
+        ply_to_splat(str(ascii_ply), str(tmp_path / "out.splat"))
+
+    truncated = tmp_path / "truncated.splat"
+    truncated.write_bytes(b"\x00" * 40)
+    with pytest.raises(ValueError):
+        splat_to_ply(str(truncated), str(tmp_path / "out.ply"))
@@ -0,0 +1,45 @@
+import numpy as np
+
+from app.utils.splat_format import SPLAT_DTYPE, encode_rotations, read_splat
+from app.utils.splat_lod import build_lod, importance, matrix_quaternions, merge_gaussians, quaternion_matrices
+
+
+def test_quaternion_matrix_round_trip() -> None:
+    q = np.random.default_rng(0).normal(size=(500, 4))
+    q /= np.linalg.norm(q, axis=1, keepdims=True)
+    assert np.allclose(np.abs((matrix_quaternions(quaternion_matrices(q)) * q).sum(axis=1)), 1)
+
+
+def test_merge_keeps_position_and_mass() -> None:
+    records = np.zeros(2, dtype=SPLAT_DTYPE)
+    records["position"] = [[-1, 0, 0], [1, 0, 0]]
+    records["scale"] = 0.1
+    records["color"] = [[255, 0, 0, 200], [0, 0, 255, 200]]
+    records["rotation"] = encode_rotations(np.array([[1.0, 0, 0, 0]] * 2))
+
+    merged = merge_gaussians(records, np.array([0, 0]), 1)
+    assert np.allclose(merged["position"], 0, atol=1e-6)
+    # Stretched along x to cover both
+    assert np.isclose(merged["scale"].max(), np.sqrt(1 + 0.01), rtol=1e-3)
+    np.testing.assert_array_equal(merged["color"][0, :3], [128, 0, 128])
+    assert abs(importance(merged)[0] - importance(records).sum()) < 0.01 * importance(records).sum()
+
+
+def test_build_lod_levels(tmp_path) -> None:
+    rng = np.random.default_rng(0)
+    records = np.zeros(20000, dtype=SPLAT_DTYPE)
+    records["position"] = rng.normal(size=(20000, 3))
+    records["scale"] = np.exp(rng.normal(-4, 1, size=(20000, 3)))
+    records["color"] = rng.integers(0, 256, size=(20000, 4))
+    records["rotation"] = encode_rotations(np.array([[1.0, 0, 0, 0]]))
+    model_path = tmp_path / "model.splat"
+    records.tofile(model_path)
+
+    info = build_lod(str(model_path), base_count=1000, level_factor=4)
+    counts = [level["num_gaussians"] for level in info["levels"]]
+    assert counts[-1] == 20000 and info["levels"][-1]["file"] == "model.splat"
+    for count, target in zip(counts[:-1], [1000, 4000, 16000]):
+        assert 0.95 * target <= count <= target
+    assert len(counts) == 4
+    for level in info["levels"][:-1]:
+        assert len(read_splat(str(tmp_path / level["file"]))) == level["num_gaussians"]
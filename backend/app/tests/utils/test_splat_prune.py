@@ -0,0 +1,72 @@
+import json
+
+import numpy as np
+
+from app.utils.splat_format import SPLAT_DTYPE, read_splat
+from app.utils.splat_prune import prune_splat
+
+THRESHOLDS = dict(min_opacity=0.02, min_size_ratio=1e-4, min_screen_pixels=0.5)
+
+
+def make_model(tmp_path) -> str:
+    records = np.zeros(1000, dtype=SPLAT_DTYPE)
+    records["position"] = np.random.default_rng(0).uniform(-5, 5, size=(1000, 3))
+    records["scale"] = 0.05
+    records["color"] = 200
+    records["color"][:100, 3] = 1          # near transparent
+    records["scale"][100:150] = 1e-5       # tiny
+    records["scale"][150:160] = 2e-3       # small, only sub-pixel seen from afar
+    model_path = tmp_path / "model.splat"
+    records.tofile(model_path)
+    return str(model_path)
+
+
+def test_prune_by_opacity_and_volume(tmp_path) -> None:
+    model_path = make_model(tmp_path)
+    info = prune_splat(model_path, max_ratio=1.0, **THRESHOLDS)
+
+    assert info["num_before"] == 1000 and info["num_after"] == 850
+    assert info["candidates"] == {"opacity": 100, "volume": 50, "screen": 0}
+    assert info["bytes_saved"] == 150 * 32 == info["size_before"] - info["size_after"]
+    assert len(read_splat(model_path)) == 850
+
+
+def test_prune_by_screen_coverage(tmp_path) -> None:
+    model_path = make_model(tmp_path)
+    cameras = [{"position": [0, 0, 100], "quaternion": [1, 0, 0, 0], "name": "a.jpg",
+                "image_width": 1000, "image_height": 750}]
+    (tmp_path / "cameras.json").write_text(json.dumps(cameras))
+
+    info = prune_splat(model_path, max_ratio=1.0, cameras_path=str(tmp_path / "cameras.json"), **THRESHOLDS)
+    assert info["used_cameras"]
+    # 3 * 2e-3 * 1000 px / ~100 m is far below half a pixel
+    assert info["candidates"]["screen"] == 60 and info["num_after"] == 840
+
+
+def test_prune_respects_budget(tmp_path) -> None:
+    model_path = make_model(tmp_path)
+    info = prune_splat(model_path, max_ratio=0.1, **THRESHOLDS)
+
+    assert info["budget_limited"] and info["num_after"] == 900
+    # The weakest candidates (tiny volume) went first
+    records = read_splat(model_path)
+    assert (records["scale"][:, 0] < 1e-4).sum() == 0
+
+
+def test_prune_moves_cameras_into_the_model_frame(tmp_path) -> None:
+    # In the COLMAP frame of cameras.json the cameras are 100 km from the
+    # origin; OpenSplat centered the model on them and scaled it by 1e-5,
+    # which puts them at z = -1 and z = 1, next to the Gaussians
+    cameras = [{"position": position, "quaternion": [1, 0, 0, 0], "name": f"{i}.jpg", "image_width": 1000}
+               for i, position in enumerate(([5000, 0, 100000], [5000, 0, -100000]))]
+    (tmp_path / "cameras.json").write_text(json.dumps(cameras))
+    cameras_path = str(tmp_path / "cameras.json")
+
+    info = prune_splat(make_model(tmp_path), max_ratio=1.0, cameras_path=cameras_path,
+                       normalized_cameras=True, **THRESHOLDS)
+    # Only the tiny Gaussians are sub-pixel from that close
+    assert info["candidates"]["screen"] == 50
+
+    # Taken in the wrong frame, every Gaussian looks sub-pixel
+    info = prune_splat(make_model(tmp_path), max_ratio=1.0, cameras_path=cameras_path, **THRESHOLDS)
+    assert info["candidates"]["screen"] == 1000
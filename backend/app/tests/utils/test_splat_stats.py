@@ -0,0 +1,79 @@
+import json
+
+import numpy as np
+
+from app.utils.splat_format import SPLAT_DTYPE
+from app.utils.splat_stats import compute_stats
+
+
+def make_model(tmp_path) -> str:
+    rng = np.random.default_rng(0)
+    # Elongated along the diagonal x = y, thin along z
+    t = rng.uniform(-10, 10, size=5000)
+    positions = np.stack([t, t, np.zeros_like(t)], axis=1) + rng.uniform(-0.5, 0.5, size=(5000, 3))
+    records = np.zeros(5000, dtype=SPLAT_DTYPE)
+    records["position"] = positions + [1, 2, 3]
+    records["color"] = 200
+    records["color"][:1000, 3] = 10
+    model_path = tmp_path / "model.splat"
+    records.tofile(model_path)
+    return str(model_path)
+
+
+def test_compute_stats(tmp_path) -> None:
+    model_path = make_model(tmp_path)
+    stats = compute_stats(model_path)
+
+    assert stats["num_gaussians"] == 5000
+    assert stats["opacity_histogram"]["counts"][0] == 1000 and stats["opacity_histogram"]["counts"][7] == 4000
+    assert np.isclose(stats["mean_opacity"], (1000 * 10 + 4000 * 200) / 255 / 5000)
+    assert np.allclose(stats["centroid"], [1, 2, 3], atol=0.3)
+    assert np.allclose(stats["aabb"]["min"], [-9.5, -8.5, 2.5], atol=0.1)
+    assert stats["camera_frustums"] is None
+
+    obb = stats["obb"]
+    assert abs(abs(np.dot(obb["axes"][0], [1, 1, 0])) / np.sqrt(2) - 1) < 1e-3
+    assert np.isclose(np.linalg.det(obb["axes"]), 1)
+    # Much tighter than the axis-aligned box
+    aabb_volume = np.prod(np.subtract(stats["aabb"]["max"], stats["aabb"]["min"]))
+    assert np.prod(obb["half_extents"]) * 8 < 0.2 * aabb_volume
+
+
+def test_compute_stats_camera_frustums(tmp_path) -> None:
+    model_path = make_model(tmp_path)
+    # Identity rotation, 20 units in front of the scene centroid, looking along +z
+    cameras = [{"position": [1, 2, -17], "quaternion": [1, 0, 0, 0], "name": "a.jpg",
+                "image_width": 1000, "image_height": 500}]
+    (tmp_path / "cameras.json").write_text(json.dumps(cameras))
+
+    frustums = compute_stats(model_path, str(tmp_path / "cameras.json"))["camera_frustums"]
+    assert frustums["num_cameras"] == 1
+    assert np.isclose(frustums["median_depth"], 20, atol=0.3)
+    # Focal length = image width: half the depth either side horizontally
+    assert np.allclose(frustums["min"], [1 - 10, 2 - 5, -17], atol=0.1)
+    assert np.allclose(frustums["max"], [1 + 10, 2 + 5, 3], atol=0.1)
+
+
+def test_compute_stats_empty_model(tmp_path) -> None:
+    model_path = tmp_path / "model.splat"
+    model_path.write_bytes(b"")
+    stats = compute_stats(str(model_path))
+    assert stats["num_gaussians"] == 0 and stats["aabb"] is None and stats["mean_opacity"] is None
+
+
+def test_compute_stats_camera_frustums_in_normalized_frame(tmp_path) -> None:
+    # Two cameras 1000 units from the COLMAP origin, looking along +z; in
+    # OpenSplat's normalized frame they sit at x = -1 and x = 1
+    records = np.zeros(2, dtype=SPLAT_DTYPE)
+    records["position"] = [[0, 0, 4], [0, 0, 6]]
+    model_path = tmp_path / "model.splat"
+    records.tofile(model_path)
+    cameras = [{"position": [x, 500, 1000], "quaternion": [1, 0, 0, 0], "name": f"{x}.jpg",
+                "image_width": 100, "image_height": 100} for x in (-100, 100)]
+    (tmp_path / "cameras.json").write_text(json.dumps(cameras))
+
+    frustums = compute_stats(str(model_path), str(tmp_path / "cameras.json"),
+                             normalized_cameras=True)["camera_frustums"]
+    assert np.allclose(frustums["centers"]["min"], [-1, 0, 0]) and np.allclose(frustums["centers"]["max"], [1, 0, 0])
+    assert np.isclose(frustums["median_depth"], 5)
+    assert np.allclose(frustums["min"], [-3.5, -2.5, 0]) and np.allclose(frustums["max"], [3.5, 2.5, 5])
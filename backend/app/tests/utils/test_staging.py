@@ -0,0 +1,28 @@
+import os
+
+from app.utils.staging import stage_file, stage_tree
+
+
+def test_stage_tree_links_files(tmp_path) -> None:
+    src = tmp_path / "src"
+    (src / "sub").mkdir(parents=True)
+    (src / "a.jpg").write_bytes(b"a" * 10)
+    (src / "sub" / "b.jpg").write_bytes(b"b" * 5)
+
+    stats = stage_tree(str(src), str(tmp_path / "dst"))
+
+    assert stats["linked"] == 2
+    assert stats["bytes_saved"] == 15
+    assert os.path.samefile(src / "sub" / "b.jpg", tmp_path / "dst" / "sub" / "b.jpg")
+    # Staging again is a no-op
+    assert stage_tree(str(src), str(tmp_path / "dst"))["linked"] == 2
+
+
+def test_stage_file_replaces_stale_destination(tmp_path) -> None:
+    src = tmp_path / "model.splat"
+    src.write_bytes(b"new")
+    dst = tmp_path / "published.splat"
+    dst.write_bytes(b"old")
+
+    assert stage_file(str(src), str(dst)) == "linked"
+    assert dst.read_bytes() == b"new"
@@ -0,0 +1,66 @@
+import struct
+
+import pytest
+
+from app.utils.training_planner import (CalibrationRun, CostModel, Resources, SceneSize,
+                                        fit_cost_model, opensplat_arguments, plan_training,
+                                        scene_size)
+
+GB = 1024 ** 3
+SCENE = SceneSize(num_images=200, width=4000, height=3000, num_points=100000)
+LIMITS = dict(max_iterations=30000, min_iterations=2000, max_image_size=1600)
+
+
+def test_plan_respects_image_size_and_requested_iterations() -> None:
+    plan = plan_training(SCENE, Resources(64 * GB, None, 8), CostModel(), target_seconds=1e6, **LIMITS)
+    assert plan["downscale_factor"] == 4 and plan["num_iterations"] == 30000
+    assert plan["within_budget"] and plan["stop_split_at"] == 15000
+    assert opensplat_arguments(plan)[:5] == ["-n", "30000", "--downscale-factor", "4", "--keep-crs"]
+
+
+def test_plan_fits_time_and_memory() -> None:
+    cost = CostModel()
+    quick = plan_training(SCENE, Resources(64 * GB, None, 8), cost, target_seconds=600, **LIMITS)
+    assert quick["num_iterations"] < 30000
+    assert quick["estimated_seconds"] == pytest.approx(600, rel=0.01)
+
+    # Downscaled to 1000 x 750, the 200 images take 1.8 GB decoded and leave
+    # little of 5 GB for the Gaussians
+    small = plan_training(SCENE._replace(width=2000, height=1500), Resources(5 * GB, None, 8), cost,
+                          target_seconds=1e6, **LIMITS)
+    assert small["downscale_factor"] == 2
+    assert small["estimated_memory_bytes"] <= small["memory_budget_bytes"]
+    # Room for fewer Gaussians than densification would make
+    assert small["estimated_gaussians"] < SCENE.num_points * cost.growth
+    assert small["densify_grad_thresh"] > 0.0002
+
+
+def test_fit_cost_model_recovers_coefficients() -> None:
+    truth = CostModel(step_seconds=0.01, megapixel_seconds=0.02, million_gaussian_seconds=0.03,
+                      threads=8, base_bytes=1e9, pixel_bytes=12)
+    runs = []
+    # Larger images densify into more Gaussians
+    for pixels, gaussians in ((3e6, 1200000), (0.75e6, 900000), (0.2e6, 500000)):
+        for iterations, grown in ((500, gaussians // 2), (2000, gaussians)):
+            step = truth.seconds_per_step(pixels, gaussians * 3 / 4, 8)
+            memory = truth.base_bytes + 100 * pixels * truth.pixel_bytes
+            runs.append(CalibrationRun(int(pixels), 100, 8, iterations, 50000,
+                                       5 + step * iterations, int(memory), grown))
+
+    fitted = fit_cost_model(runs, threads=8)
+    for field in ("step_seconds", "megapixel_seconds", "million_gaussian_seconds",
+                  "base_bytes", "pixel_bytes"):
+        assert getattr(fitted, field) == pytest.approx(getattr(truth, field), rel=1e-3)
+    assert fitted.growth == 1200000 / 50000
+
+
+def test_scene_size(tmp_path) -> None:
+    # PINHOLE cameras (model 1, 4 parameters)
+    cameras = struct.pack("<Q", 2)
+    for camera_id, width, height in ((1, 1920, 1080), (2, 4000, 3000)):
+        cameras += struct.pack("<iiQQ", camera_id, 1, width, height) + struct.pack("<4d", 1, 1, 0, 0)
+    (tmp_path / "cameras.bin").write_bytes(cameras)
+    (tmp_path / "images.bin").write_bytes(struct.pack("<Q", 120))
+    (tmp_path / "points3D.bin").write_bytes(struct.pack("<Q", 54321))
+
+    assert scene_size(str(tmp_path)) == SceneSize(120, 4000, 3000, 54321)
@@ -0,0 +1,124 @@
+import hashlib
+import os
+import time
+
+import pytest
+
+from app.utils.upload_sessions import (ChunkError, SessionBusy, SessionClosed, UploadSession,
+                                       cleanup_expired_sessions)
+
+
+def test_resumed_chunks_and_finalize(tmp_path) -> None:
+    session = UploadSession.create(
+        str(tmp_path / "job"), owner_id=1, title="t", num_iterations=10,
+        files={"a.mp4": 8},
+    )
+    session.write_chunk("a.mp4", 0, b"0123")
+    # The response to the second chunk was lost: it is sent again
+    session.write_chunk("a.mp4", 4, b"45xx")
+    status = session.write_chunk("a.mp4", 4, b"4567", hashlib.sha256(b"4567").hexdigest())
+    assert status["complete"]
+
+    with pytest.raises(ChunkError):
+        session.write_chunk("a.mp4", 0, b"0123", "0" * 64)
+    # The rejected chunk is dropped, everything from its offset is sent again
+    assert session.received("a.mp4") == 0
+    session.write_chunk("a.mp4", 0, b"01234567")
+
+    UploadSession(str(tmp_path / "job")).finalize({"a.mp4": str(tmp_path / "videos")})
+    assert (tmp_path / "videos" / "a.mp4").read_bytes() == b"01234567"
+    # The files are in place, the splat is not started yet
+    assert UploadSession(str(tmp_path / "job")).data["status"] == "ready"
+
+
+def test_rejects_gaps_and_oversized_chunks(tmp_path) -> None:
+    session = UploadSession.create(
+        str(tmp_path), owner_id=1, title="t", num_iterations=10, files={"a.jpg": 4},
+    )
+    with pytest.raises(ChunkError):
+        session.write_chunk("a.jpg", 2, b"xx")
+    with pytest.raises(ChunkError):
+        session.write_chunk("a.jpg", 0, b"xxxxx")
+    with pytest.raises(ChunkError):
+        session.finalize({"a.jpg": str(tmp_path / "images")})
+
+
+def test_finalize_is_exclusive_and_resumable(tmp_path) -> None:
+    files = {"a.jpg": 2, "b.jpg": 2}
+    session = UploadSession.create(str(tmp_path / "job"), owner_id=1, title="t", num_iterations=10, files=files)
+    for name in files:
+        session.write_chunk(name, 0, b"xx")
+
+    with session.finalizing():
+        with pytest.raises(SessionBusy):
+            with UploadSession(str(tmp_path / "job")).finalizing():
+                pass
+        # Interrupted after moving the first file
+        os.makedirs(tmp_path / "images")
+        os.replace(session.part_path("a.jpg"), tmp_path / "images" / "a.jpg")
+
+    retry = UploadSession(str(tmp_path / "job"))
+    with retry.finalizing():
+        assert retry.data["status"] == "open"
+        retry.finalize({name: str(tmp_path / "images") for name in files})
+    assert sorted(os.listdir(tmp_path / "images")) == ["a.jpg", "b.jpg"]
+    assert UploadSession(str(tmp_path / "job")).data["status"] == "ready"
+
+
+def test_cleanup_expired_sessions(tmp_path) -> None:
+    for name in ("old", "recent", "done"):
+        session = UploadSession.create(str(tmp_path / name), owner_id=1, title="t", num_iterations=10,
+                                       files={"a.jpg": 2})
+        session.write_chunk("a.jpg", 0, b"x")
+    UploadSession(str(tmp_path / "done")).set_status("finalized")
+    (tmp_path / "splat").mkdir()
+    day_ago = time.time() - 24 * 3600
+    for name in ("old", "done"):
+        for root, _, files in os.walk(tmp_path / name):
+            for path in files:
+                os.utime(os.path.join(root, path), (day_ago, day_ago))
+
+    assert UploadSession(str(tmp_path / "old")).expired(3600)
+    assert cleanup_expired_sessions(str(tmp_path), 3600) == [str(tmp_path / "old")]
+    assert sorted(os.listdir(tmp_path)) == ["done", "recent", "splat"]
+
+
+def test_streamed_chunk_with_bad_checksum_is_dropped(tmp_path) -> None:
+    session = UploadSession.create(str(tmp_path), owner_id=1, title="t", num_iterations=10, files={"a.mp4": 8})
+    session.write_chunk("a.mp4", 0, b"0123")
+    with session.writing():
+        writer = session.open_chunk("a.mp4", 4)
+        for part in (b"45", b"67"):
+            writer.write(part)
+        with pytest.raises(ChunkError):
+            writer.close("0" * 64)
+    assert session.received("a.mp4") == 4
+
+    with session.writing():
+        writer = session.open_chunk("a.mp4", 4)
+        writer.write(b"4567")
+        assert writer.close(hashlib.sha256(b"4567").hexdigest())["complete"]
+
+
+def test_chunks_and_finalize_exclude_each_other(tmp_path) -> None:
+    session = UploadSession.create(str(tmp_path / "job"), owner_id=1, title="t", num_iterations=10,
+                                   files={"a.jpg": 2})
+    with session.writing():
+        with pytest.raises(SessionBusy):
+            with UploadSession(str(tmp_path / "job")).finalizing():
+                pass
+    session.write_chunk("a.jpg", 0, b"xx")
+
+    with session.finalizing():
+        with pytest.raises(SessionBusy):
+            UploadSession(str(tmp_path / "job")).write_chunk("a.jpg", 0, b"yy")
+        session.finalize({"a.jpg": str(tmp_path / "images")})
+    # A chunk that got past the status check before finalize took the lock
+    with pytest.raises(SessionClosed):
+        session.write_chunk("a.jpg", 0, b"yy")
+    assert not os.path.exists(session.part_path("a.jpg"))
+
+    with session.finalizing():
+        session.close()
+    assert sorted(os.listdir(tmp_path / "job")) == []
+    assert (tmp_path / "images" / "a.jpg").read_bytes() == b"xx"
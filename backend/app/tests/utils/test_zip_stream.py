@@ -0,0 +1,23 @@
+import io
+import zipfile
+
+from app.utils.zip_stream import iter_zip
+
+
+def test_streamed_zip_round_trip(tmp_path) -> None:
+    (tmp_path / "images").mkdir()
+    (tmp_path / "images" / "a.jpg").write_bytes(bytes(range(256)) * 1000)
+    (tmp_path / "points3D.bin").write_bytes(b"\0" * 200_000)
+    entries = [
+        (str(tmp_path / "points3D.bin"), "points3D.bin"),
+        (str(tmp_path / "images" / "a.jpg"), "images/a.jpg"),
+    ]
+
+    chunks = list(iter_zip(entries, chunk_size=4096))
+
+    assert len(chunks) > 2
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.testzip() is None
+    assert archive.getinfo("images/a.jpg").compress_type == zipfile.ZIP_STORED
+    assert archive.getinfo("points3D.bin").compress_type == zipfile.ZIP_DEFLATED
+    assert archive.read("points3D.bin") == b"\0" * 200_000
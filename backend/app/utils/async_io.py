@@ -0,0 +1,119 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Awaitable, BinaryIO, Callable, Dict, Optional, TypeVar
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+# Chunk size of upload writes; large enough to keep syscalls cheap, small
+# enough that one upload never holds a worker thread for long.
+WRITE_CHUNK_SIZE = 1024 * 1024
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def io_executor() -> ThreadPoolExecutor:
+    """
+    Thread pool dedicated to blocking file and process I/O of the API.
+
+    It is separate from the default threadpool that runs sync endpoints and
+    dependencies, so large uploads and conversions can only tie up
+    IO_EXECUTOR_WORKERS threads and never starve ordinary requests.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.IO_EXECUTOR_WORKERS,
+                    thread_name_prefix="io",
+                )
+    return _executor
+
+
+async def run_io(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking call in the I/O executor."""
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(io_executor(), partial(func, *args, **kwargs))
+
+
+class AsyncFile:
+    """Minimal aiofiles-style wrapper running file calls in the I/O executor."""
+
+    def __init__(self, path: str, mode: str = "rb"):
+        self.path = path
+        self.mode = mode
+        self._file: Optional[BinaryIO] = None
+
+    async def __aenter__(self) -> "AsyncFile":
+        self._file = await run_io(open, self.path, self.mode)
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await run_io(self._file.close)
+
+    async def read(self, size: int = -1) -> bytes:
+        return await run_io(self._file.read, size)
+
+    async def write(self, data: bytes) -> int:
+        return await run_io(self._file.write, data)
+
+
+class FileTooLarge(Exception):
+    pass
+
+
+async def save_upload(src: BinaryIO, path: str, *, max_size: Optional[int] = None,
+                      chunk_size: int = WRITE_CHUNK_SIZE) -> int:
+    """
+    Copy an uploaded file to path without blocking the event loop.
+
+    The size limit is enforced while copying, so an oversized upload is
+    rejected after max_size bytes instead of after writing all of it.
+
+    :return: The number of bytes written.
+    :raises FileTooLarge: The partial file has been removed.
+    """
+    written = 0
+    async with AsyncFile(path, "wb") as f:
+        while True:
+            chunk = await run_io(src.read, chunk_size)
+            if not chunk:
+                break
+            written += len(chunk)
+            if max_size is not None and written > max_size:
+                break
+            await f.write(chunk)
+    if max_size is not None and written > max_size:
+        await run_io(os.remove, path)
+        raise FileTooLarge(path)
+    return written
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one execution.
+
+    While a call for a key is running, later callers await its result
+    instead of starting their own. Only coordinates the current process;
+    work shared between uvicorn workers must also be idempotent (e.g.
+    written under a temporary name and renamed).
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[str, "asyncio.Future[Any]"] = {}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: a cancelled (disconnected) caller must not cancel the
+        # work the other callers are waiting for
+        return await asyncio.shield(future)
@@ -0,0 +1,85 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.utils.zip_stream import iter_zip
+
+ARCHIVE_FILENAME = "colmap.zip"
+ARCHIVE_INFO_FILENAME = "colmap.zip.json"
+COLMAP_BIN_FILES = ("cameras.bin", "images.bin", "points3D.bin")
+
+
+def colmap_archive_entries(colmap_dir: str) -> List[Tuple[str, str]]:
+    """
+    Files of the COLMAP download as (path, arcname) pairs.
+
+    :raises FileNotFoundError: A .bin file or the images directory is missing.
+    """
+    entries = []
+    for bin_file in COLMAP_BIN_FILES:
+        bin_path = os.path.join(colmap_dir, bin_file)
+        if not os.path.exists(bin_path):
+            raise FileNotFoundError(f"{bin_file} not found")
+        entries.append((bin_path, bin_file))
+
+    images_dir = os.path.join(colmap_dir, "images")
+    if not os.path.exists(images_dir):
+        raise FileNotFoundError("Images directory not found")
+    for root, _, files in os.walk(images_dir):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            entries.append((path, os.path.relpath(path, colmap_dir)))
+    return entries
+
+
+def archive_path(workspace_path: str) -> str:
+    return os.path.join(workspace_path, ARCHIVE_FILENAME)
+
+
+def read_archive_info(workspace_path: str) -> Optional[Dict[str, Any]]:
+    """Size and hash of the cached archive, None if it was not built."""
+    info_path = os.path.join(workspace_path, ARCHIVE_INFO_FILENAME)
+    if not os.path.exists(info_path) or not os.path.exists(archive_path(workspace_path)):
+        return None
+    with open(info_path, "r") as f:
+        return json.load(f)
+
+
+def build_colmap_archive(workspace_path: str) -> Dict[str, Any]:
+    """
+    Build the COLMAP download of a splat once and cache it next to the model.
+
+    The colmap folder does not change after the splat succeeded, so the
+    archive is written to ``colmap.zip`` together with ``colmap.zip.json``
+    holding its size and SHA-256 (used as ETag). Both are written to unique
+    temporary files and renamed, so a reader never sees a partial file and
+    builds running at the same time (the export task and a download) do not
+    write to each other's files.
+    """
+    entries = colmap_archive_entries(os.path.join(workspace_path, "colmap"))
+    sha = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(prefix=f"{ARCHIVE_FILENAME}.", suffix=".tmp", dir=workspace_path)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in iter_zip(entries):
+                sha.update(chunk)
+                size += len(chunk)
+                f.write(chunk)
+        os.replace(tmp_path, archive_path(workspace_path))
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    info = {"size": size, "sha256": sha.hexdigest(), "num_files": len(entries)}
+    fd, tmp_path = tempfile.mkstemp(prefix=f"{ARCHIVE_INFO_FILENAME}.", suffix=".tmp", dir=workspace_path)
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(info, f)
+        os.replace(tmp_path, os.path.join(workspace_path, ARCHIVE_INFO_FILENAME))
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return info
@@ -0,0 +1,74 @@
+import os
+from functools import lru_cache
+from typing import Callable
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore
+
+from app.utils.image_store import file_digest
+
+
+@lru_cache(maxsize=1024)
+def _cached_digest(path: str, mtime_ns: int, size: int) -> str:
+    return file_digest(path)
+
+
+def model_digest(path: str) -> str:
+    """SHA-256 of a model file, only recomputed when the file changes."""
+    stat_result = os.stat(path)
+    return _cached_digest(path, stat_result.st_mtime_ns, stat_result.st_size)
+
+
+class ConversionCache:
+    """
+    Converted model files keyed by the SHA-256 of their source.
+
+    A conversion is written under a temporary name and renamed into place,
+    and runs under an exclusive lock file, so API workers in different
+    processes never convert the same model at the same time and never see
+    a partial file. Within a process, callers should additionally coalesce
+    requests with SingleFlight so they do not queue up on the lock.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, digest: str, ext: str) -> str:
+        return os.path.join(self.root, digest[:2], digest + ext)
+
+    def get_or_convert(self, src_path: str, digest: str, ext: str,
+                       convert: Callable[[str, str], None]) -> str:
+        """
+        Return the cached conversion of src_path, converting it if needed.
+
+        :param convert: Called as convert(src_path, output_path).
+        """
+        path = self.path(digest, ext)
+        if os.path.exists(path):
+            return path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".lock", "w") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            # Another process may have finished it while we waited
+            if not os.path.exists(path):
+                # Keep the extension last, converters pick the format from it
+                tmp_path = f"{path}.{os.getpid()}.tmp{ext}"
+                try:
+                    convert(src_path, tmp_path)
+                    if not os.path.exists(tmp_path):
+                        raise FileNotFoundError(f"Conversion did not produce {tmp_path}")
+                    os.replace(tmp_path, path)
+                finally:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+        return path
+
+    def remove(self, digest: str, ext: str) -> None:
+        for path in (self.path(digest, ext), self.path(digest, ext) + ".lock"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
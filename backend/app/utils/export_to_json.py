@@ -2,18 +2,35 @@
 import argparse
 import json
 import os
+import struct
 import numpy as np
 
 # Attempt to import from read_write_model.py
 # This assumes read_write_model.py is in the same directory or PYTHONPATH
 try:
-    from app.utils.read_write_model import read_model, qvec2rotmat, rotmat2qvec, Camera, Point3D
+    from app.utils.read_write_model import (
+        read_model, Camera, Point3D,
+        read_cameras_binary, read_cameras_text, read_images_binary_columnar, read_images_text,
+        read_points3D_binary_columnar, read_points3D_text, points3D_dict_to_arrays,
+        image_poses_from_dict, detect_model_format,
+    )
+    from app.utils.pose_utils import camera_poses
 except ImportError:
     print("Error: read_write_model.py not found. "
           "Please ensure it's in the same directory as this script, "
           "or installed in a directory listed in PYTHONPATH.")
     exit(1) # Exiting with a non-zero code indicates an error
 
+# Binary points layout (little endian), laid out so that a client can wrap
+# each section directly in a typed array:
+#   header   16 bytes: magic b"P3D\0", version (u32), count (u32), reserved (u32)
+#   xyz      count * 3 float32  -> Float32Array(buffer, 16, count * 3)
+#   rgb      count * 3 uint8    -> Uint8Array(buffer, 16 + 12 * count, count * 3)
+POINTS_BINARY_MAGIC = b"P3D\0"
+POINTS_BINARY_VERSION = 1
+POINTS_BINARY_HEADER = struct.Struct("<4sIII")
+
+
 def export_cameras_to_json(cameras, images, output_cameras_json_path):
     """
     Exports camera poses from a COLMAP model to a JSON file.
@@ -22,10 +39,11 @@ def export_cameras_to_json(cameras, images, output_cameras_json_path):
 
     Args:
         cameras (dict): Dictionary of Camera objects from read_model.
-        images (dict): Dictionary of Image objects from read_model.
+        images (ImagePoses): Image poses (ids, qvecs, tvecs, camera_ids, names).
+            Only the poses are needed, so the 2D observations are never decoded.
         output_cameras_json_path (str): Path to save the output cameras JSON file.
     """
-    if not images:
+    if len(images.ids) == 0:
         print(f"No images found. Camera JSON file will be empty or not created.")
         try:
             with open(output_cameras_json_path, 'w') as f:
@@ -45,39 +63,27 @@ def export_cameras_to_json(cameras, images, output_cameras_json_path):
             print(f"Error writing empty JSON file: {e}")
         return
 
-    camera_data_list = []
     # Sort by image_id for a consistent output order
-    for image_id in sorted(images.keys()):
-        image_obj = images[image_id]
+    order = np.argsort(images.ids, kind="stable")
+    # Camera centers and canonical quaternions for every image in one batch:
+    # C_w = -R_cw^T * t_cw, in COLMAP's native coordinate system.
+    poses = camera_poses(images.qvecs[order], images.tvecs[order])
+    positions = poses.centers.tolist()
+    quaternions = poses.qvecs.tolist()
+
+    camera_data_list = []
+    for position, quaternion, i in zip(positions, quaternions, order.tolist()):
+        camera_id = int(images.camera_ids[i])
+        name = images.names[i]
 
-        cam = cameras.get(image_obj.camera_id)
+        cam = cameras.get(camera_id)
         if not cam:
-            print(f"Warning: Camera ID {image_obj.camera_id} for image {image_obj.name} not found in cameras data. Skipping width/height for this entry.")
+            print(f"Warning: Camera ID {camera_id} for image {name} not found in cameras data. Skipping width/height for this entry.")
             image_width = None
             image_height = None
         else:
             image_width = cam.width
             image_height = cam.height
-        
-        q_cw = image_obj.qvec
-        # t_cw is the translation vector from COLMAP, transforming points from world to camera frame.
-        t_cw = image_obj.tvec
-        name = image_obj.name
-
-        # Convert q_cw to rotation matrix R_cw (world to camera).
-        # This is needed for calculating the camera position in world coordinates.
-        R_cw = qvec2rotmat(q_cw)
-
-        # Calculate camera center in world coordinates (C_w) in COLMAP's native coordinate system.
-        # C_w = -R_cw^T * t_cw.
-        position_np_colmap = -np.dot(R_cw.T, t_cw) # This is [X_colmap, Y_colmap, Z_colmap]
-
-        # Apply transformation: Negate the X and Y coordinates.
-        # Target position: [-X_colmap, -Y_colmap, Z_colmap]
-        position = [position_np_colmap[0], position_np_colmap[1], position_np_colmap[2]]
-        
-        quaternion_np = rotmat2qvec(R_cw)
-        quaternion = quaternion_np.tolist() # Convert numpy array to list
 
         camera_entry = {
             "position": position,
@@ -99,17 +105,17 @@ def export_cameras_to_json(cameras, images, output_cameras_json_path):
     except TypeError as e:
         print(f"TypeError during camera JSON serialization: {e}.")
 
-def export_points3D_to_json(points3D_data, output_points_json_path):
+def export_points3D_to_json(points3D_arrays, output_points_json_path):
     """
     Exports 3D points from a COLMAP model to a JSON file.
     The output format is a list of dictionaries, each with "id", "xyz", and "rgb".
     RGB values are normalized to be between 0 and 1.
 
     Args:
-        points3D_data (dict): Dictionary of Point3D objects from read_model.
+        points3D_arrays (Points3DArrays): Columnar points from read_points3D_binary_columnar.
         output_points_json_path (str): Path to save the output points JSON file.
     """
-    if not points3D_data:
+    if len(points3D_arrays.ids) == 0:
         print(f"No 3D points found. Points JSON file will be empty or not created.")
         try:
             with open(output_points_json_path, 'w') as f:
@@ -119,20 +125,17 @@ def export_points3D_to_json(points3D_data, output_points_json_path):
             print(f"Error writing empty points JSON file: {e}")
         return
 
-    points_list = []
-    for point_id in sorted(points3D_data.keys()):
-        point3D_obj = points3D_data[point_id]
-        
-        xyz_list = point3D_obj.xyz.tolist()
-        # Normalize RGB from 0-255 to 0.0-1.0
-        rgb_list = (point3D_obj.rgb / 255.0).tolist()
-
-        point_entry = {
-            "id": point3D_obj.id, # Already an int
-            "xyz": xyz_list,
-            "rgb": rgb_list
-        }
-        points_list.append(point_entry)
+    # Sort by point id for a consistent output order
+    order = np.argsort(points3D_arrays.ids, kind="stable")
+    ids = points3D_arrays.ids[order].tolist()
+    xyz = points3D_arrays.xyz[order].tolist()
+    # Normalize RGB from 0-255 to 0.0-1.0
+    rgb = (points3D_arrays.rgb[order] / 255.0).tolist()
+
+    points_list = [
+        {"id": point_id, "xyz": point_xyz, "rgb": point_rgb}
+        for point_id, point_xyz, point_rgb in zip(ids, xyz, rgb)
+    ]
 
     print(f"Processed {len(points_list)} 3D points.")
     print(f"Writing 3D points JSON data to: {output_points_json_path}")
@@ -145,6 +148,59 @@ def export_points3D_to_json(points3D_data, output_points_json_path):
     except TypeError as e:
         print(f"TypeError during 3D points JSON serialization: {e}. This might indicate an issue with data types.")
 
+def export_points3D_to_binary(points3D_arrays, output_points_bin_path):
+    """
+    Exports 3D points from a COLMAP model to the compact binary points format
+    (packed float32 xyz followed by uint8 rgb, see POINTS_BINARY_HEADER).
+
+    Args:
+        points3D_arrays (Points3DArrays): Columnar points from read_points3D_binary_columnar.
+        output_points_bin_path (str): Path to save the output binary points file.
+    """
+    order = np.argsort(points3D_arrays.ids, kind="stable")
+    count = len(order)
+    header = POINTS_BINARY_HEADER.pack(POINTS_BINARY_MAGIC, POINTS_BINARY_VERSION, count, 0)
+
+    print(f"Writing {count} 3D points as binary data to: {output_points_bin_path}")
+    try:
+        with open(output_points_bin_path, 'wb') as f:
+            f.write(header)
+            f.write(points3D_arrays.xyz[order].astype('<f4').tobytes())
+            f.write(points3D_arrays.rgb[order].astype(np.uint8).tobytes())
+        print(f"Successfully exported binary 3D points data to '{output_points_bin_path}'.")
+    except IOError as e:
+        print(f"Error writing binary 3D points file '{output_points_bin_path}': {e}")
+
+def read_model_for_export(path, ext=""):
+    """
+    Reads a COLMAP model for export, loading the 3D points in columnar form.
+
+    Only the image poses are loaded; the 2D observations in images.bin are
+    indexed but never decoded.
+
+    Returns:
+        tuple: (cameras, image_poses, points3D_arrays)
+    """
+    if ext == "":
+        if detect_model_format(path, ".bin"):
+            ext = ".bin"
+        elif detect_model_format(path, ".txt"):
+            ext = ".txt"
+        else:
+            raise FileNotFoundError(f"No .bin or .txt COLMAP model found in '{path}'")
+
+    if ext == ".txt":
+        cameras = read_cameras_text(os.path.join(path, "cameras" + ext))
+        images = image_poses_from_dict(read_images_text(os.path.join(path, "images" + ext)))
+        points3D_arrays = points3D_dict_to_arrays(
+            read_points3D_text(os.path.join(path, "points3D" + ext)))
+    else:
+        cameras = read_cameras_binary(os.path.join(path, "cameras" + ext))
+        with read_images_binary_columnar(os.path.join(path, "images" + ext)) as images_binary:
+            images = images_binary.poses
+        points3D_arrays = read_points3D_binary_columnar(os.path.join(path, "points3D" + ext))
+    return cameras, images, points3D_arrays
+
 def process_colmap_model(input_model_path, input_format, output_path):
     """
     Main function that processes a COLMAP model and exports camera poses and 3D points to JSON files.
@@ -152,7 +208,8 @@ def process_colmap_model(input_model_path, input_format, output_path):
     Args:
         input_model_path (str): Path to the COLMAP model directory.
         input_format (str): Format of the input COLMAP model files ('.bin', '.txt', or '' for auto-detect).
-        output_path (str): Base path for output files. Will be used to generate camera and points JSON paths.
+        output_path (str): Base path for output files. Will be used to generate the cameras.json,
+            points.json and binary points.bin paths.
     """
     # Ensure output directory exists
     if output_path and not os.path.isdir(output_path):
@@ -166,6 +223,7 @@ def process_colmap_model(input_model_path, input_format, output_path):
     # Auto-generate output file paths
     output_cameras_json_path = os.path.join(output_path, 'cameras.json')
     output_points_json_path = os.path.join(output_path, 'points.json')
+    output_points_bin_path = os.path.join(output_path, 'points.bin')
     
     print(f"Output cameras JSON path: {output_cameras_json_path}")
     print(f"Output points JSON path: {output_points_json_path}")
@@ -177,7 +235,7 @@ def process_colmap_model(input_model_path, input_format, output_path):
         print("Attempting to auto-detect model format (.bin or .txt).")
 
     try:
-        cameras, images, points3D = read_model(path=input_model_path, ext=input_format)
+        cameras, images, points3D = read_model_for_export(path=input_model_path, ext=input_format)
     except Exception as e:
         print(f"Error reading COLMAP model: {e}")
         print("Please ensure the following:")
@@ -186,13 +244,14 @@ def process_colmap_model(input_model_path, input_format, output_path):
         print("3. If you specified input_format, ensure it matches the actual file types.")
         return
 
-    print(f"Successfully read {len(cameras)} camera(s), {len(images)} image(s), and {len(points3D)} 3D point(s) from the model.")
+    print(f"Successfully read {len(cameras)} camera(s), {len(images.ids)} image(s), and {len(points3D.ids)} 3D point(s) from the model.")
 
     # Export cameras data
     export_cameras_to_json(cameras, images, output_cameras_json_path)
     
     # Export 3D points data
     export_points3D_to_json(points3D, output_points_json_path)
+    export_points3D_to_binary(points3D, output_points_bin_path)
 
 
 def main():
@@ -258,7 +317,7 @@ def main():
         print("Attempting to auto-detect model format (.bin or .txt).")
 
     try:
-        cameras, images, points3D = read_model(path=args.input_model_path, ext=args.input_format)
+        cameras, images, points3D = read_model_for_export(path=args.input_model_path, ext=args.input_format)
     except Exception as e:
         print(f"Error reading COLMAP model: {e}")
         print("Please ensure the following:")
@@ -267,7 +326,7 @@ def main():
         print("3. If you specified --input_format, ensure it matches the actual file types.")
         return
 
-    print(f"Successfully read {len(cameras)} camera(s), {len(images)} image(s), and {len(points3D)} 3D point(s) from the model.")
+    print(f"Successfully read {len(cameras)} camera(s), {len(images.ids)} image(s), and {len(points3D.ids)} 3D point(s) from the model.")
 
     # Export cameras data
     if args.output_cameras_json_path: # It has a default, so this will always be true unless user inputs empty string (not typical for path args)
@@ -0,0 +1,162 @@
+import os
+import subprocess
+import threading
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+from app.utils.process_runner import ProgressParser, run_command
+
+# ffmpeg output options per frame format. PNG writes dominate the disk I/O
+# of large captures, so JPEG (visually lossless at q=2) or lossless WebP
+# are usually the better trade-off.
+FRAME_FORMATS: Dict[str, List[str]] = {
+    "png": ["-q:v", "1"],
+    "jpg": ["-q:v", "2"],
+    "webp": ["-c:v", "libwebp", "-lossless", "1", "-compression_level", "4"],
+}
+
+
+def probe_duration(video_path: str) -> Optional[float]:
+    """Duration of a video in seconds, or None if ffprobe cannot tell."""
+    try:
+        result = subprocess.run(
+            [
+                "ffprobe", "-v", "error",
+                "-show_entries", "format=duration",
+                "-of", "default=noprint_wrappers=1:nokey=1",
+                video_path,
+            ],
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        return float(result.stdout.strip())
+    except (subprocess.CalledProcessError, ValueError, OSError):
+        return None
+
+
+def frame_command(video_path: str, output_pattern: str, fps: float,
+                  image_format: str, threads: int) -> List[str]:
+    """
+    ffmpeg command extracting the frames of one video.
+
+    -threads before -i only sizes the decoder, the filter graph and the
+    encoder have their own thread counts; all three are set to threads.
+    """
+    return [
+        "ffmpeg", "-nostdin", "-y",
+        "-loglevel", "error", "-nostats",
+        "-filter_threads", str(threads),
+        "-threads", str(threads),
+        "-i", video_path,
+        "-vf", f"fps={fps}",
+        *FRAME_FORMATS[image_format],
+        "-threads", str(threads),
+        "-progress", "pipe:1",
+        output_pattern,
+    ]
+
+
+def ffmpeg_progress(duration: float) -> ProgressParser:
+    """Progress of one video from the out_time_us lines of ffmpeg -progress."""
+    def parse(line: str) -> Optional[float]:
+        name, _, value = line.strip().partition("=")
+        if name == "out_time_us" and value.isdigit() and duration > 0:
+            return min(int(value) / 1e6 / duration, 1.0)
+        return None
+    return parse
+
+
+def extract_frames(video_paths: List[str], img_dir: str, *,
+                   fps: float = 2,
+                   image_format: str = "jpg",
+                   max_workers: int = 4,
+                   cpu_budget: Optional[int] = None,
+                   on_progress: Optional[Callable[[float], None]] = None,
+                   poll_interval: float = 2.0,
+                   **command_options: Any) -> List[str]:
+    """
+    Extract frames from several videos in parallel, one ffmpeg per video.
+
+    At most max_workers ffmpeg processes run at once and cpu_budget threads
+    are split between them, so the total CPU use stays bounded however
+    many videos were uploaded. on_progress is called from the calling
+    thread with the overall progress in [0, 1], weighted by video duration.
+    Each ffmpeg goes through run_command, command_options (log_path,
+    timeout, memory_limit_mb, ...) apply to every one of them. When a video
+    fails, the videos not started yet are skipped and the running ffmpeg
+    processes are killed before the error is raised.
+
+    :return: The output patterns, one per video, in input order.
+    """
+    if image_format not in FRAME_FORMATS:
+        raise ValueError(f"Unsupported frame format: {image_format}")
+    os.makedirs(img_dir, exist_ok=True)
+    if not video_paths:
+        return []
+
+    cpu_budget = cpu_budget or os.cpu_count() or 1
+    workers = max(1, min(max_workers, len(video_paths), cpu_budget))
+    threads = max(1, cpu_budget // workers)
+
+    durations = {path: probe_duration(path) or 0.0 for path in video_paths}
+    total_duration = sum(durations.values())
+    progress: Dict[str, float] = {path: 0.0 for path in video_paths}
+    finished = set()
+    lock = threading.Lock()
+    cancel = threading.Event()
+
+    def report() -> None:
+        if on_progress is None:
+            return
+        with lock:
+            if total_duration > 0:
+                done = sum(
+                    durations[path] if path in finished
+                    else progress[path] * durations[path]
+                    for path in video_paths
+                )
+                on_progress(done / total_duration)
+            else:
+                on_progress(len(finished) / len(video_paths))
+
+    def extract(path: str, pattern: str) -> None:
+        if cancel.is_set():
+            return
+
+        def on_video_progress(fraction: float) -> None:
+            progress[path] = fraction
+
+        run_command(frame_command(path, pattern, fps, image_format, threads),
+                    parser=ffmpeg_progress(durations[path]), on_progress=on_video_progress,
+                    progress_interval=0, cancel=cancel, **command_options)
+
+    output_patterns = [
+        os.path.join(img_dir, f"video{i+1}_%04d.{image_format}")
+        for i in range(len(video_paths))
+    ]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(extract, path, pattern): path
+            for path, pattern in zip(video_paths, output_patterns)
+        }
+        pending = set(futures)
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=poll_interval,
+                                     return_when=FIRST_EXCEPTION)
+                for future in done:
+                    if future.exception() is not None:
+                        raise future.exception()
+                    with lock:
+                        finished.add(futures[future])
+                report()
+        except BaseException:
+            # Leaving the executor waits for its threads: skip the remaining
+            # videos and kill the ffmpeg processes still running
+            for other in pending:
+                other.cancel()
+            cancel.set()
+            raise
+    return output_patterns
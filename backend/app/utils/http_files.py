@@ -0,0 +1,151 @@
+import hashlib
+import os
+import re
+from typing import AsyncIterator, Dict, Iterable, Optional, Tuple, Union
+
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response, StreamingResponse
+
+from app.utils.async_io import run_io
+
+CHUNK_SIZE = 64 * 1024
+
+
+def file_etag(*paths: str, salt: str = "") -> Optional[str]:
+    """
+    Build a strong ETag from the mtime and size of the given files.
+
+    Only the inode metadata is touched, never the file contents. Missing
+    files take part in the tag as well so that their later appearance
+    changes it. Returns None when none of the files exist.
+    """
+    parts = [salt]
+    found = False
+    for path in paths:
+        try:
+            stat_result = os.stat(path)
+        except FileNotFoundError:
+            parts.append(f"{path}:missing")
+            continue
+        found = True
+        parts.append(f"{path}:{stat_result.st_mtime_ns}:{stat_result.st_size}")
+    if not found:
+        return None
+    return '"' + hashlib.md5("|".join(parts).encode()).hexdigest() + '"'
+
+
+def is_not_modified(request: Request, etag: Optional[str]) -> bool:
+    """Whether the request's If-None-Match already matches etag."""
+    if etag is None:
+        return False
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+async def iter_file(path: str, chunk_size: int = CHUNK_SIZE, *,
+                    start: int = 0, length: Optional[int] = None) -> AsyncIterator[bytes]:
+    """Read a file (or length bytes of it from start) in chunks without blocking the event loop."""
+    f = await run_io(open, path, "rb")
+    try:
+        if start:
+            await run_io(f.seek, start)
+        remaining = length
+        while remaining is None or remaining > 0:
+            size = chunk_size if remaining is None else min(chunk_size, remaining)
+            chunk = await run_io(f.read, size)
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+    finally:
+        await run_io(f.close)
+
+
+async def splice_files(parts: Iterable[Union[bytes, str]]) -> AsyncIterator[bytes]:
+    """
+    Stream a document assembled from literal byte fragments and file paths.
+
+    Files are copied through verbatim in chunks, so e.g. JSON files can be
+    embedded into a larger JSON document without being parsed.
+    """
+    for part in parts:
+        if isinstance(part, bytes):
+            yield part
+        else:
+            async for chunk in iter_file(part):
+                yield chunk
+
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single byte range against a file of the given size.
+
+    :return: Inclusive (start, end), None when the header is not a single
+        byte range (the whole file is then sent).
+    :raises ValueError: The range cannot be satisfied.
+    """
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, end
+
+
+def ranged_file_response(request: Request, path: str, *, etag: str,
+                         media_type: str = "application/octet-stream",
+                         filename: Optional[str] = None,
+                         headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Serve a file with ETag revalidation and single byte-range requests.
+
+    Starlette's FileResponse does not handle Range, so partial requests
+    are answered here with a 206 streaming just the requested bytes.
+    If-Range is honoured: a stale validator gets the whole file.
+    """
+    headers = dict(headers or {})
+    headers["ETag"] = etag
+    headers["Accept-Ranges"] = "bytes"
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    size = os.path.getsize(path)
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range.strip() == etag):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            headers["Content-Range"] = f"bytes */{size}"
+            return Response(status_code=416, headers=headers)
+        if byte_range is not None:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            headers["Content-Length"] = str(end - start + 1)
+            return StreamingResponse(
+                iter_file(path, start=start, length=end - start + 1),
+                status_code=206,
+                media_type=media_type,
+                headers=headers,
+            )
+    return FileResponse(path, media_type=media_type, headers=headers)
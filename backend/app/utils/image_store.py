@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy.orm import Session  # type: ignore
+
+from app import crud
+from app.utils.staging import stage_file
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's contents, read in chunks."""
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class BlobStore:
+    """
+    Content-addressed file store.
+
+    A blob is stored once under its SHA-256 digest, sharded by the first
+    two byte pairs of the digest (``ab/cd/abcd...``) to keep directories
+    small. Blobs are immutable; whether a blob is still in use is tracked
+    by the image_blob table, not by the store.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self.path(digest))
+
+    def put(self, src_path: str, digest: Optional[str] = None) -> str:
+        """
+        Add a file to the store, hard-linking it when possible.
+
+        :return: The digest of the file.
+        """
+        digest = digest or file_digest(src_path)
+        blob_path = self.path(digest)
+        if os.path.exists(blob_path):
+            return digest
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        # Stage under a temporary name so a blob is never seen half-written
+        tmp_path = f"{blob_path}.{os.getpid()}.tmp"
+        stage_file(src_path, tmp_path)
+        os.replace(tmp_path, blob_path)
+        return digest
+
+    def remove(self, digest: str) -> None:
+        try:
+            os.remove(self.path(digest))
+        except FileNotFoundError:
+            pass
+
+
+# Per-splat image manifests: {"images": {name: {"digest": ..., "size": ...}}}
+
+def image_manifest_path(images_dir: str, splat_id: str) -> str:
+    return os.path.join(images_dir, f"{splat_id}.json")
+
+
+def read_image_manifest(path: str) -> Dict[str, Dict]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)["images"]
+
+
+def write_image_manifest(path: str, images: Dict[str, Dict]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"images": images}, f)
+    os.replace(tmp_path, path)
+
+
+@lru_cache(maxsize=256)
+def _cached_manifest(path: str, mtime_ns: int) -> Dict[str, Dict]:
+    return read_image_manifest(path)
+
+
+def resolve_image(store: BlobStore, manifest_path: str, name: str) -> Optional[Dict]:
+    """
+    Look up an image of a splat in its manifest.
+
+    Manifests are cached per modification time, so serving the images of a
+    splat only parses its manifest once.
+
+    :return: The manifest entry with the blob path added, or None.
+    """
+    try:
+        mtime_ns = os.stat(manifest_path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    entry = _cached_manifest(manifest_path, mtime_ns).get(name)
+    if entry is None:
+        return None
+    return {**entry, "path": store.path(entry["digest"])}
+
+
+def ingest_images(db: Session, store: BlobStore, manifest_path: str, src_dir: str) -> Dict[str, int]:
+    """
+    Store the images of src_dir as blobs and write the splat's manifest.
+
+    References are taken before the blobs are written and the references of
+    images no longer listed (when a job is re-run) are released afterwards,
+    so a blob is never removed while a splat still points to it.
+
+    :return: Counts of images, blobs newly written and bytes deduplicated.
+    """
+    images = {}
+    for name in sorted(os.listdir(src_dir)):
+        path = os.path.join(src_dir, name)
+        if os.path.isfile(path):
+            images[name] = {"digest": file_digest(path), "size": os.path.getsize(path)}
+
+    old_digests = {entry["digest"] for entry in read_image_manifest(manifest_path).values()}
+    sizes = {entry["digest"]: entry["size"] for entry in images.values()}
+    crud.image_blob.acquire(
+        db, sizes={digest: size for digest, size in sizes.items() if digest not in old_digests}
+    )
+
+    written = 0
+    deduplicated = 0
+    for name, entry in images.items():
+        if store.exists(entry["digest"]):
+            deduplicated += entry["size"]
+        else:
+            store.put(os.path.join(src_dir, name), entry["digest"])
+            written += 1
+    write_image_manifest(manifest_path, images)
+
+    crud.image_blob.release(db, digests=old_digests - set(sizes), on_free=store.remove)
+    return {
+        "num_images": len(images),
+        "blobs_written": written,
+        "bytes_deduplicated": deduplicated,
+    }
+
+
+def release_images(db: Session, store: BlobStore, manifest_path: str) -> Iterable[str]:
+    """Drop a splat's image manifest and free the blobs nobody else uses."""
+    digests = {entry["digest"] for entry in read_image_manifest(manifest_path).values()}
+    freed = crud.image_blob.release(db, digests=digests, on_free=store.remove)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    return freed
@@ -0,0 +1,166 @@
+import math
+import os
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.utils.staging import stage_file
+
+# Frames are analysed at this width; blur and motion estimates do not need
+# full resolution and this keeps the stage cheap compared to SfM.
+ANALYSIS_WIDTH = 320
+
+
+def load_gray(path: str, width: int = ANALYSIS_WIDTH) -> np.ndarray:
+    """Load an image as a downscaled float32 grayscale array."""
+    from PIL import Image
+
+    with Image.open(path) as img:
+        # Let the JPEG decoder downscale while decoding when it can
+        img.draft("L", (width, width))
+        img = img.convert("L")
+        if img.width > width:
+            height = max(1, round(img.height * width / img.width))
+            img = img.resize((width, height), Image.BILINEAR)
+        return np.asarray(img, dtype=np.float32)
+
+
+def laplacian_variance(gray: np.ndarray) -> float:
+    """Sharpness score: variance of the 4-neighbour Laplacian."""
+    laplacian = (
+        gray[:-2, 1:-1] + gray[2:, 1:-1] + gray[1:-1, :-2] + gray[1:-1, 2:]
+        - 4 * gray[1:-1, 1:-1]
+    )
+    return float(laplacian.var())
+
+
+def _window(shape: Tuple[int, int]) -> np.ndarray:
+    return np.outer(np.hanning(shape[0]), np.hanning(shape[1])).astype(np.float32)
+
+
+def frame_shift(previous: np.ndarray, current: np.ndarray) -> float:
+    """
+    Global image motion between two frames, as a fraction of the frame width.
+
+    Estimated with phase correlation, which recovers the dominant
+    translation; pure rotations or zooms show up as smaller shifts, which
+    is fine for spacing frames out along a capture.
+    """
+    if previous.shape != current.shape:
+        return 1.0
+    window = _window(previous.shape)
+    a = np.fft.rfft2((previous - previous.mean()) * window)
+    b = np.fft.rfft2((current - current.mean()) * window)
+    cross_power = a * np.conj(b)
+    cross_power /= np.abs(cross_power) + 1e-9
+    correlation = np.fft.irfft2(cross_power, s=previous.shape)
+    dy, dx = np.unravel_index(np.argmax(correlation), correlation.shape)
+    height, width = previous.shape
+    dy = dy - height if dy > height // 2 else dy
+    dx = dx - width if dx > width // 2 else dx
+    return math.hypot(dx, dy) / width
+
+
+def group_sequences(frame_names: List[str]) -> "OrderedDict[str, List[str]]":
+    """Group extracted frames (videoN_0001.jpg, ...) by source video, in order."""
+    sequences: "OrderedDict[str, List[str]]" = OrderedDict()
+    for name in sorted(frame_names):
+        prefix = os.path.splitext(name)[0].rsplit("_", 1)[0]
+        sequences.setdefault(prefix, []).append(name)
+    return sequences
+
+
+def score_sequence(frames_dir: str, names: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Sharpness of every frame and motion since the previous frame."""
+    sharpness = np.zeros(len(names))
+    motion = np.zeros(len(names))
+    previous = None
+    for i, name in enumerate(names):
+        gray = load_gray(os.path.join(frames_dir, name))
+        sharpness[i] = laplacian_variance(gray)
+        if previous is not None:
+            motion[i] = frame_shift(previous, gray)
+        previous = gray
+    return sharpness, motion
+
+
+def pick_keyframes(sharpness: np.ndarray, motion: np.ndarray, count: int,
+                   blur_ratio: float) -> List[int]:
+    """
+    Choose count frames spread evenly along the accumulated camera motion.
+
+    The sequence is cut into count segments of equal motion and the
+    sharpest frame of each segment is kept. Frames much blurrier than the
+    sequence median are only used when a segment has nothing better.
+    """
+    n = len(sharpness)
+    if count >= n:
+        return list(range(n))
+    cumulative = np.cumsum(motion)
+    total = cumulative[-1]
+    if total <= 0:
+        bounds = np.linspace(0, n, count + 1).round().astype(int)
+        segments = [np.arange(bounds[k], bounds[k + 1]) for k in range(count)]
+    else:
+        segment_of = np.minimum((cumulative / total * count).astype(int), count - 1)
+        segments = [np.flatnonzero(segment_of == k) for k in range(count)]
+
+    blur_threshold = blur_ratio * np.median(sharpness)
+    selected = []
+    for segment in segments:
+        if len(segment) == 0:
+            continue
+        sharp = segment[sharpness[segment] >= blur_threshold]
+        candidates = sharp if len(sharp) else segment
+        selected.append(int(candidates[np.argmax(sharpness[candidates])]))
+    return sorted(set(selected))
+
+
+def select_keyframes(frames_dir: str, output_dir: str, *,
+                     target_count: int = 300,
+                     min_motion: float = 0.02,
+                     blur_ratio: float = 0.35) -> Dict[str, int]:
+    """
+    Select sharp, well-spaced keyframes from extracted video frames.
+
+    Frames are scored for blur (Laplacian variance) and for motion relative
+    to the previous frame (phase correlation). Each video gets a share of
+    target_count proportional to its total motion, and never more than one
+    keyframe per min_motion of frame width travelled, so slow pans and
+    static stretches no longer flood COLMAP with near-duplicate frames.
+    The chosen frames are staged (hard-linked when possible) into output_dir.
+
+    :return: Counts of input frames and selected keyframes.
+    """
+    from PIL import Image  # noqa: F401 - fail early if Pillow is missing
+
+    names = [
+        name for name in os.listdir(frames_dir)
+        if os.path.isfile(os.path.join(frames_dir, name))
+    ]
+    sequences = group_sequences(names)
+    scores = {
+        prefix: score_sequence(frames_dir, frame_names)
+        for prefix, frame_names in sequences.items()
+    }
+
+    total_motion = {prefix: float(motion.sum()) for prefix, (_, motion) in scores.items()}
+    motion_sum = sum(total_motion.values())
+    os.makedirs(output_dir, exist_ok=True)
+    num_selected = 0
+    for prefix, frame_names in sequences.items():
+        sharpness, motion = scores[prefix]
+        if motion_sum > 0:
+            share = target_count * total_motion[prefix] / motion_sum
+        else:
+            share = target_count / len(sequences)
+        by_motion = total_motion[prefix] / min_motion + 1 if min_motion > 0 else share
+        count = max(1, int(round(min(share, by_motion))))
+
+        for index in pick_keyframes(sharpness, motion, count, blur_ratio):
+            stage_file(os.path.join(frames_dir, frame_names[index]),
+                       os.path.join(output_dir, frame_names[index]))
+            num_selected += 1
+
+    return {"num_frames": len(names), "num_keyframes": num_selected}
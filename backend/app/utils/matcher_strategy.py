@@ -0,0 +1,98 @@
+import os
+from typing import Any, Dict, List, Optional
+
+# Strategies understood by matcher_command
+MATCHER_STRATEGIES = ("exhaustive", "sequential", "vocab_tree", "spatial")
+
+# EXIF tag of the GPS IFD
+_GPS_INFO_TAG = 0x8825
+
+
+def has_gps_priors(img_dir: str, sample_size: int = 5) -> bool:
+    """Whether the first few images carry EXIF GPS positions."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return False
+
+    names = sorted(os.listdir(img_dir))[:sample_size]
+    if not names:
+        return False
+    for name in names:
+        try:
+            with Image.open(os.path.join(img_dir, name)) as img:
+                if not img.getexif().get_ifd(_GPS_INFO_TAG):
+                    return False
+        except OSError:
+            return False
+    return True
+
+
+def choose_matcher(num_images: int, from_videos: bool, *,
+                   exhaustive_max_images: int = 150,
+                   vocab_tree_path: Optional[str] = None,
+                   has_gps: bool = False,
+                   forced: str = "auto") -> str:
+    """
+    Pick the COLMAP matching strategy for a dataset.
+
+    - small sets (up to exhaustive_max_images): exhaustive, it is cheap
+      enough and the most robust;
+    - video frames: sequential, since consecutive frames overlap;
+    - large unordered photo sets: spatial when the photos are geotagged,
+      otherwise vocabulary-tree retrieval, falling back to exhaustive when
+      no vocabulary tree is available.
+
+    :param forced: Strategy name to use regardless of the dataset, or "auto".
+    """
+    if forced != "auto":
+        if forced not in MATCHER_STRATEGIES:
+            raise ValueError(f"Unknown matcher strategy: {forced}")
+        return forced
+    if num_images <= exhaustive_max_images:
+        return "exhaustive"
+    if from_videos:
+        return "sequential"
+    if has_gps:
+        return "spatial"
+    if vocab_tree_path and os.path.exists(vocab_tree_path):
+        return "vocab_tree"
+    return "exhaustive"
+
+
+def matcher_command(strategy: str, database_path: str, *,
+                    vocab_tree_path: Optional[str] = None,
+                    sequential_overlap: int = 10,
+                    vocab_tree_num_images: int = 50) -> List[str]:
+    """COLMAP command line of the given matching strategy."""
+    has_vocab_tree = bool(vocab_tree_path) and os.path.exists(vocab_tree_path)
+    cmd = ["colmap", f"{strategy}_matcher", "--database_path", database_path]
+    if strategy == "sequential":
+        cmd += ["--SequentialMatching.overlap", str(sequential_overlap)]
+        # Loop detection closes loops and joins separate videos, but it
+        # needs the vocabulary tree
+        if has_vocab_tree:
+            cmd += [
+                "--SequentialMatching.loop_detection", "1",
+                "--SequentialMatching.vocab_tree_path", vocab_tree_path,
+            ]
+    elif strategy == "vocab_tree":
+        if not has_vocab_tree:
+            raise ValueError("vocab_tree matching requires a vocabulary tree file")
+        cmd += [
+            "--VocabTreeMatching.vocab_tree_path", vocab_tree_path,
+            "--VocabTreeMatching.num_images", str(vocab_tree_num_images),
+        ]
+    cmd += ["--SiftMatching.use_gpu", "1"]
+    return cmd
+
+
+def matcher_info(strategy: str, num_images: int, from_videos: bool,
+                 seconds: float) -> Dict[str, Any]:
+    """Summary of a matching run, as recorded on the splat."""
+    return {
+        "strategy": strategy,
+        "num_images": num_images,
+        "from_videos": from_videos,
+        "seconds": round(seconds, 1),
+    }
@@ -0,0 +1,88 @@
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+MANIFEST_FILENAME = "manifest.json"
+
+
+class PipelineManifest:
+    """
+    Per-splat record of the reconstruction pipeline.
+
+    Stored as ``manifest.json`` in the splat's workspace directory. It keeps
+    the job parameters needed to restart the pipeline and, for each stage
+    that finished, a completion marker together with the outputs it
+    produced. A stage only counts as done while all of its recorded output
+    paths (outputs whose key ends in ``_dir`` or ``_path``) still exist and
+    the job parameters are those it ran with, so a resumed job re-runs
+    anything that was lost or asked for differently.
+    """
+
+    def __init__(self, workspace_path: str):
+        self.path = os.path.join(workspace_path, MANIFEST_FILENAME)
+        self.data: Dict[str, Any] = {"params": {}, "stages": {}}
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                self.data = json.load(f)
+
+    @classmethod
+    def exists(cls, workspace_path: str) -> bool:
+        return os.path.exists(os.path.join(workspace_path, MANIFEST_FILENAME))
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        return self.data["params"]
+
+    def set_params(self, **params: Any) -> None:
+        self.data["params"].update(params)
+        self.save()
+
+    def is_done(self, stage: str) -> bool:
+        record = self.data["stages"].get(stage)
+        if not record or record.get("status") != "done":
+            return False
+        # Stages recorded before their parameters were have none to compare
+        if record.get("params", self.params) != self.params:
+            return False
+        return all(
+            os.path.exists(value)
+            for key, value in record.get("outputs", {}).items()
+            if key.endswith(("_dir", "_path"))
+        )
+
+    def outputs(self, stage: str) -> Dict[str, Any]:
+        return self.data["stages"].get(stage, {}).get("outputs", {})
+
+    def mark_started(self, stage: str) -> None:
+        self.data["stages"][stage] = {
+            "status": "running",
+            "started_at": datetime.now().isoformat(),
+        }
+        self.save()
+
+    def mark_done(self, stage: str, outputs: Optional[Dict[str, Any]] = None) -> None:
+        record = self.data["stages"].setdefault(stage, {})
+        record.update(
+            status="done",
+            finished_at=datetime.now().isoformat(),
+            outputs=outputs or {},
+            params=dict(self.params),
+        )
+        self.save()
+
+    def mark_failed(self, stage: str, error: str) -> None:
+        record = self.data["stages"].setdefault(stage, {})
+        record.update(
+            status="failed",
+            finished_at=datetime.now().isoformat(),
+            error=error,
+        )
+        self.save()
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,83 @@
+import collections
+
+import numpy as np
+
+CameraPoses = collections.namedtuple(
+    "CameraPoses", ["centers", "qvecs", "orientations", "rotmats"]
+)
+
+
+def qvecs_to_rotmats(qvecs):
+    """
+    Batched version of read_write_model.qvec2rotmat.
+
+    :param qvecs: (N, 4) quaternions in COLMAP order (w, x, y, z).
+    :return: (N, 3, 3) rotation matrices.
+    """
+    qvecs = np.asarray(qvecs, dtype=np.float64).reshape(-1, 4)
+    w, x, y, z = qvecs.T
+    rotmats = np.empty((len(qvecs), 3, 3), dtype=np.float64)
+    rotmats[:, 0, 0] = 1 - 2 * y**2 - 2 * z**2
+    rotmats[:, 0, 1] = 2 * x * y - 2 * w * z
+    rotmats[:, 0, 2] = 2 * z * x + 2 * w * y
+    rotmats[:, 1, 0] = 2 * x * y + 2 * w * z
+    rotmats[:, 1, 1] = 1 - 2 * x**2 - 2 * z**2
+    rotmats[:, 1, 2] = 2 * y * z - 2 * w * x
+    rotmats[:, 2, 0] = 2 * z * x - 2 * w * y
+    rotmats[:, 2, 1] = 2 * y * z + 2 * w * x
+    rotmats[:, 2, 2] = 1 - 2 * x**2 - 2 * y**2
+    return rotmats
+
+
+def canonical_qvecs(qvecs):
+    """Flip quaternions onto the w >= 0 hemisphere."""
+    qvecs = np.array(qvecs, dtype=np.float64).reshape(-1, 4)
+    qvecs[qvecs[:, 0] < 0] *= -1
+    return qvecs
+
+
+def camera_poses(qvecs, tvecs):
+    """
+    Convert COLMAP world-to-camera poses into world-space camera poses.
+
+    COLMAP quaternions are unit length, so the quaternion of R_cw is the
+    normalized input itself and no eigen-decomposition is needed.
+
+    :param qvecs: (N, 4) world-to-camera rotations (w, x, y, z).
+    :param tvecs: (N, 3) world-to-camera translations.
+    :return: CameraPoses with
+        centers (N, 3): camera centers in world coordinates, C = -R_cw^T t_cw,
+        qvecs (N, 4): canonical world-to-camera quaternions,
+        orientations (N, 4): camera-to-world quaternions (camera orientation
+            in the world frame),
+        rotmats (N, 3, 3): camera-to-world rotation matrices R_cw^T.
+    """
+    qvecs = np.asarray(qvecs, dtype=np.float64).reshape(-1, 4)
+    tvecs = np.asarray(tvecs, dtype=np.float64).reshape(-1, 3)
+    qvecs = canonical_qvecs(qvecs / np.linalg.norm(qvecs, axis=1, keepdims=True))
+    rotmats_cw = qvecs_to_rotmats(qvecs)
+    centers = -np.einsum("nji,nj->ni", rotmats_cw, tvecs)
+    orientations = qvecs * np.array([1.0, -1.0, -1.0, -1.0])
+    return CameraPoses(
+        centers=centers,
+        qvecs=qvecs,
+        orientations=orientations,
+        rotmats=np.transpose(rotmats_cw, (0, 2, 1)),
+    )
+
+
+def opensplat_normalization(centers):
+    """
+    Translation and scale OpenSplat applies to a scene trained without --keep-crs.
+
+    OpenSplat centers the scene on the mean of the camera centers and scales
+    it so that the largest absolute camera coordinate is 1, without rotating
+    it; the model is saved in that frame unless --keep-crs is passed.
+
+    :param centers: (N, 3) camera centers in the COLMAP frame.
+    :return: (translation (3,), scale), normalized = (x - translation) * scale.
+    """
+    centers = np.asarray(centers, dtype=np.float64).reshape(-1, 3)
+    translation = centers.mean(axis=0)
+    extent = np.abs(centers - translation).max()
+    return translation, 1.0 / extent if extent > 0 else 1.0
@@ -0,0 +1,284 @@
+import logging
+import os
+import queue
+import re
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+# Turns an output line into the progress of the command in [0, 1], or None
+ProgressParser = Callable[[str], Optional[float]]
+
+# Lines of output kept for the error message of a failed command
+TAIL_LINES = 50
+# Seconds between SIGTERM and SIGKILL when a command times out
+KILL_GRACE_SECONDS = 10
+
+
+class CommandFailed(Exception):
+    pass
+
+
+class CommandTimeout(CommandFailed):
+    pass
+
+
+class CommandCancelled(CommandFailed):
+    pass
+
+
+class CommandResult(NamedTuple):
+    returncode: int
+    seconds: float
+    # Peak resident memory of the command, its children included when they
+    # were waited for
+    peak_memory_bytes: int
+
+
+def colmap_progress(line: str) -> Optional[float]:
+    """
+    Progress of COLMAP feature extraction, matching and undistortion.
+
+    Extraction logs "Processed file [i/n]", sequential, vocabulary-tree and
+    spatial matching "Matching image [i/n]", exhaustive matching "Matching
+    block [i/n, j/n]" and the undistorter "Undistorting image [i/n]".
+    """
+    match = re.search(r"(?:Processed file|Matching image|Undistorting image) \[(\d+)/(\d+)\]", line)
+    if match:
+        done, total = int(match.group(1)), int(match.group(2))
+        return done / total if total else None
+    match = re.search(r"Matching block \[(\d+)/(\d+), (\d+)/(\d+)\]", line)
+    if match:
+        i, rows, j, cols = map(int, match.groups())
+        return ((i - 1) * cols + j) / (rows * cols) if rows and cols else None
+    return None
+
+
+def opensplat_progress(num_iterations: int) -> ProgressParser:
+    """Progress of OpenSplat training from its "Step N: loss (P%)" or "Step N/M" lines."""
+    def parse(line: str) -> Optional[float]:
+        match = re.match(r"\s*Step (\d+)(?:/(\d+))?", line)
+        if not match:
+            return None
+        total = int(match.group(2)) if match.group(2) else num_iterations
+        return min(int(match.group(1)) / total, 1.0) if total else None
+    return parse
+
+
+# Loggers of the logs commands are writing to, with the number of commands
+# using each: commands run in parallel (one ffmpeg per video) share the
+# handler, so that only one of them rotates the file
+_loggers_lock = threading.Lock()
+_logger_users: Dict[str, int] = {}
+
+
+def _job_logger(log_path: str, max_bytes: int, backups: int) -> logging.Logger:
+    with _loggers_lock:
+        logger = logging.getLogger(f"{__name__}.{log_path}")
+        if not _logger_users.get(log_path):
+            os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+            logger.propagate = False
+            logger.setLevel(logging.INFO)
+            handler = RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backups)
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            logger.addHandler(handler)
+        _logger_users[log_path] = _logger_users.get(log_path, 0) + 1
+    return logger
+
+
+def _close_logger(log_path: str) -> None:
+    with _loggers_lock:
+        _logger_users[log_path] -= 1
+        if _logger_users[log_path]:
+            return
+        del _logger_users[log_path]
+        logger = logging.getLogger(f"{__name__}.{log_path}")
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+
+
+def _limited(cmd: List[str], memory_limit_mb: Optional[int], cgroup_dir: Optional[str]) -> List[str]:
+    """
+    The command wrapped in a shell applying the memory limits before exec.
+
+    The limits are applied by the child itself without a preexec_fn, which
+    is not safe when commands are started from several threads. RLIMIT_DATA
+    caps the heap and private mappings of each process rather than its
+    address space: CUDA reserves far more address space than it ever uses,
+    so RLIMIT_AS would break COLMAP and OpenSplat on the GPU. With a cgroup
+    (v2) the limit covers the command and all its children.
+    """
+    if cgroup_dir:
+        return ["sh", "-c", 'echo $$ > "$1" && shift && exec "$@"', "sh",
+                os.path.join(cgroup_dir, "cgroup.procs"), *cmd]
+    if memory_limit_mb:
+        # ulimit -d takes kilobytes
+        return ["sh", "-c", 'ulimit -d "$1" && shift && exec "$@"', "sh", str(memory_limit_mb * 1024), *cmd]
+    return cmd
+
+
+def _make_cgroup(cgroup_root: Optional[str], name: str, memory_limit_mb: Optional[int]) -> Optional[str]:
+    """A cgroup for one command with memory.max set, None when not possible."""
+    if not cgroup_root or not memory_limit_mb:
+        return None
+    path = os.path.join(cgroup_root, name)
+    try:
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "memory.max"), "w") as f:
+            f.write(str(memory_limit_mb * 1024 * 1024))
+        # Kill the command rather than leaving it stuck in reclaim
+        with open(os.path.join(path, "memory.swap.max"), "w") as f:
+            f.write("0")
+    except OSError:
+        if os.path.isdir(path) and not os.listdir(path):
+            os.rmdir(path)
+        return None
+    return path
+
+
+def _read_lines(stream, name: str, lines: "queue.Queue") -> None:
+    for line in stream:
+        lines.put((name, line.rstrip("\n")))
+    stream.close()
+    lines.put((name, None))
+
+
+def _kill(process: subprocess.Popen) -> None:
+    """Terminate the command and everything it started, then kill what is left."""
+    for sig, grace in ((signal.SIGTERM, KILL_GRACE_SECONDS), (signal.SIGKILL, 0)):
+        try:
+            os.killpg(process.pid, sig)
+        except ProcessLookupError:
+            return
+        try:
+            process.wait(timeout=grace or None)
+            return
+        except subprocess.TimeoutExpired:
+            continue
+
+
+def run_command(cmd: List[str], *,
+                log_path: Optional[str] = None,
+                parser: Optional[ProgressParser] = None,
+                on_progress: Optional[Callable[[float], None]] = None,
+                progress_interval: float = 2.0,
+                timeout: Optional[float] = None,
+                memory_limit_mb: Optional[int] = None,
+                cgroup_root: Optional[str] = None,
+                env: Optional[Dict[str, str]] = None,
+                cancel: Optional[threading.Event] = None,
+                log_max_bytes: int = 10 * 1024 * 1024,
+                log_backups: int = 3) -> CommandResult:
+    """
+    Run a command, streaming its output line by line.
+
+    stdout and stderr are appended to the rotating log at log_path as they
+    arrive, only the last lines are kept in memory for the error message.
+    Each line goes through parser and on_progress is called from the
+    calling thread with the progress in [0, 1] when it changed, at most
+    every progress_interval seconds. The command runs in its own process
+    group, killed as a whole once timeout seconds have passed or when
+    cancel is set. memory_limit_mb is enforced with a cgroup under
+    cgroup_root when it is writable, otherwise with an rlimit on each
+    process. env is added to the environment of the command only.
+
+    :raises CommandTimeout: When the command ran out of time.
+    :raises CommandCancelled: When it was killed because cancel was set.
+    :raises CommandFailed: When it exited with a non-zero status.
+    """
+    logger = _job_logger(log_path, log_max_bytes, log_backups) if log_path else None
+    cgroup_dir = _make_cgroup(cgroup_root, f"cmd-{os.getpid()}-{threading.get_ident()}", memory_limit_mb)
+    tail: deque = deque(maxlen=TAIL_LINES)
+    started = time.monotonic()
+    try:
+        if logger:
+            logger.info(f"$ {' '.join(cmd)}")
+        process = subprocess.Popen(
+            _limited(cmd, memory_limit_mb, cgroup_dir),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            errors="replace",
+            env={**os.environ, **(env or {})},
+            start_new_session=True,
+        )
+        lines: "queue.Queue" = queue.Queue()
+        readers = [
+            threading.Thread(target=_read_lines, args=(process.stdout, "out", lines), daemon=True),
+            threading.Thread(target=_read_lines, args=(process.stderr, "err", lines), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+
+        open_streams = len(readers)
+        timed_out = cancelled = False
+        progress = reported = None
+        reported_at = 0.0
+        while open_streams:
+            if timeout is not None and time.monotonic() - started > timeout:
+                timed_out = True
+                _kill(process)
+                break
+            if cancel is not None and cancel.is_set():
+                cancelled = True
+                _kill(process)
+                break
+            try:
+                name, line = lines.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if line is None:
+                open_streams -= 1
+                continue
+            tail.append(line)
+            if logger:
+                logger.info(f"[{name}] {line}")
+            if parser is not None:
+                parsed = parser(line)
+                if parsed is not None:
+                    progress = parsed
+            if on_progress is not None and progress is not None and progress != reported \
+                    and time.monotonic() - reported_at >= progress_interval:
+                on_progress(progress)
+                reported, reported_at = progress, time.monotonic()
+
+        usage = None
+        if process.returncode is None:
+            # wait4 rather than wait for the resource usage of the command
+            _, status, usage = os.wait4(process.pid, 0)
+            process.returncode = os.waitstatus_to_exitcode(status)
+        for reader in readers:
+            reader.join(timeout=KILL_GRACE_SECONDS)
+        seconds = time.monotonic() - started
+        # ru_maxrss is in kilobytes on Linux
+        peak = usage.ru_maxrss * 1024 if usage else 0
+        if cgroup_dir and os.path.exists(os.path.join(cgroup_dir, "memory.peak")):
+            with open(os.path.join(cgroup_dir, "memory.peak")) as f:
+                peak = int(f.read())
+        if logger:
+            logger.info(f"Exit status {process.returncode} after {seconds:.1f} s, "
+                        f"peak memory {peak / (1024 * 1024):.0f} MB")
+
+        output = "\n".join(tail)
+        if timed_out:
+            raise CommandTimeout(f"Command timed out after {timeout} s: {' '.join(cmd)}\n{output}")
+        if cancelled:
+            raise CommandCancelled(f"Command cancelled: {' '.join(cmd)}")
+        if process.returncode != 0:
+            raise CommandFailed(f"Command failed with status {process.returncode}: {' '.join(cmd)}\n{output}")
+        if on_progress is not None and progress is not None and reported != 1.0:
+            on_progress(1.0)
+        return CommandResult(process.returncode, seconds, peak)
+    finally:
+        if logger:
+            _close_logger(log_path)
+        if cgroup_dir:
+            try:
+                os.rmdir(cgroup_dir)
+            except OSError:
+                pass
@@ -1,5 +1,6 @@
 import argparse
 import collections
+import mmap
 import os
 import struct
 
@@ -19,6 +20,34 @@ Point3D = collections.namedtuple(
 )
 
 
+Points3DArrays = collections.namedtuple(
+    "Points3DArrays",
+    ["ids", "xyz", "rgb", "error", "track_offsets", "tracks"],
+)
+
+# Fixed-size part of a points3D.bin record, up to and including the track
+# length: POINT3D_ID, X, Y, Z, R, G, B, ERROR, TRACK_LENGTH.
+POINT3D_RECORD_DTYPE = np.dtype(
+    [
+        ("id", "<u8"),
+        ("xyz", "<f8", (3,)),
+        ("rgb", "u1", (3,)),
+        ("error", "<f8"),
+        ("track_length", "<u8"),
+    ]
+)
+TRACK_ELEM_DTYPE = np.dtype([("image_id", "<i4"), ("point2D_idx", "<i4")])
+
+ImagePoses = collections.namedtuple(
+    "ImagePoses", ["ids", "qvecs", "tvecs", "camera_ids", "names"]
+)
+
+# Fixed-size header of an images.bin record (IMAGE_ID, QVEC, TVEC,
+# CAMERA_ID), followed by the NUL-terminated name and the 2D points.
+IMAGE_HEADER_STRUCT = struct.Struct("<idddddddi")
+POINT2D_DTYPE = np.dtype([("xy", "<f8", (2,)), ("point3D_id", "<i8")])
+
+
 class Image(BaseImage):
     def qvec2rotmat(self):
         return qvec2rotmat(self.qvec)
@@ -214,6 +243,116 @@ def read_images_text(path):
     return images
 
 
+class ImagesBinary:
+    """
+    Columnar view of an images.bin file.
+
+    The file is memory-mapped and scanned once to index every record. Poses
+    are exposed as arrays straight away, while the 2D observations of an
+    image are only decoded, zero-copy from the mapping, by observations().
+    """
+
+    def __init__(self, path_to_model_file):
+        self._fid = open(path_to_model_file, "rb")
+        self._mmap = mmap.mmap(self._fid.fileno(), 0, access=mmap.ACCESS_READ)
+        mm = self._mmap
+
+        num_reg_images = struct.unpack_from("<Q", mm, 0)[0]
+        self.ids = np.empty(num_reg_images, dtype=np.int64)
+        self.qvecs = np.empty((num_reg_images, 4), dtype=np.float64)
+        self.tvecs = np.empty((num_reg_images, 3), dtype=np.float64)
+        self.camera_ids = np.empty(num_reg_images, dtype=np.int64)
+        self.names = []
+        self.points2D_offsets = np.empty(num_reg_images, dtype=np.int64)
+        self.num_points2D = np.empty(num_reg_images, dtype=np.int64)
+
+        offset = 8
+        for i in range(num_reg_images):
+            properties = IMAGE_HEADER_STRUCT.unpack_from(mm, offset)
+            self.ids[i] = properties[0]
+            self.qvecs[i] = properties[1:5]
+            self.tvecs[i] = properties[5:8]
+            self.camera_ids[i] = properties[8]
+            name_start = offset + IMAGE_HEADER_STRUCT.size
+            name_end = mm.find(b"\x00", name_start)
+            self.names.append(mm[name_start:name_end].decode("utf-8"))
+            num_points2D = struct.unpack_from("<Q", mm, name_end + 1)[0]
+            self.points2D_offsets[i] = name_end + 9
+            self.num_points2D[i] = num_points2D
+            offset = name_end + 9 + POINT2D_DTYPE.itemsize * num_points2D
+
+        self._index = {
+            image_id: i for i, image_id in enumerate(self.ids.tolist())
+        }
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def poses(self):
+        return ImagePoses(
+            ids=self.ids,
+            qvecs=self.qvecs,
+            tvecs=self.tvecs,
+            camera_ids=self.camera_ids,
+            names=self.names,
+        )
+
+    def index_of(self, image_id):
+        return self._index[image_id]
+
+    def observations(self, i):
+        """
+        Decode the 2D observations of the i-th image.
+
+        :return: (xys, point3D_ids) read-only views into the mapped file.
+        """
+        points2D = np.frombuffer(
+            self._mmap,
+            dtype=POINT2D_DTYPE,
+            count=int(self.num_points2D[i]),
+            offset=int(self.points2D_offsets[i]),
+        )
+        return points2D["xy"], points2D["point3D_id"]
+
+    def close(self):
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Observation views are still alive; the mapping is released
+            # once the last of them is garbage collected.
+            pass
+        self._fid.close()
+
+
+def read_images_binary_columnar(path_to_model_file):
+    return ImagesBinary(path_to_model_file)
+
+
+def image_poses_from_dict(images):
+    """Collect the poses of a dict of Image (e.g. from the text reader)."""
+    image_list = list(images.values())
+    return ImagePoses(
+        ids=np.array([img.id for img in image_list], dtype=np.int64),
+        qvecs=np.array(
+            [img.qvec for img in image_list], dtype=np.float64
+        ).reshape(-1, 4),
+        tvecs=np.array(
+            [img.tvec for img in image_list], dtype=np.float64
+        ).reshape(-1, 3),
+        camera_ids=np.array(
+            [img.camera_id for img in image_list], dtype=np.int64
+        ),
+        names=[img.name for img in image_list],
+    )
+
+
 def read_images_binary(path_to_model_file):
     """
     see: src/colmap/scene/reconstruction.cc
@@ -221,46 +360,19 @@ def read_images_binary(path_to_model_file):
         void Reconstruction::WriteImagesBinary(const std::string& path)
     """
     images = {}
-    with open(path_to_model_file, "rb") as fid:
-        num_reg_images = read_next_bytes(fid, 8, "Q")[0]
-        for _ in range(num_reg_images):
-            binary_image_properties = read_next_bytes(
-                fid, num_bytes=64, format_char_sequence="idddddddi"
-            )
-            image_id = binary_image_properties[0]
-            qvec = np.array(binary_image_properties[1:5])
-            tvec = np.array(binary_image_properties[5:8])
-            camera_id = binary_image_properties[8]
-            binary_image_name = b""
-            current_char = read_next_bytes(fid, 1, "c")[0]
-            while current_char != b"\x00":  # look for the ASCII 0 entry
-                binary_image_name += current_char
-                current_char = read_next_bytes(fid, 1, "c")[0]
-            image_name = binary_image_name.decode("utf-8")
-            num_points2D = read_next_bytes(
-                fid, num_bytes=8, format_char_sequence="Q"
-            )[0]
-            x_y_id_s = read_next_bytes(
-                fid,
-                num_bytes=24 * num_points2D,
-                format_char_sequence="ddq" * num_points2D,
-            )
-            xys = np.column_stack(
-                [
-                    tuple(map(float, x_y_id_s[0::3])),
-                    tuple(map(float, x_y_id_s[1::3])),
-                ]
-            )
-            point3D_ids = np.array(tuple(map(int, x_y_id_s[2::3])))
+    with ImagesBinary(path_to_model_file) as images_binary:
+        for i, image_id in enumerate(images_binary.ids.tolist()):
+            xys, point3D_ids = images_binary.observations(i)
             images[image_id] = Image(
                 id=image_id,
-                qvec=qvec,
-                tvec=tvec,
-                camera_id=camera_id,
-                name=image_name,
-                xys=xys,
-                point3D_ids=point3D_ids,
+                qvec=images_binary.qvecs[i],
+                tvec=images_binary.tvecs[i],
+                camera_id=int(images_binary.camera_ids[i]),
+                name=images_binary.names[i],
+                xys=np.array(xys),
+                point3D_ids=np.array(point3D_ids),
             )
+            del xys, point3D_ids
     return images
 
 
@@ -357,42 +469,198 @@ def read_points3D_text(path):
     return points3D
 
 
+def _byte_windows(buffer, width):
+    """View of every width-byte window of a uint8 buffer, one per start offset (no copy)."""
+    return np.lib.stride_tricks.as_strided(
+        buffer, (len(buffer) - width + 1, width), (1, 1), writeable=False
+    )
+
+
+# Bytes of points3D.bin scanned at a time when locating records
+POINT3D_SCAN_WINDOW = 1 << 20
+
+
+def _point3D_record_offsets(buffer, num_points):
+    """
+    Offsets and track lengths of the variable-length records of points3D.bin,
+    without a per-point Python loop.
+
+    A record starting at p ends at p + header + 8 * track_length, read at p.
+    The file is scanned in windows starting at the next known record: every
+    offset of the window whose track_length would fit in the file is a
+    candidate start (read through eight aligned u64 views), the true starts
+    are all among them and each links to the next. The records of the window
+    are the candidates reached from its first one, found by pointer doubling
+    over the candidates of the window only.
+    """
+    header_size = POINT3D_RECORD_DTYPE.itemsize
+    track_length_at = POINT3D_RECORD_DTYPE.fields["track_length"][1]
+    elem_size = TRACK_ELEM_DTYPE.itemsize
+    size = len(buffer)
+    lengths_at = _byte_windows(buffer[track_length_at:], 8)
+    is_candidate = np.empty(POINT3D_SCAN_WINDOW, dtype=bool)
+    # Candidate number of each offset of the window, only valid at candidates
+    index = np.empty(POINT3D_SCAN_WINDOW, dtype=np.int64)
+    offsets, lengths = [], []
+    found = 0
+    start = 8
+    while found < num_points:
+        stop = min(start + POINT3D_SCAN_WINDOW, size - header_size + 1)
+        if start >= stop:
+            raise ValueError("Malformed points3D.bin")
+        max_length = (size - start - header_size) // elem_size
+        width = stop - start
+        for residue in range(min(8, width)):
+            first = start + residue
+            window = np.frombuffer(buffer, dtype="<u8", count=(stop - first + 7) // 8,
+                                   offset=first + track_length_at)
+            is_candidate[residue:width:8] = window <= max_length
+        starts = np.flatnonzero(is_candidate[:width]) + start
+        track_lengths = np.ascontiguousarray(lengths_at[starts]).view("<u8")[:, 0].astype(np.int64)
+        ends = starts + header_size + elem_size * track_lengths
+        fits = ends <= size
+        starts, track_lengths, ends = starts[fits], track_lengths[fits], ends[fits]
+        if not len(starts) or starts[0] != start:
+            raise ValueError("Malformed points3D.bin")
+
+        # Successor of each candidate within the window, the last index is a
+        # sink for records ending past the window or at a non-candidate
+        sink = len(starts)
+        index[starts - start] = np.arange(sink)
+        successor = np.full(sink + 1, sink, dtype=np.int64)
+        inside = np.flatnonzero(ends < stop)
+        target = index[ends[inside] - start]
+        linked = (target >= 0) & (target < sink)
+        linked[linked] = starts[target[linked]] == ends[inside][linked]
+        successor[inside[linked]] = target[linked]
+        # After round j, the first 2^j records from the window start
+        reached = np.zeros(sink + 1, dtype=bool)
+        reached[0] = True
+        while True:
+            grown = reached.copy()
+            grown[successor[reached]] = True
+            grown[sink] = False
+            if np.array_equal(grown, reached):
+                break
+            reached = grown
+            successor = successor[successor]
+
+        nodes = np.flatnonzero(reached)[:num_points - found]
+        offsets.append(starts[nodes])
+        lengths.append(track_lengths[nodes])
+        found += len(nodes)
+        start = int(ends[nodes[-1]])
+    if start != size:
+        raise ValueError("Malformed points3D.bin")
+    if not offsets:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(offsets), np.concatenate(lengths)
+
+
+def read_points3D_binary_columnar(path_to_model_file):
+    """
+    Columnar reader for points3D.bin.
+
+    The file is memory-mapped, the variable-length records are located with
+    a vectorized scan and every field is gathered straight from the mapping,
+    copying only the bytes of the records and track elements.
+
+    :return: Points3DArrays with ids (N,), xyz (N, 3), rgb (N, 3), error (N,)
+        and the tracks in CSR form: track_offsets (N + 1,) indexing into the
+        structured tracks array (image_id, point2D_idx).
+    """
+    header_size = POINT3D_RECORD_DTYPE.itemsize
+    elem_size = TRACK_ELEM_DTYPE.itemsize
+    # np.memmap rather than mmap: the mapping is released with the last view,
+    # so an error raised while views exist cannot turn into a BufferError
+    buffer = np.memmap(path_to_model_file, dtype=np.uint8, mode="r")
+    num_points = int(buffer[:8].view("<u8")[0])
+    if num_points == 0:
+        records = np.empty(0, dtype=POINT3D_RECORD_DTYPE)
+        track_offsets = np.zeros(1, dtype=np.int64)
+        tracks = np.empty(0, dtype=TRACK_ELEM_DTYPE)
+    else:
+        record_offsets, track_lengths = _point3D_record_offsets(buffer, num_points)
+        records = np.ascontiguousarray(
+            _byte_windows(buffer, header_size)[record_offsets]
+        ).view(POINT3D_RECORD_DTYPE)[:, 0]
+
+        track_offsets = np.zeros(num_points + 1, dtype=np.int64)
+        np.cumsum(track_lengths, out=track_offsets[1:])
+        num_track_elems = int(track_offsets[-1])
+        # Offset of element j of point i: record_offsets[i] + header +
+        # elem_size * (j - track_offsets[i])
+        elem_offsets = np.repeat(
+            record_offsets + header_size - elem_size * track_offsets[:-1],
+            track_lengths,
+        )
+        elem_offsets += elem_size * np.arange(num_track_elems, dtype=np.int64)
+        tracks = np.ascontiguousarray(
+            _byte_windows(buffer, elem_size)[elem_offsets]
+        ).view(TRACK_ELEM_DTYPE)[:, 0]
+    del buffer
+
+    return Points3DArrays(
+        ids=records["id"].astype(np.int64),
+        xyz=np.ascontiguousarray(records["xyz"]),
+        rgb=np.ascontiguousarray(records["rgb"]),
+        error=np.ascontiguousarray(records["error"]),
+        track_offsets=track_offsets,
+        tracks=np.ascontiguousarray(tracks),
+    )
+
+
+def points3D_arrays_to_dict(points3D_arrays):
+    """Expand a Points3DArrays into the dict-of-Point3D representation."""
+    ids = points3D_arrays.ids.tolist()
+    offsets = points3D_arrays.track_offsets
+    image_ids = points3D_arrays.tracks["image_id"].astype(np.int64)
+    point2D_idxs = points3D_arrays.tracks["point2D_idx"].astype(np.int64)
+    points3D = {}
+    for i, point3D_id in enumerate(ids):
+        start, end = offsets[i], offsets[i + 1]
+        points3D[point3D_id] = Point3D(
+            id=point3D_id,
+            xyz=points3D_arrays.xyz[i],
+            rgb=points3D_arrays.rgb[i],
+            error=points3D_arrays.error[i],
+            image_ids=image_ids[start:end],
+            point2D_idxs=point2D_idxs[start:end],
+        )
+    return points3D
+
+
+def points3D_dict_to_arrays(points3D):
+    """Collapse a dict of Point3D (e.g. from the text reader) into columns."""
+    points = list(points3D.values())
+    track_lengths = [len(pt.image_ids) for pt in points]
+    track_offsets = np.zeros(len(points) + 1, dtype=np.int64)
+    np.cumsum(track_lengths, out=track_offsets[1:])
+    tracks = np.empty(int(track_offsets[-1]), dtype=TRACK_ELEM_DTYPE)
+    if len(tracks):
+        tracks["image_id"] = np.concatenate([pt.image_ids for pt in points])
+        tracks["point2D_idx"] = np.concatenate(
+            [pt.point2D_idxs for pt in points]
+        )
+    return Points3DArrays(
+        ids=np.array([pt.id for pt in points], dtype=np.int64),
+        xyz=np.array([pt.xyz for pt in points], dtype=np.float64).reshape(-1, 3),
+        rgb=np.array([pt.rgb for pt in points], dtype=np.uint8).reshape(-1, 3),
+        error=np.array([pt.error for pt in points], dtype=np.float64),
+        track_offsets=track_offsets,
+        tracks=tracks,
+    )
+
+
 def read_points3D_binary(path_to_model_file):
     """
     see: src/colmap/scene/reconstruction.cc
         void Reconstruction::ReadPoints3DBinary(const std::string& path)
         void Reconstruction::WritePoints3DBinary(const std::string& path)
     """
-    points3D = {}
-    with open(path_to_model_file, "rb") as fid:
-        num_points = read_next_bytes(fid, 8, "Q")[0]
-        for _ in range(num_points):
-            binary_point_line_properties = read_next_bytes(
-                fid, num_bytes=43, format_char_sequence="QdddBBBd"
-            )
-            point3D_id = binary_point_line_properties[0]
-            xyz = np.array(binary_point_line_properties[1:4])
-            rgb = np.array(binary_point_line_properties[4:7])
-            error = np.array(binary_point_line_properties[7])
-            track_length = read_next_bytes(
-                fid, num_bytes=8, format_char_sequence="Q"
-            )[0]
-            track_elems = read_next_bytes(
-                fid,
-                num_bytes=8 * track_length,
-                format_char_sequence="ii" * track_length,
-            )
-            image_ids = np.array(tuple(map(int, track_elems[0::2])))
-            point2D_idxs = np.array(tuple(map(int, track_elems[1::2])))
-            points3D[point3D_id] = Point3D(
-                id=point3D_id,
-                xyz=xyz,
-                rgb=rgb,
-                error=error,
-                image_ids=image_ids,
-                point2D_idxs=point2D_idxs,
-            )
-    return points3D
+    return points3D_arrays_to_dict(
+        read_points3D_binary_columnar(path_to_model_file)
+    )
 
 
 def write_points3D_text(points3D, path):
@@ -0,0 +1,99 @@
+import os
+import struct
+from typing import Any, Dict, NamedTuple, Optional
+
+import numpy as np
+
+from app.utils.splat_compression import morton_codes
+from app.utils.splat_format import SPLAT_DTYPE, read_splat
+
+# Gaussians per chunk, 128 KB of .splat records
+CHUNK_SIZE = 4096
+# Records copied at a time while reordering
+COPY_RECORDS = 256 * 1024
+
+# Chunk index written next to a sorted model, little endian:
+#   8s magic, u32 num_gaussians, u32 chunk_size, u32 num_chunks,
+#   then num_chunks x f32[6]: bounding box min xyz, max xyz
+INDEX_MAGIC = b"SPLATIDX"
+INDEX_HEADER = struct.Struct("<8sIII")
+
+
+class ChunkIndex(NamedTuple):
+    num_gaussians: int
+    chunk_size: int
+    # (num_chunks, 2, 3): min and max corner of every chunk
+    bounds: np.ndarray
+
+    def byte_range(self, start: int, count: int) -> tuple:
+        """Offset and length in the model file of count chunks from start."""
+        first = start * self.chunk_size
+        last = min((start + count) * self.chunk_size, self.num_gaussians)
+        return first * SPLAT_DTYPE.itemsize, (last - first) * SPLAT_DTYPE.itemsize
+
+
+def chunk_index_path(model_path: str) -> str:
+    return os.path.splitext(model_path)[0] + ".chunks"
+
+
+def read_chunk_index(model_path: str) -> Optional[ChunkIndex]:
+    """Chunk index of a sorted model, None if the model was not sorted."""
+    path = chunk_index_path(model_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, num_gaussians, chunk_size, num_chunks = INDEX_HEADER.unpack_from(data)
+    if magic != INDEX_MAGIC:
+        raise ValueError(f"Invalid chunk index {path}")
+    bounds = np.frombuffer(data, dtype="<f4", count=num_chunks * 6, offset=INDEX_HEADER.size)
+    return ChunkIndex(num_gaussians, chunk_size, bounds.reshape(num_chunks, 2, 3))
+
+
+def sort_splat(model_path: str, chunk_size: int = CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    Sort a .splat model along a Morton curve and index it in chunks.
+
+    The model stays a plain .splat file, only the order of the records
+    changes, so every prefix of it (or any run of chunks) covers a compact
+    region of the scene. The bounding box of every chunk of chunk_size
+    records is written to the chunk index next to the model. The sorted
+    model replaces the original atomically; sorting again is a no-op.
+    """
+    records = read_splat(model_path)
+    n = len(records)
+    codes = morton_codes(records["position"])
+    order = np.argsort(codes, kind="stable")
+    reordered = bool(n) and not np.array_equal(order, np.arange(n))
+    if reordered:
+        tmp_path = f"{model_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            for start in range(0, n, COPY_RECORDS):
+                f.write(np.asarray(records[order[start:start + COPY_RECORDS]]).tobytes())
+        del records
+        os.replace(tmp_path, model_path)
+        records = read_splat(model_path)
+
+    starts = np.arange(0, n, chunk_size)
+    bounds = np.zeros((len(starts), 2, 3), dtype="<f4")
+    if n:
+        position = np.asarray(records["position"])
+        bounds[:, 0] = np.minimum.reduceat(position, starts)
+        bounds[:, 1] = np.maximum.reduceat(position, starts)
+    index_path = chunk_index_path(model_path)
+    with open(index_path + ".tmp", "wb") as f:
+        f.write(INDEX_HEADER.pack(INDEX_MAGIC, n, chunk_size, len(starts)))
+        f.write(bounds.tobytes())
+    os.replace(index_path + ".tmp", index_path)
+    return {"num_gaussians": n, "chunk_size": chunk_size, "num_chunks": len(starts),
+            "reordered": reordered}
+
+
+def chunks_by_distance(index: ChunkIndex, camera: np.ndarray) -> np.ndarray:
+    """Chunk numbers ordered from the nearest to the farthest from camera."""
+    # Distance from the camera to each chunk's bounding box, 0 inside it;
+    # ties are broken by the distance to the box center
+    nearest = np.clip(camera, index.bounds[:, 0], index.bounds[:, 1])
+    distance = np.linalg.norm(nearest - camera, axis=1)
+    center = np.linalg.norm(index.bounds.mean(axis=1) - camera, axis=1)
+    return np.lexsort((center, distance))
@@ -0,0 +1,320 @@
+import os
+import struct
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+from app.utils.splat_format import SPLAT_DTYPE, decode_rotations, encode_rotations, read_splat
+
+# Quantized splat (.qsplat), little endian:
+#
+#   header         8s magic, u32 num_gaussians, chunk_size, num_chunks,
+#                  palette_size, 8 bytes reserved
+#   chunk bounds   num_chunks x f32[12]: position min/max, log scale min/max
+#   rotations      num_gaussians x u32: smallest three, 2 bit index + 3 x 10 bit
+#   positions      num_gaussians x u16[3]: position within the chunk bounds
+#   colors         num_gaussians x u16: index in the palette
+#   scales         num_gaussians x u8[3]: log scale within the chunk bounds
+#   palette        palette_size x u8[4]: RGBA
+#
+# Gaussians are sorted along a Morton curve first, so the chunks are
+# spatially compact and their bounds tight.
+MAGIC = b"QSPLAT01"
+HEADER = struct.Struct("<8sIIII8x")
+BOUNDS_DTYPE = np.dtype([
+    ("position_min", "<f4", (3,)),
+    ("position_max", "<f4", (3,)),
+    ("scale_min", "<f4", (3,)),
+    ("scale_max", "<f4", (3,)),
+])
+CHUNK_SIZE = 256
+# Chunks encoded at a time
+BLOCK_CHUNKS = 256
+
+POSITION_LEVELS = 2 ** 16 - 1
+SCALE_LEVELS = 2 ** 8 - 1
+ROTATION_LEVELS = 2 ** 10 - 1
+PALETTE_MAX = 2 ** 16
+# Bits per RGBA channel tried when building the palette, finest first
+PALETTE_BITS = (8, 7, 6, 5, 4)
+_SQRT1_2 = np.sqrt(0.5)
+
+
+def _spread_bits(v: np.ndarray) -> np.ndarray:
+    """Spread the low 21 bits of v to every third bit."""
+    v = v.astype(np.uint64) & np.uint64(0x1FFFFF)
+    for shift, mask in ((32, 0x1F00000000FFFF), (16, 0x1F0000FF0000FF),
+                        (8, 0x100F00F00F00F00F), (4, 0x10C30C30C30C30C3),
+                        (2, 0x1249249249249249)):
+        v = (v | (v << np.uint64(shift))) & np.uint64(mask)
+    return v
+
+
+def morton_codes(positions: np.ndarray) -> np.ndarray:
+    """63-bit Morton codes of positions within their bounding cube."""
+    positions = np.nan_to_num(positions.astype(np.float64), posinf=0, neginf=0)
+    if len(positions) == 0:
+        return np.empty(0, dtype=np.uint64)
+    lo = positions.min(axis=0)
+    # Same extent on all axes, so octree cells stay cubes
+    extent = float((positions.max(axis=0) - lo).max()) or 1.0
+    q = ((positions - lo) / extent * (2 ** 21 - 1)).astype(np.uint64)
+    return _spread_bits(q[:, 0]) | (_spread_bits(q[:, 1]) << np.uint64(1)) \
+        | (_spread_bits(q[:, 2]) << np.uint64(2))
+
+
+def _quantize(values: np.ndarray, lo: np.ndarray, hi: np.ndarray, levels: int) -> np.ndarray:
+    span = hi - lo
+    span[span == 0] = 1
+    return np.clip(np.rint((values - lo) / span * levels), 0, levels)
+
+
+def _dequantize(values: np.ndarray, lo: np.ndarray, hi: np.ndarray, levels: int) -> np.ndarray:
+    return lo + values.astype(np.float64) / levels * (hi - lo)
+
+
+def pack_rotations(q: np.ndarray) -> np.ndarray:
+    """
+    Pack unit quaternions into 32 bits with the smallest three encoding.
+
+    The largest component is dropped (its index takes 2 bits) and restored
+    from the unit norm; the others lie in [-1/sqrt(2), 1/sqrt(2)] and get
+    10 bits each.
+    """
+    largest = np.argmax(np.abs(q), axis=1)
+    rows = np.arange(len(q))
+    sign = np.where(q[rows, largest] < 0, -1.0, 1.0)
+    packed = largest.astype(np.uint32) << np.uint32(30)
+    for k in range(1, 4):
+        component = q[rows, (largest + k) % 4] * sign
+        value = np.clip(np.rint((component + _SQRT1_2) / (2 * _SQRT1_2) * ROTATION_LEVELS),
+                        0, ROTATION_LEVELS).astype(np.uint32)
+        packed |= value << np.uint32(30 - 10 * k)
+    return packed
+
+
+def unpack_rotations(packed: np.ndarray) -> np.ndarray:
+    packed = packed.astype(np.uint32)
+    largest = (packed >> np.uint32(30)).astype(np.int64)
+    rows = np.arange(len(packed))
+    q = np.zeros((len(packed), 4))
+    for k in range(1, 4):
+        value = (packed >> np.uint32(30 - 10 * k)) & np.uint32(ROTATION_LEVELS)
+        q[rows, (largest + k) % 4] = value / ROTATION_LEVELS * (2 * _SQRT1_2) - _SQRT1_2
+    q[rows, largest] = np.sqrt(np.maximum(0, 1 - (q ** 2).sum(axis=1)))
+    return q
+
+
+def build_palette(colors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Palettize RGBA colors into at most PALETTE_MAX entries.
+
+    Colors are binned at the finest bit depth whose occupied bins fit the
+    palette, and each entry is the mean color of its bin.
+
+    :return: (palette as u8[4] rows, palette index of every color)
+    """
+    colors = colors.astype(np.uint32)
+    for bits in PALETTE_BITS:
+        shift = np.uint32(8 - bits)
+        keys = np.zeros(len(colors), dtype=np.uint32)
+        for channel in range(4):
+            keys = (keys << np.uint32(bits)) | (colors[:, channel] >> shift)
+        unique, inverse = np.unique(keys, return_inverse=True)
+        if len(unique) <= PALETTE_MAX:
+            break
+    inverse = inverse.reshape(-1)
+    counts = np.bincount(inverse, minlength=len(unique))
+    palette = np.stack([
+        np.rint(np.bincount(inverse, weights=colors[:, channel], minlength=len(unique)) / counts)
+        for channel in range(4)
+    ], axis=1).astype(np.uint8)
+    return palette, inverse.astype(np.uint16)
+
+
+def _encode_block(records: np.ndarray, palette_index: np.ndarray, chunk_size: int):
+    """Quantize consecutive chunks of records, returns the bounds and packed arrays."""
+    n = len(records)
+    starts = np.arange(0, n, chunk_size)
+    chunk_of = np.arange(n) // chunk_size
+
+    position = records["position"].astype(np.float64)
+    log_scale = np.log(np.maximum(records["scale"].astype(np.float64), np.finfo(np.float32).tiny))
+
+    bounds = np.empty(len(starts), dtype=BOUNDS_DTYPE)
+    bounds["position_min"] = np.minimum.reduceat(position, starts)
+    bounds["position_max"] = np.maximum.reduceat(position, starts)
+    bounds["scale_min"] = np.minimum.reduceat(log_scale, starts)
+    bounds["scale_max"] = np.maximum.reduceat(log_scale, starts)
+    # Quantize against the float32 bounds that are stored
+    b = {name: bounds[name].astype(np.float64)[chunk_of] for name in BOUNDS_DTYPE.names}
+
+    positions = _quantize(position, b["position_min"], b["position_max"], POSITION_LEVELS)
+    scales = _quantize(log_scale, b["scale_min"], b["scale_max"], SCALE_LEVELS)
+    rotations = pack_rotations(decode_rotations(records["rotation"]))
+    return bounds, positions.astype(np.uint16), scales.astype(np.uint8), rotations, palette_index
+
+
+def _decode_block(bounds: np.ndarray, positions: np.ndarray, scales: np.ndarray,
+                  rotations: np.ndarray, colors: np.ndarray, palette: np.ndarray,
+                  chunk_size: int) -> np.ndarray:
+    chunk_of = np.arange(len(positions)) // chunk_size
+    b = {name: bounds[name].astype(np.float64)[chunk_of] for name in BOUNDS_DTYPE.names}
+    records = np.empty(len(positions), dtype=SPLAT_DTYPE)
+    records["position"] = _dequantize(positions, b["position_min"], b["position_max"], POSITION_LEVELS)
+    records["scale"] = np.exp(_dequantize(scales, b["scale_min"], b["scale_max"], SCALE_LEVELS))
+    records["color"] = palette[colors]
+    records["rotation"] = encode_rotations(unpack_rotations(rotations))
+    return records
+
+
+def _sections(num_gaussians: int, num_chunks: int, palette_size: int) -> Dict[str, Tuple[int, np.dtype, tuple]]:
+    """Offset, dtype and shape of every section of a .qsplat file."""
+    layout = [
+        ("bounds", BOUNDS_DTYPE, (num_chunks,)),
+        ("rotations", np.dtype("<u4"), (num_gaussians,)),
+        ("positions", np.dtype("<u2"), (num_gaussians, 3)),
+        ("colors", np.dtype("<u2"), (num_gaussians,)),
+        ("scales", np.dtype("u1"), (num_gaussians, 3)),
+        ("palette", np.dtype("u1"), (palette_size, 4)),
+    ]
+    sections = {}
+    offset = HEADER.size
+    for name, dtype, shape in layout:
+        sections[name] = (offset, dtype, shape)
+        offset += dtype.itemsize * int(np.prod(shape))
+    sections["end"] = (offset, None, ())
+    return sections
+
+
+def compressed_model_path(model_path: str) -> str:
+    return os.path.splitext(model_path)[0] + ".qsplat"
+
+
+def compress_splat(src_path: str, dst_path: str, chunk_size: int = CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    Write the quantized variant of a .splat model.
+
+    The original is left untouched. Gaussians are encoded BLOCK_CHUNKS
+    chunks at a time, and the file is written under a temporary name and
+    renamed into place.
+
+    :return: Sizes, compression ratio and the quantization error.
+    """
+    records = read_splat(src_path)
+    n = len(records)
+    order = np.argsort(morton_codes(records["position"]), kind="stable")
+    palette, palette_index = build_palette(np.asarray(records["color"]))
+    num_chunks = -(-n // chunk_size)
+
+    sections = _sections(n, num_chunks, len(palette))
+    size = sections["end"][0]
+    tmp_path = f"{dst_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, n, chunk_size, num_chunks, len(palette)))
+        f.truncate(size)
+
+    errors = _ErrorStats()
+    if n:
+        out = np.memmap(tmp_path, dtype=np.uint8, mode="r+")
+        views = _views(out, sections)
+        views["palette"][:] = palette
+        block = chunk_size * BLOCK_CHUNKS
+        for start in range(0, n, block):
+            indices = order[start:start + block]
+            original = np.asarray(records[indices])
+            encoded = _encode_block(original, palette_index[indices], chunk_size)
+            first_chunk = start // chunk_size
+            bounds, positions, scales, rotations, colors = encoded
+            views["bounds"][first_chunk:first_chunk + len(bounds)] = bounds
+            views["positions"][start:start + len(indices)] = positions
+            views["scales"][start:start + len(indices)] = scales
+            views["rotations"][start:start + len(indices)] = rotations
+            views["colors"][start:start + len(indices)] = colors
+            errors.add(original, _decode_block(*encoded, palette, chunk_size))
+        out.flush()
+        del views, out
+    os.replace(tmp_path, dst_path)
+
+    original_size = os.path.getsize(src_path)
+    return {
+        "format": "qsplat",
+        "num_gaussians": n,
+        "palette_size": len(palette),
+        "original_size": original_size,
+        "compressed_size": size,
+        "compression_ratio": round(original_size / size, 3) if size else None,
+        "error": errors.summary(),
+    }
+
+
+def _views(buffer: np.ndarray, sections: Dict[str, Tuple[int, np.dtype, tuple]]) -> Dict[str, np.ndarray]:
+    views = {}
+    for name, (offset, dtype, shape) in sections.items():
+        if dtype is None:
+            continue
+        count = int(np.prod(shape))
+        views[name] = buffer[offset:offset + count * dtype.itemsize].view(dtype).reshape(shape)
+    return views
+
+
+def decompress_splat(path: str) -> np.ndarray:
+    """Decode a .qsplat back to .splat records (in Morton order)."""
+    buffer = np.fromfile(path, dtype=np.uint8)
+    magic, n, chunk_size, num_chunks, palette_size = HEADER.unpack_from(buffer.tobytes()[:HEADER.size])
+    if magic != MAGIC:
+        raise ValueError("Not a .qsplat file")
+    sections = _sections(n, num_chunks, palette_size)
+    if len(buffer) != sections["end"][0]:
+        raise ValueError("Truncated .qsplat file")
+    v = _views(buffer, sections)
+    return _decode_block(v["bounds"], v["positions"], v["scales"], v["rotations"], v["colors"],
+                         v["palette"], chunk_size)
+
+
+class _ErrorStats:
+    """Running quantization error between original and decoded records."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.position_sq = 0.0
+        self.position_max = 0.0
+        self.scale_rel = 0.0
+        self.rotation_deg = 0.0
+        self.color_sq = 0.0
+        self.lo = None
+        self.hi = None
+
+    def add(self, original: np.ndarray, decoded: np.ndarray) -> None:
+        position = original["position"].astype(np.float64)
+        distance = np.linalg.norm(decoded["position"] - position, axis=1)
+        self.position_sq += float((distance ** 2).sum())
+        self.position_max = max(self.position_max, float(distance.max()))
+        self.lo = position.min(axis=0) if self.lo is None else np.minimum(self.lo, position.min(axis=0))
+        self.hi = position.max(axis=0) if self.hi is None else np.maximum(self.hi, position.max(axis=0))
+
+        scale = np.maximum(original["scale"].astype(np.float64), np.finfo(np.float32).tiny)
+        self.scale_rel += float(np.abs(decoded["scale"] / scale - 1).mean(axis=1).sum())
+
+        dot = np.abs((decode_rotations(original["rotation"])
+                      * decode_rotations(decoded["rotation"])).sum(axis=1))
+        self.rotation_deg += float(np.degrees(2 * np.arccos(np.clip(dot, 0, 1))).sum())
+
+        color = decoded["color"].astype(np.float64) - original["color"]
+        self.color_sq += float((color ** 2).mean(axis=1).sum())
+        self.count += len(original)
+
+    def summary(self) -> Dict[str, float]:
+        if not self.count:
+            return {}
+        diagonal = float(np.linalg.norm(self.hi - self.lo)) or 1.0
+        position_rmse = np.sqrt(self.position_sq / self.count)
+        return {
+            "position_rmse": float(position_rmse),
+            "position_max": self.position_max,
+            # relative to the diagonal of the scene bounding box
+            "position_rmse_rel": float(position_rmse / diagonal),
+            "scale_mean_rel": self.scale_rel / self.count,
+            "rotation_mean_deg": self.rotation_deg / self.count,
+            "color_rmse": float(np.sqrt(self.color_sq / self.count)),
+        }
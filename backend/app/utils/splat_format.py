@@ -0,0 +1,229 @@
+import os
+from typing import BinaryIO, Iterator, NamedTuple
+
+import numpy as np
+
+# Zeroth order spherical harmonic basis, maps the SH DC coefficients of a
+# Gaussian to its base color
+SH_C0 = 0.28209479177387814
+
+# Record of a .splat file (antimatter15/splat): position, scale, RGBA and the
+# rotation quaternion (w, x, y, z) quantized as q * 128 + 128, 32 bytes
+SPLAT_DTYPE = np.dtype([
+    ("position", "<f4", (3,)),
+    ("scale", "<f4", (3,)),
+    ("color", "u1", (4,)),
+    ("rotation", "u1", (4,)),
+])
+
+# Vertex properties of the .ply we write: the 3DGS layout with SH degree 0,
+# which is all a .splat holds
+PLY_PROPERTIES = (
+    "x", "y", "z", "nx", "ny", "nz",
+    "f_dc_0", "f_dc_1", "f_dc_2", "opacity",
+    "scale_0", "scale_1", "scale_2",
+    "rot_0", "rot_1", "rot_2", "rot_3",
+)
+PLY_DTYPE = np.dtype([(name, "<f4") for name in PLY_PROPERTIES])
+
+# Records converted at a time, bounds memory use for any model size
+CHUNK_RECORDS = 256 * 1024
+
+_PLY_TYPES = {
+    "char": "i1", "int8": "i1", "uchar": "u1", "uint8": "u1",
+    "short": "i2", "int16": "i2", "ushort": "u2", "uint16": "u2",
+    "int": "i4", "int32": "i4", "uint": "u4", "uint32": "u4",
+    "float": "f4", "float32": "f4", "double": "f8", "float64": "f8",
+}
+_PLY_FORMATS = {"binary_little_endian": "<", "binary_big_endian": ">"}
+
+
+class PlyHeader(NamedTuple):
+    vertex_dtype: np.dtype
+    num_vertices: int
+    data_offset: int
+
+
+def read_ply_header(f: BinaryIO) -> PlyHeader:
+    """
+    Parse the header of a binary .ply, leaving f at the vertex data.
+
+    :raises ValueError: Not a binary .ply whose first element is the vertex table.
+    """
+    if f.readline().strip() != b"ply":
+        raise ValueError("Not a PLY file")
+    byte_order = None
+    element = None
+    num_vertices = 0
+    properties = []
+    while True:
+        line = f.readline()
+        if not line:
+            raise ValueError("Truncated PLY header")
+        words = line.decode("ascii", errors="replace").split()
+        if not words or words[0] in ("comment", "obj_info"):
+            continue
+        if words[0] == "end_header":
+            break
+        if words[0] == "format":
+            if words[1] not in _PLY_FORMATS:
+                raise ValueError(f"Unsupported PLY format: {words[1]}")
+            byte_order = _PLY_FORMATS[words[1]]
+        elif words[0] == "element":
+            if element is None and words[1] != "vertex":
+                raise ValueError("The first PLY element must be vertex")
+            element = words[1]
+            if element == "vertex":
+                num_vertices = int(words[2])
+        elif words[0] == "property" and element == "vertex":
+            if words[1] == "list" or words[1] not in _PLY_TYPES:
+                raise ValueError(f"Unsupported vertex property: {' '.join(words[1:])}")
+            properties.append((words[2], _PLY_TYPES[words[1]]))
+    if byte_order is None or element is None:
+        raise ValueError("Invalid PLY header")
+    dtype = np.dtype([(name, byte_order + type_) for name, type_ in properties])
+    return PlyHeader(dtype, num_vertices, f.tell())
+
+
+def _stack(vertices: np.ndarray, names) -> np.ndarray:
+    return np.stack([vertices[name].astype(np.float64) for name in names], axis=1)
+
+
+def gaussians_to_splat(vertices: np.ndarray) -> np.ndarray:
+    """
+    Convert a chunk of 3DGS .ply vertices to .splat records.
+
+    Scales are stored as log in the .ply and opacities as logits, colors as
+    SH DC coefficients (plain red/green/blue is accepted as well). Colors
+    and quaternions are rounded to the nearest byte, so converting a .splat
+    to .ply and back gives the same colors.
+    """
+    names = vertices.dtype.names
+    for name in ("x", "y", "z", "opacity", "scale_0", "scale_1", "scale_2",
+                 "rot_0", "rot_1", "rot_2", "rot_3"):
+        if name not in names:
+            raise ValueError(f"Not a Gaussian splat PLY, missing property {name}")
+
+    records = np.empty(len(vertices), dtype=SPLAT_DTYPE)
+    records["position"] = _stack(vertices, ("x", "y", "z"))
+    with np.errstate(over="ignore"):
+        records["scale"] = np.exp(_stack(vertices, ("scale_0", "scale_1", "scale_2")))
+        alpha = 1 / (1 + np.exp(-vertices["opacity"].astype(np.float64)))
+
+    if "f_dc_0" in names:
+        rgb = (0.5 + SH_C0 * _stack(vertices, ("f_dc_0", "f_dc_1", "f_dc_2"))) * 255
+    elif "red" in names:
+        rgb = _stack(vertices, ("red", "green", "blue"))
+    else:
+        raise ValueError("Not a Gaussian splat PLY, no color properties")
+    color = np.column_stack([rgb, alpha * 255])
+    records["color"] = np.clip(np.rint(color), 0, 255)
+
+    rotation = _stack(vertices, ("rot_0", "rot_1", "rot_2", "rot_3"))
+    norm = np.linalg.norm(rotation, axis=1, keepdims=True)
+    norm[norm == 0] = 1
+    records["rotation"] = np.clip(np.rint(rotation / norm * 128 + 128), 0, 255)
+    return records
+
+
+def splat_to_gaussians(records: np.ndarray) -> np.ndarray:
+    """Convert a chunk of .splat records to 3DGS .ply vertices (PLY_DTYPE)."""
+    vertices = np.zeros(len(records), dtype=PLY_DTYPE)
+    position = records["position"]
+    scale = np.maximum(records["scale"], np.finfo(np.float32).tiny)
+    color = records["color"].astype(np.float64) / 255
+    rotation = (records["rotation"].astype(np.float64) - 128) / 128
+    alpha = np.clip(color[:, 3], 1e-6, 1 - 1e-6)
+
+    for i, axis in enumerate("xyz"):
+        vertices[axis] = position[:, i]
+        vertices[f"scale_{i}"] = np.log(scale[:, i])
+        vertices[f"f_dc_{i}"] = (color[:, i] - 0.5) / SH_C0
+    vertices["opacity"] = np.log(alpha / (1 - alpha))
+    for i in range(4):
+        vertices[f"rot_{i}"] = rotation[:, i]
+    return vertices
+
+
+def decode_rotations(rotation: np.ndarray) -> np.ndarray:
+    """Unit quaternions (w, x, y, z) of quantized .splat rotations."""
+    q = (rotation.astype(np.float64) - 128) / 128
+    norm = np.linalg.norm(q, axis=1, keepdims=True)
+    norm[norm == 0] = 1
+    return q / norm
+
+
+def encode_rotations(q: np.ndarray) -> np.ndarray:
+    """Quantize unit quaternions (w, x, y, z) to .splat rotations."""
+    return np.clip(np.rint(q * 128 + 128), 0, 255).astype(np.uint8)
+
+
+def ply_header(num_vertices: int) -> bytes:
+    lines = ["ply", "format binary_little_endian 1.0", f"element vertex {num_vertices}"]
+    lines += [f"property float {name}" for name in PLY_PROPERTIES]
+    lines.append("end_header")
+    return ("\n".join(lines) + "\n").encode("ascii")
+
+
+def iter_ply_vertices(path: str, chunk_records: int = CHUNK_RECORDS) -> Iterator[np.ndarray]:
+    """Vertex table of a binary .ply, chunk_records vertices at a time."""
+    with open(path, "rb") as f:
+        header = read_ply_header(f)
+        remaining = header.num_vertices
+        while remaining > 0:
+            count = min(chunk_records, remaining)
+            data = f.read(count * header.vertex_dtype.itemsize)
+            if len(data) < count * header.vertex_dtype.itemsize:
+                raise ValueError("Truncated PLY vertex data")
+            yield np.frombuffer(data, dtype=header.vertex_dtype)
+            remaining -= count
+
+
+def read_splat(path: str) -> np.ndarray:
+    """
+    Records of a .splat file, memory mapped read-only.
+
+    :raises ValueError: The size is not a multiple of the record size.
+    """
+    size = os.path.getsize(path)
+    if size % SPLAT_DTYPE.itemsize:
+        raise ValueError(f"Invalid .splat file size: {size}")
+    if size == 0:
+        return np.empty(0, dtype=SPLAT_DTYPE)
+    return np.memmap(path, dtype=SPLAT_DTYPE, mode="r")
+
+
+def iter_splat_records(path: str, chunk_records: int = CHUNK_RECORDS) -> Iterator[np.ndarray]:
+    records = read_splat(path)
+    for start in range(0, len(records), chunk_records):
+        yield np.asarray(records[start:start + chunk_records])
+
+
+def ply_to_splat(src_path: str, dst_path: str, chunk_records: int = CHUNK_RECORDS) -> int:
+    """
+    Convert a 3DGS .ply to .splat, streaming chunk by chunk.
+
+    :return: The number of Gaussians.
+    :raises ValueError: src_path is not a binary Gaussian splat .ply.
+    """
+    count = 0
+    with open(dst_path, "wb") as out:
+        for vertices in iter_ply_vertices(src_path, chunk_records):
+            out.write(gaussians_to_splat(vertices).tobytes())
+            count += len(vertices)
+    return count
+
+
+def splat_to_ply(src_path: str, dst_path: str, chunk_records: int = CHUNK_RECORDS) -> int:
+    """
+    Convert a .splat to a 3DGS .ply, streaming chunk by chunk.
+
+    :return: The number of Gaussians.
+    :raises ValueError: src_path is not a valid .splat file.
+    """
+    num_records = len(read_splat(src_path))
+    with open(dst_path, "wb") as out:
+        out.write(ply_header(num_records))
+        for records in iter_splat_records(src_path, chunk_records):
+            out.write(splat_to_gaussians(records).tobytes())
+    return num_records
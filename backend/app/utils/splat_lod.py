@@ -0,0 +1,200 @@
+import os
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app.utils.splat_compression import morton_codes
+from app.utils.splat_format import SPLAT_DTYPE, decode_rotations, encode_rotations, read_splat
+
+LOD_DIRNAME = "lod"
+# Number of Gaussians of the coarsest level (32 bytes each) and growth
+# factor between levels
+BASE_COUNT = 8192
+LEVEL_FACTOR = 4
+# Only the most important Gaussians, this many times the level's count,
+# are merged into a coarse level
+PRUNE_FACTOR = 8
+_TINY = np.finfo(np.float32).tiny
+
+
+def lod_dir(model_path: str) -> str:
+    return os.path.join(os.path.dirname(model_path), LOD_DIRNAME)
+
+
+def importance(records: np.ndarray) -> np.ndarray:
+    """Opacity times volume, how much a Gaussian contributes to the scene."""
+    alpha = records["color"][:, 3].astype(np.float64) / 255
+    return alpha * np.prod(records["scale"].astype(np.float64), axis=1)
+
+
+def quaternion_matrices(q: np.ndarray) -> np.ndarray:
+    """Rotation matrices of unit quaternions (w, x, y, z)."""
+    w, x, y, z = q.T
+    return np.stack([
+        np.stack([1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)], axis=1),
+        np.stack([2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)], axis=1),
+        np.stack([2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y)], axis=1),
+    ], axis=1)
+
+
+def matrix_quaternions(m: np.ndarray) -> np.ndarray:
+    """Unit quaternions (w, x, y, z) of rotation matrices."""
+    # Shepperd's method: pick the largest of w, x, y, z to divide by
+    diagonal = np.stack([np.trace(m, axis1=1, axis2=2), m[:, 0, 0], m[:, 1, 1], m[:, 2, 2]], axis=1)
+    case = np.argmax(diagonal, axis=1)
+    q = np.empty((len(m), 4))
+    for i in range(4):
+        rows = case == i
+        r = m[rows]
+        if i == 0:
+            s = np.sqrt(1 + diagonal[rows, 0]) * 2
+            q[rows] = np.stack([s / 4, (r[:, 2, 1] - r[:, 1, 2]) / s,
+                                (r[:, 0, 2] - r[:, 2, 0]) / s, (r[:, 1, 0] - r[:, 0, 1]) / s], axis=1)
+        elif i == 1:
+            s = np.sqrt(1 + r[:, 0, 0] - r[:, 1, 1] - r[:, 2, 2]) * 2
+            q[rows] = np.stack([(r[:, 2, 1] - r[:, 1, 2]) / s, s / 4,
+                                (r[:, 0, 1] + r[:, 1, 0]) / s, (r[:, 0, 2] + r[:, 2, 0]) / s], axis=1)
+        elif i == 2:
+            s = np.sqrt(1 + r[:, 1, 1] - r[:, 0, 0] - r[:, 2, 2]) * 2
+            q[rows] = np.stack([(r[:, 0, 2] - r[:, 2, 0]) / s, (r[:, 0, 1] + r[:, 1, 0]) / s,
+                                s / 4, (r[:, 1, 2] + r[:, 2, 1]) / s], axis=1)
+        else:
+            s = np.sqrt(1 + r[:, 2, 2] - r[:, 0, 0] - r[:, 1, 1]) * 2
+            q[rows] = np.stack([(r[:, 1, 0] - r[:, 0, 1]) / s, (r[:, 0, 2] + r[:, 2, 0]) / s,
+                                (r[:, 1, 2] + r[:, 2, 1]) / s, s / 4], axis=1)
+    return q / np.linalg.norm(q, axis=1, keepdims=True)
+
+
+def merge_gaussians(records: np.ndarray, groups: np.ndarray, num_groups: int) -> np.ndarray:
+    """
+    Merge the Gaussians of every group into one by moment matching.
+
+    Weights are the importances. The merged Gaussian has the weighted mean
+    position and color, and the covariance of the weighted mixture
+    (eigendecomposed back into scale and rotation). Its opacity keeps the
+    total opacity x volume of the group.
+    """
+    weight = importance(records) + _TINY
+    total = np.bincount(groups, weights=weight, minlength=num_groups)
+
+    def weighted_mean(values: np.ndarray) -> np.ndarray:
+        return np.bincount(groups, weights=weight * values, minlength=num_groups) / total
+
+    position = records["position"].astype(np.float64)
+    scale = np.maximum(records["scale"].astype(np.float64), _TINY)
+    rotation = quaternion_matrices(decode_rotations(records["rotation"]))
+    m = rotation * scale[:, None, :]
+    covariance = m @ m.transpose(0, 2, 1) + position[:, :, None] * position[:, None, :]
+
+    mean = np.stack([weighted_mean(position[:, i]) for i in range(3)], axis=1)
+    second = np.empty((num_groups, 3, 3))
+    for i in range(3):
+        for j in range(i, 3):
+            second[:, i, j] = second[:, j, i] = weighted_mean(covariance[:, i, j])
+    merged_covariance = second - mean[:, :, None] * mean[:, None, :]
+
+    eigenvalues, eigenvectors = np.linalg.eigh(merged_covariance)
+    # eigh may return a reflection, rotations need det = +1
+    flip = np.linalg.det(eigenvectors) < 0
+    eigenvectors[flip, :, 0] *= -1
+    merged_scale = np.sqrt(np.maximum(eigenvalues, _TINY))
+
+    mass = np.bincount(groups, weights=importance(records), minlength=num_groups)
+    alpha = np.clip(mass / np.prod(merged_scale, axis=1), 0, 1)
+
+    merged = np.empty(num_groups, dtype=SPLAT_DTYPE)
+    merged["position"] = mean
+    merged["scale"] = merged_scale
+    merged["rotation"] = encode_rotations(matrix_quaternions(eigenvectors))
+    rgb = np.stack([weighted_mean(records["color"][:, i].astype(np.float64)) for i in range(3)], axis=1)
+    merged["color"] = np.clip(np.rint(np.column_stack([rgb, alpha * 255])), 0, 255)
+    return merged
+
+
+def octree_cells(codes: np.ndarray, weight: np.ndarray, max_cells: int) -> np.ndarray:
+    """
+    Group Gaussians into at most max_cells octree cells.
+
+    Takes the deepest octree level whose occupied cells fit, then splits
+    the cells with the largest total weight one level further while the
+    budget allows, so levels get close to max_cells instead of jumping by
+    up to 8x between depths.
+
+    :param codes: 63-bit Morton codes, 21 bits per axis.
+    :return: Cell index of every Gaussian (0..num_cells - 1).
+    """
+    def cells_at(depth: int) -> np.ndarray:
+        _, inverse = np.unique(codes >> np.uint64(3 * (21 - depth)), return_inverse=True)
+        return inverse.reshape(-1)
+
+    parents = np.zeros(len(codes), dtype=np.int64)
+    depth, lo, hi = 0, 0, 21
+    while lo <= hi:
+        middle = (lo + hi) // 2
+        cells = cells_at(middle)
+        if cells.max(initial=0) < max_cells:
+            parents, depth, lo = cells, middle, middle + 1
+        else:
+            hi = middle - 1
+    if depth == 21 or not len(codes):
+        return parents
+
+    children = cells_at(depth + 1)
+    num_parents = int(parents.max()) + 1
+    parent_of_child = np.zeros(int(children.max()) + 1, dtype=np.int64)
+    parent_of_child[children] = parents
+    extra = np.bincount(parent_of_child, minlength=num_parents) - 1
+    order = np.argsort(-np.bincount(parents, weights=weight, minlength=num_parents))
+    split = np.zeros(num_parents, dtype=bool)
+    split[order[np.cumsum(extra[order]) <= max_cells - num_parents]] = True
+
+    groups = np.where(split[parents], num_parents + children, parents)
+    _, groups = np.unique(groups, return_inverse=True)
+    return groups.reshape(-1)
+
+
+def coarsen(records: np.ndarray, count: int) -> np.ndarray:
+    """
+    Approximate records with at most count Gaussians.
+
+    The least important Gaussians (opacity x volume) are pruned first, then
+    neighbours within the same octree cell are merged.
+    """
+    keep = min(len(records), count * PRUNE_FACTOR)
+    if keep < len(records):
+        selected = np.argpartition(-importance(records), keep - 1)[:keep]
+        records = records[np.sort(selected)]
+    cells = octree_cells(morton_codes(records["position"]), importance(records), count)
+    return merge_gaussians(records, cells, int(cells.max()) + 1 if len(cells) else 0)
+
+
+def build_lod(model_path: str, *, base_count: int = BASE_COUNT,
+              level_factor: int = LEVEL_FACTOR) -> Dict[str, Any]:
+    """
+    Build the level-of-detail pyramid of a .splat model.
+
+    Level 0 has at most base_count Gaussians and every level has up to
+    level_factor times more than the previous one; the last level is the
+    model itself. Coarse levels are written to the ``lod`` directory next to
+    the model as .splat files, each derived from the full model.
+
+    :return: Description of the levels, file paths are relative to the model directory.
+    """
+    records = np.asarray(read_splat(model_path))
+    out_dir = lod_dir(model_path)
+    os.makedirs(out_dir, exist_ok=True)
+
+    levels: List[Dict[str, Any]] = []
+    count = base_count
+    while count < len(records):
+        level = coarsen(records, count)
+        filename = os.path.join(LOD_DIRNAME, f"level_{len(levels)}.splat")
+        path = os.path.join(os.path.dirname(model_path), filename)
+        level.tofile(f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+        levels.append({"level": len(levels), "num_gaussians": len(level),
+                       "size": os.path.getsize(path), "file": filename})
+        count *= level_factor
+    levels.append({"level": len(levels), "num_gaussians": len(records),
+                   "size": os.path.getsize(model_path), "file": os.path.basename(model_path)})
+    return {"levels": levels}
@@ -0,0 +1,161 @@
+import json
+import os
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.utils.pose_utils import opensplat_normalization
+from app.utils.splat_format import read_splat
+from app.utils.splat_lod import importance
+
+# Records processed at a time
+BLOCK_RECORDS = 256 * 1024
+# Bytes of each Gaussians x cameras temporary when computing camera distances
+DISTANCE_BLOCK_BYTES = 32 * 1024 * 1024
+
+PRUNE_REASONS = ("opacity", "volume", "screen")
+
+
+def load_cameras(cameras_path: str, normalized: bool = False) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Camera centers and focal lengths (in pixels) from cameras.json.
+
+    cameras.json is in the COLMAP frame; with normalized the centers are
+    moved into the frame OpenSplat saves models in without --keep-crs.
+
+    cameras.json has no intrinsics, the focal length is taken as the image
+    width (about 53 degrees horizontal field of view). Phone and DSLR main
+    cameras are usually wider, so this rather overestimates how large a
+    Gaussian appears on screen, which keeps pruning conservative.
+    """
+    if not cameras_path or not os.path.exists(cameras_path):
+        return None
+    with open(cameras_path, "r") as f:
+        cameras = json.load(f)
+    cameras = [camera for camera in cameras if camera.get("position") is not None]
+    if not cameras:
+        return None
+    centers = np.array([camera["position"] for camera in cameras], dtype=np.float64)
+    if normalized:
+        translation, scale = opensplat_normalization(centers)
+        centers = (centers - translation) * scale
+    focal = np.array([camera.get("image_width") or 0 for camera in cameras], dtype=np.float64)
+    focal[focal == 0] = focal.max() or 1000
+    return centers, focal
+
+
+def max_screen_radius(positions: np.ndarray, radius: np.ndarray, cameras: Tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+    """
+    Largest projected radius in pixels of spheres over all cameras.
+
+    Every camera is assumed to look straight at the sphere, so this is an
+    upper bound of the size it actually covers in any of the images.
+    """
+    centers, focal = cameras
+    # Only the nearest camera relative to its focal length matters; the
+    # block of Gaussians shrinks as cameras are added to bound the memory
+    rows = max(1, DISTANCE_BLOCK_BYTES // (8 * len(centers)))
+    center_norms = (centers ** 2).sum(axis=1)
+    result = np.empty(len(positions))
+    for start in range(0, len(positions), rows):
+        block = positions[start:start + rows]
+        distance = block @ centers.T
+        distance *= -2
+        distance += (block ** 2).sum(axis=1)[:, None]
+        distance += center_norms[None, :]
+        np.maximum(distance, 0, out=distance)
+        np.sqrt(distance, out=distance)
+        distance /= focal[None, :]
+        result[start:start + rows] = radius[start:start + rows] / np.maximum(distance.min(axis=1), 1e-12)
+    return result
+
+
+def scene_diagonal(positions: np.ndarray) -> float:
+    """Diagonal of the scene bounds, ignoring the 1% outliers on each side."""
+    if not len(positions):
+        return 1.0
+    lo, hi = np.percentile(positions, [1, 99], axis=0)
+    return float(np.linalg.norm(hi - lo)) or 1.0
+
+
+def prune_candidates(records: np.ndarray, *, min_opacity: float, min_volume: float,
+                     min_screen_pixels: float,
+                     cameras: Optional[Tuple[np.ndarray, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """Which records fall below each threshold, by reason."""
+    alpha = records["color"][:, 3].astype(np.float64) / 255
+    scale = records["scale"].astype(np.float64)
+    reasons = {
+        "opacity": alpha < min_opacity,
+        "volume": np.prod(scale, axis=1) < min_volume,
+        "screen": np.zeros(len(records), dtype=bool),
+    }
+    if cameras is not None and min_screen_pixels > 0:
+        # 3 sigma along the longest axis
+        radius = 3 * scale.max(axis=1)
+        positions = records["position"].astype(np.float64)
+        reasons["screen"] = max_screen_radius(positions, radius, cameras) < min_screen_pixels
+    return reasons
+
+
+def prune_splat(model_path: str, *, min_opacity: float, min_size_ratio: float,
+                min_screen_pixels: float, max_ratio: float,
+                cameras_path: Optional[str] = None,
+                normalized_cameras: bool = False) -> Dict[str, Any]:
+    """
+    Drop near-transparent, tiny and sub-pixel Gaussians from a .splat model.
+
+    A Gaussian is a candidate when its opacity is below min_opacity, its
+    volume below (min_size_ratio x scene diagonal)^3, or, when camera poses
+    are available, its projected size is below min_screen_pixels in every
+    image (normalized_cameras: the model is in OpenSplat's normalized frame,
+    see load_cameras). At most max_ratio of the Gaussians are removed (the quality
+    budget): beyond that only the candidates with the lowest opacity x
+    volume go. The pruned model replaces the original atomically.
+
+    :return: Counts before/after, candidates by reason and the bytes saved.
+    """
+    records = read_splat(model_path)
+    n = len(records)
+    size_before = os.path.getsize(model_path)
+    min_volume = (min_size_ratio * scene_diagonal(np.asarray(records["position"]))) ** 3
+    cameras = load_cameras(cameras_path, normalized_cameras)
+
+    candidates = np.zeros(n, dtype=bool)
+    removed = dict.fromkeys(PRUNE_REASONS, 0)
+    for start in range(0, n, BLOCK_RECORDS):
+        block = np.asarray(records[start:start + BLOCK_RECORDS])
+        reasons = prune_candidates(block, min_opacity=min_opacity, min_volume=min_volume,
+                                   min_screen_pixels=min_screen_pixels, cameras=cameras)
+        for reason in PRUNE_REASONS:
+            removed[reason] += int(reasons[reason].sum())
+        candidates[start:start + len(block)] = np.logical_or.reduce(list(reasons.values()))
+
+    budget = int(max_ratio * n)
+    indices = np.flatnonzero(candidates)
+    if len(indices) > budget:
+        weakest = np.argsort(importance(np.asarray(records[indices])), kind="stable")[:budget]
+        candidates[:] = False
+        candidates[indices[weakest]] = True
+
+    num_removed = int(candidates.sum())
+    if num_removed:
+        tmp_path = f"{model_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            for start in range(0, n, BLOCK_RECORDS):
+                keep = ~candidates[start:start + BLOCK_RECORDS]
+                f.write(np.asarray(records[start:start + BLOCK_RECORDS])[keep].tobytes())
+        del records
+        os.replace(tmp_path, model_path)
+
+    size_after = os.path.getsize(model_path)
+    return {
+        "num_before": n,
+        "num_after": n - num_removed,
+        # Gaussians below each threshold, one may be below several
+        "candidates": removed,
+        "budget_limited": len(indices) > budget,
+        "used_cameras": cameras is not None,
+        "size_before": size_before,
+        "size_after": size_after,
+        "bytes_saved": size_before - size_after,
+    }
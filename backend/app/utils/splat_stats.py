@@ -0,0 +1,153 @@
+import json
+import os
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from app.utils.pose_utils import opensplat_normalization, qvecs_to_rotmats
+from app.utils.splat_format import read_splat
+
+# Records processed at a time
+BLOCK_RECORDS = 256 * 1024
+OPACITY_BINS = 10
+
+
+def _box(lo: np.ndarray, hi: np.ndarray) -> Dict[str, list]:
+    return {"min": lo.tolist(), "max": hi.tolist()}
+
+
+def oriented_box(positions: np.ndarray, centroid: np.ndarray, covariance: np.ndarray) -> Dict[str, Any]:
+    """
+    Bounding box aligned with the principal axes of the positions.
+
+    The axes are the eigenvectors of the covariance (rows, largest spread
+    first, right-handed); the box is tight along each of them.
+    """
+    _, vectors = np.linalg.eigh(covariance)
+    axes = vectors[:, ::-1].T
+    if np.linalg.det(axes) < 0:
+        axes[2] = -axes[2]
+    lo = np.full(3, np.inf)
+    hi = np.full(3, -np.inf)
+    for start in range(0, len(positions), BLOCK_RECORDS):
+        projected = (positions[start:start + BLOCK_RECORDS] - centroid) @ axes.T
+        lo = np.minimum(lo, projected.min(axis=0))
+        hi = np.maximum(hi, projected.max(axis=0))
+    return {
+        "center": (centroid + (lo + hi) / 2 @ axes).tolist(),
+        "axes": axes.tolist(),
+        "half_extents": ((hi - lo) / 2).tolist(),
+    }
+
+
+def camera_frustums(cameras_path: Optional[str], target: np.ndarray,
+                    normalized: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Bounding box of the union of the camera frusta from cameras.json.
+
+    Each frustum reaches from the camera center to the depth of target (the
+    scene centroid) along its optical axis. As in pruning, the focal length
+    is taken as the image width since cameras.json has no intrinsics. With
+    normalized the cameras are moved from the COLMAP frame into the frame
+    OpenSplat saves models in without --keep-crs, which only translates and
+    scales the scene.
+    """
+    if not cameras_path or not os.path.exists(cameras_path):
+        return None
+    with open(cameras_path, "r") as f:
+        cameras = json.load(f)
+    cameras = [camera for camera in cameras
+               if camera.get("position") is not None and camera.get("quaternion") is not None]
+    if not cameras:
+        return None
+    centers = np.array([camera["position"] for camera in cameras], dtype=np.float64)
+    if normalized:
+        translation, scale = opensplat_normalization(centers)
+        centers = (centers - translation) * scale
+    # World-to-camera rotations, the transposes map camera axes to the world
+    to_world = qvecs_to_rotmats([camera["quaternion"] for camera in cameras]).transpose(0, 2, 1)
+    width = np.array([camera.get("image_width") or 1 for camera in cameras], dtype=np.float64)
+    height = np.array([camera.get("image_height") or camera.get("image_width") or 1
+                       for camera in cameras], dtype=np.float64)
+
+    # COLMAP cameras look along +z
+    forward = to_world[:, :, 2]
+    depth = ((target - centers) * forward).sum(axis=1)
+    depth = np.where(depth > 0, depth, np.linalg.norm(target - centers, axis=1))
+    half_width = 0.5 * depth
+    half_height = 0.5 * depth * height / width
+    corners = [centers]
+    for sx in (-1, 1):
+        for sy in (-1, 1):
+            local = np.stack([sx * half_width, sy * half_height, depth], axis=1)
+            corners.append(centers + np.einsum("nij,nj->ni", to_world, local))
+    corners = np.concatenate(corners)
+    return {
+        "num_cameras": len(cameras),
+        **_box(corners.min(axis=0), corners.max(axis=0)),
+        "centers": _box(centers.min(axis=0), centers.max(axis=0)),
+        "median_depth": float(np.median(depth)),
+    }
+
+
+def compute_stats(model_path: str, cameras_path: Optional[str] = None,
+                  bins: int = OPACITY_BINS, normalized_cameras: bool = False) -> Dict[str, Any]:
+    """
+    Gaussian count, bounding volumes, opacity histogram and camera coverage of a .splat model.
+
+    The model is read once, block by block, accumulating the bounds, the
+    first and second moments of the positions and the opacity histogram; the
+    oriented box is then fitted to the positions kept from that pass.
+
+    :return: JSON-serializable statistics, the bounds are null for an empty model.
+    """
+    records = read_splat(model_path)
+    n = len(records)
+    positions = np.empty((n, 3), dtype=np.float32)
+    lo = np.full(3, np.inf)
+    hi = np.full(3, -np.inf)
+    total = np.zeros(3)
+    moments = np.zeros((3, 3))
+    histogram = np.zeros(bins, dtype=np.int64)
+    opacity_sum = 0.0
+    for start in range(0, n, BLOCK_RECORDS):
+        block = np.asarray(records[start:start + BLOCK_RECORDS])
+        positions[start:start + len(block)] = block["position"]
+        xyz = block["position"].astype(np.float64)
+        lo = np.minimum(lo, xyz.min(axis=0))
+        hi = np.maximum(hi, xyz.max(axis=0))
+        total += xyz.sum(axis=0)
+        moments += xyz.T @ xyz
+        alpha = block["color"][:, 3].astype(np.float64) / 255
+        histogram += np.histogram(alpha, bins=bins, range=(0, 1))[0]
+        opacity_sum += alpha.sum()
+    del records
+
+    stats: Dict[str, Any] = {
+        "num_gaussians": n,
+        "opacity_histogram": {
+            "edges": np.linspace(0, 1, bins + 1).tolist(),
+            "counts": histogram.tolist(),
+        },
+        "mean_opacity": opacity_sum / n if n else None,
+        "aabb": None,
+        "aabb_core": None,
+        "centroid": None,
+        "obb": None,
+        "camera_frustums": None,
+    }
+    if not n:
+        return stats
+
+    centroid = total / n
+    covariance = moments / n - np.outer(centroid, centroid)
+    core_lo, core_hi = np.percentile(positions, [1, 99], axis=0)
+    stats.update({
+        "aabb": _box(lo, hi),
+        # Without the 1% outliers on each side, what a viewer should frame
+        "aabb_core": _box(core_lo, core_hi),
+        "centroid": centroid.tolist(),
+        "obb": oriented_box(positions, centroid, covariance),
+        "camera_frustums": camera_frustums(cameras_path, centroid, normalized_cameras),
+    })
+    return stats
@@ -0,0 +1,87 @@
+import errno
+import os
+import shutil
+from collections import Counter
+from typing import Iterable, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore
+
+# ioctl request of Linux' FICLONE (_IOW(0x94, 9, int)): make dst share all
+# of src's extents on copy-on-write filesystems (btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+# Errors after which a hard link cannot work for this pair of paths but a
+# clone or a plain copy still may
+_LINK_FALLBACK_ERRNOS = {errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP, errno.EACCES}
+
+
+def _reflink(src: str, dst: str) -> bool:
+    if fcntl is None:
+        return False
+    with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+        try:
+            fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+            return True
+        except OSError:
+            pass
+    os.remove(dst)
+    return False
+
+
+def stage_file(src: str, dst: str, stats: Optional[Counter] = None) -> str:
+    """
+    Make dst a copy of src without duplicating the data when possible.
+
+    Tries, in order, a hard link, a reflink (copy-on-write clone) and a
+    plain copy; only the copy writes the file's bytes again. Staged files
+    must be treated as read-only, since a hard link shares the inode.
+
+    :param stats: Counter updated with the method used ("linked",
+        "reflinked" or "copied"), "bytes_saved" and "bytes_copied".
+    :return: The method used.
+    """
+    size = os.path.getsize(src)
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        # Already staged by an earlier (e.g. interrupted) run
+        method = "linked"
+    else:
+        if os.path.lexists(dst):
+            os.remove(dst)
+        try:
+            os.link(src, dst)
+            method = "linked"
+        except OSError as e:
+            if e.errno not in _LINK_FALLBACK_ERRNOS:
+                raise
+            if _reflink(src, dst):
+                method = "reflinked"
+            else:
+                shutil.copy2(src, dst)
+                method = "copied"
+
+    if stats is not None:
+        stats[method] += 1
+        stats["bytes_copied" if method == "copied" else "bytes_saved"] += size
+    return method
+
+
+def stage_files(src_dir: str, dst_dir: str, names: Iterable[str],
+                stats: Optional[Counter] = None) -> Counter:
+    """Stage the given files of src_dir into dst_dir."""
+    stats = Counter() if stats is None else stats
+    os.makedirs(dst_dir, exist_ok=True)
+    for name in names:
+        stage_file(os.path.join(src_dir, name), os.path.join(dst_dir, name), stats)
+    return stats
+
+
+def stage_tree(src_dir: str, dst_dir: str, stats: Optional[Counter] = None) -> Counter:
+    """Recursive stage_file, the staging counterpart of shutil.copytree."""
+    stats = Counter() if stats is None else stats
+    for root, _, files in os.walk(src_dir):
+        target = os.path.join(dst_dir, os.path.relpath(root, src_dir))
+        stage_files(root, target, files, stats)
+    return stats
@@ -0,0 +1,286 @@
+import json
+import os
+import struct
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from app.utils.read_write_model import read_cameras_binary
+
+# Downscale factors tried, from full resolution down
+DOWNSCALE_FACTORS = (1, 2, 4, 8)
+# OpenSplat defaults the plan scales from
+DENSIFY_GRAD_THRESH = 0.0002
+STOP_SPLIT_RATIO = 0.5
+
+
+class SceneSize(NamedTuple):
+    num_images: int
+    # Largest image of the dataset, all of them are budgeted at that size
+    width: int
+    height: int
+    num_points: int
+
+
+class Resources(NamedTuple):
+    # Host memory for the decoded training images
+    memory_bytes: int
+    # Memory for the Gaussians and their optimizer state: the GPU memory on
+    # CUDA builds, otherwise what is left of memory_bytes
+    gaussian_memory_bytes: Optional[int]
+    threads: int
+
+
+class CostModel(NamedTuple):
+    """
+    Time and memory of an OpenSplat run, fitted by scripts/calibrate_training.py.
+
+    A training step renders one image, so it costs a fixed part plus a part
+    proportional to the pixels rendered and one proportional to the number
+    of Gaussians. Memory is a fixed part (runtime, CUDA context) plus every
+    decoded image plus the Gaussians with their gradients and Adam state.
+    The defaults are rough figures for a CUDA build on a recent GPU.
+    """
+    step_seconds: float = 0.004
+    megapixel_seconds: float = 0.012
+    million_gaussian_seconds: float = 0.015
+    # Threads the model was calibrated with and how step times scale with
+    # them: 0 when training runs on the GPU, up to 1 for CPU builds
+    threads: int = 8
+    thread_exponent: float = 0.0
+    base_bytes: float = 2.0e9
+    pixel_bytes: float = 12.0
+    gaussian_bytes: float = 1500.0
+    # Gaussians in the trained model per sparse point, default densification
+    growth: float = 15.0
+
+    def seconds_per_step(self, pixels: float, gaussians: float, threads: int) -> float:
+        seconds = self.step_seconds + self.megapixel_seconds * pixels / 1e6 \
+            + self.million_gaussian_seconds * gaussians / 1e6
+        return seconds * (self.threads / max(threads, 1)) ** self.thread_exponent
+
+
+def load_cost_model(path: Optional[str]) -> CostModel:
+    """Cost model written by the calibration benchmark, the defaults without one."""
+    if not path or not os.path.exists(path):
+        return CostModel()
+    with open(path, "r") as f:
+        fitted = json.load(f)
+    return CostModel(**{k: v for k, v in fitted.items() if k in CostModel._fields})
+
+
+def _read_count(path: str) -> int:
+    """Number of entries of a COLMAP binary model file (leading u64)."""
+    with open(path, "rb") as f:
+        return struct.unpack("<Q", f.read(8))[0]
+
+
+def scene_size(model_dir: str) -> SceneSize:
+    """Size of the dataset from the COLMAP binary model OpenSplat trains on."""
+    cameras = read_cameras_binary(os.path.join(model_dir, "cameras.bin"))
+    largest = max(cameras.values(), key=lambda camera: camera.width * camera.height)
+    return SceneSize(
+        num_images=_read_count(os.path.join(model_dir, "images.bin")),
+        width=largest.width,
+        height=largest.height,
+        num_points=_read_count(os.path.join(model_dir, "points3D.bin")),
+    )
+
+
+def available_resources(memory_mb: Optional[int] = None, gpu_memory_mb: Optional[int] = None,
+                        threads: Optional[int] = None) -> Resources:
+    """Resources of this machine, unless configured."""
+    if memory_mb:
+        memory = memory_mb * 1024 * 1024
+    else:
+        memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_AVPHYS_PAGES")
+    return Resources(
+        memory_bytes=memory,
+        gaussian_memory_bytes=gpu_memory_mb * 1024 * 1024 if gpu_memory_mb else None,
+        threads=threads or os.cpu_count() or 1,
+    )
+
+
+def _plan(scene: SceneSize, resources: Resources, cost: CostModel, factor: int,
+          num_iterations: int, max_gaussians: float) -> Dict[str, Any]:
+    pixels = (scene.width // factor) * (scene.height // factor)
+    expected = scene.num_points * cost.growth
+    gaussians = min(expected, max_gaussians)
+    step = cost.seconds_per_step(pixels, gaussians, resources.threads)
+    image_bytes = scene.num_images * pixels * cost.pixel_bytes
+    gaussian_bytes = gaussians * cost.gaussian_bytes
+    if resources.gaussian_memory_bytes is None:
+        memory = cost.base_bytes + image_bytes + gaussian_bytes
+    else:
+        memory = cost.base_bytes + image_bytes
+    return {
+        "downscale_factor": factor,
+        "num_iterations": num_iterations,
+        # A higher gradient threshold splits fewer Gaussians; raised by the
+        # factor the densification would overshoot the memory
+        "densify_grad_thresh": DENSIFY_GRAD_THRESH * max(1.0, expected / max(max_gaussians, 1.0)),
+        "stop_split_at": int(num_iterations * STOP_SPLIT_RATIO),
+        "estimated_gaussians": int(gaussians),
+        "estimated_seconds": round(step * num_iterations, 1),
+        "estimated_memory_bytes": int(memory),
+        "estimated_gaussian_memory_bytes": int(gaussian_bytes),
+    }
+
+
+def plan_training(scene: SceneSize, resources: Resources, cost: CostModel, *,
+                  target_seconds: float, max_iterations: int, min_iterations: int,
+                  max_image_size: int, memory_fraction: float = 0.8) -> Dict[str, Any]:
+    """
+    Pick OpenSplat's downscale factor, iteration count and densification limits.
+
+    Starting from the smallest downscale factor that brings the images under
+    max_image_size, the factor is raised until the decoded images fit in
+    memory_fraction of the memory with room left for the Gaussians, and
+    until at least min_iterations steps fit in target_seconds. The number of
+    iterations is then as many as fit in target_seconds, up to
+    max_iterations. When the densification would produce more Gaussians
+    than fit in memory, its gradient threshold is raised accordingly and
+    splitting stops halfway, as OpenSplat does by default.
+
+    :return: The plan, with its estimates and inputs, as recorded on the splat.
+    """
+    budget = resources.memory_bytes * memory_fraction
+    # Fewer iterations than the minimum were asked for explicitly
+    min_iterations = min(min_iterations, max_iterations)
+    factors = [f for f in DOWNSCALE_FACTORS
+               if max(scene.width, scene.height) / f <= max_image_size] or [DOWNSCALE_FACTORS[-1]]
+
+    plan = None
+    for factor in factors:
+        pixels = (scene.width // factor) * (scene.height // factor)
+        fixed = cost.base_bytes + scene.num_images * pixels * cost.pixel_bytes
+        if resources.gaussian_memory_bytes is None:
+            room = budget - fixed
+        else:
+            room = resources.gaussian_memory_bytes * memory_fraction
+            if fixed > budget:
+                room = 0
+        if room <= 0:
+            continue
+        max_gaussians = room / cost.gaussian_bytes
+        step = cost.seconds_per_step(pixels, min(scene.num_points * cost.growth, max_gaussians),
+                                     resources.threads)
+        num_iterations = int(min(max_iterations, target_seconds / step))
+        plan = _plan(scene, resources, cost, factor, max(num_iterations, min_iterations), max_gaussians)
+        plan["within_budget"] = num_iterations >= min_iterations
+        if plan["within_budget"]:
+            break
+    if plan is None:
+        # Nothing fits, the smallest images and fewest steps are the best bet
+        factor = factors[-1]
+        plan = _plan(scene, resources, cost, factor, min_iterations,
+                     max(scene.num_points, 1) * cost.growth)
+        plan["within_budget"] = False
+
+    plan.update({
+        "keep_crs": True,
+        "target_seconds": target_seconds,
+        "memory_budget_bytes": int(budget),
+        "scene": scene._asdict(),
+        "resources": resources._asdict(),
+    })
+    return plan
+
+
+def fixed_plan(scene: SceneSize, num_iterations: int, max_image_size: int) -> Dict[str, Any]:
+    """Plan without the planner: the requested iterations, images downscaled to max_image_size."""
+    factor = next((f for f in DOWNSCALE_FACTORS if max(scene.width, scene.height) / f <= max_image_size),
+                  DOWNSCALE_FACTORS[-1])
+    return {"downscale_factor": factor, "num_iterations": num_iterations, "keep_crs": True,
+            "scene": scene._asdict()}
+
+
+def opensplat_arguments(plan: Dict[str, Any]) -> List[str]:
+    """
+    OpenSplat command line options applying a plan.
+
+    keep_crs saves the model in the COLMAP frame of cameras.json rather than
+    OpenSplat's normalized one, so post-processing can use the cameras.
+    """
+    args = [
+        "-n", str(plan["num_iterations"]),
+        "--downscale-factor", str(plan["downscale_factor"]),
+    ]
+    if plan.get("keep_crs"):
+        args.append("--keep-crs")
+    if "densify_grad_thresh" in plan:
+        args += [
+            "--densify-grad-thresh", f"{plan['densify_grad_thresh']:.6g}",
+            "--stop-split-at", str(plan["stop_split_at"]),
+        ]
+    return args
+
+
+class CalibrationRun(NamedTuple):
+    pixels: int
+    num_images: int
+    threads: int
+    num_iterations: int
+    num_points: int
+    seconds: float
+    peak_memory_bytes: int
+    num_gaussians: int
+
+
+def fit_cost_model(runs: Sequence[CalibrationRun], threads: int,
+                   host_gaussians: bool = False) -> CostModel:
+    """
+    Least-squares fit of the cost model to benchmark runs.
+
+    Every configuration (pixels, threads) must have been run with at least
+    two iteration counts: the difference gives the time per step without
+    the loading and start-up time. The thread exponent is only fitted when
+    several thread counts were run. Peak memory is host memory, so the
+    memory per Gaussian is only fitted when they live there (host_gaussians,
+    CPU builds); otherwise the default is kept.
+    """
+    groups: Dict[tuple, List[CalibrationRun]] = {}
+    for run in runs:
+        groups.setdefault((run.pixels, run.num_images, run.threads), []).append(run)
+    steps = []
+    for (pixels, _, run_threads), group in groups.items():
+        group = sorted(group, key=lambda run: run.num_iterations)
+        if len(group) < 2 or group[-1].num_iterations == group[0].num_iterations:
+            raise ValueError("Every configuration needs two runs with different iteration counts")
+        seconds = (group[-1].seconds - group[0].seconds) / (group[-1].num_iterations - group[0].num_iterations)
+        # The Gaussians in the model change along the run, use the mean
+        gaussians = (group[0].num_gaussians + group[-1].num_gaussians) / 2
+        steps.append((pixels, run_threads, gaussians, seconds))
+    steps = np.array(steps, dtype=np.float64)
+
+    thread_exponent = 0.0
+    if len(np.unique(steps[:, 1])) > 1:
+        # log(seconds) = a + b * pixels + c * gaussians - e * log(threads)
+        design = np.column_stack([np.ones(len(steps)), steps[:, 0] / 1e6, steps[:, 2] / 1e6,
+                                  -np.log(steps[:, 1] / threads)])
+        thread_exponent = float(np.clip(np.linalg.lstsq(design, np.log(steps[:, 3]), rcond=None)[0][3], 0, 1))
+    normalized = steps[:, 3] * (steps[:, 1] / threads) ** thread_exponent
+    design = np.column_stack([np.ones(len(steps)), steps[:, 0] / 1e6, steps[:, 2] / 1e6])
+    step_seconds, megapixel_seconds, million_gaussian_seconds = np.maximum(
+        np.linalg.lstsq(design, normalized, rcond=None)[0], 0)
+
+    design = np.array([[1, run.num_images * run.pixels, run.num_gaussians] for run in runs], dtype=np.float64)
+    memory = np.array([run.peak_memory_bytes for run in runs], dtype=np.float64)
+    gaussian_bytes = CostModel().gaussian_bytes
+    if host_gaussians:
+        base_bytes, pixel_bytes, gaussian_bytes = np.maximum(np.linalg.lstsq(design, memory, rcond=None)[0], 0)
+    else:
+        base_bytes, pixel_bytes = np.maximum(np.linalg.lstsq(design[:, :2], memory, rcond=None)[0], 0)
+
+    longest = max(runs, key=lambda run: run.num_iterations)
+    return CostModel(
+        step_seconds=float(step_seconds),
+        megapixel_seconds=float(megapixel_seconds),
+        million_gaussian_seconds=float(million_gaussian_seconds),
+        threads=threads,
+        thread_exponent=thread_exponent,
+        base_bytes=float(base_bytes),
+        pixel_bytes=float(pixel_bytes),
+        gaussian_bytes=float(gaussian_bytes),
+        growth=longest.num_gaussians / max(longest.num_points, 1),
+    )
@@ -0,0 +1,317 @@
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+SESSION_FILENAME = "upload.json"
+LOCK_FILENAME = "upload.lock"
+UPLOADS_DIRNAME = "uploads"
+
+
+class ChunkError(Exception):
+    """A chunk was rejected; the message is safe to return to the client."""
+
+
+class SessionBusy(Exception):
+    """Another request is finalizing the session or writing to it."""
+
+
+class SessionClosed(Exception):
+    """The session was finalized and no longer accepts chunks."""
+
+
+class ChunkWriter:
+    """
+    Chunk of a file being written at offset, as its data arrives.
+
+    The data goes straight into the part file while its SHA-256 is
+    computed. close() checks the checksum and records the chunk; a chunk
+    that is rejected or aborted leaves the file truncated at offset.
+    """
+
+    def __init__(self, session: "UploadSession", name: str, offset: int):
+        if name not in session.files:
+            raise ChunkError(f"Unknown file: {name}")
+        received = session.received(name)
+        if offset < 0 or offset > received:
+            raise ChunkError(f"Invalid offset {offset}, {received} bytes received so far")
+        self.session = session
+        self.name = name
+        self.offset = offset
+        self.written = 0
+        self.sha = hashlib.sha256()
+        part_path = session.part_path(name)
+        self.file = open(part_path, "r+b" if os.path.exists(part_path) else "wb")
+        self.file.seek(offset)
+
+    def write(self, data: bytes) -> None:
+        if self.offset + self.written + len(data) > self.session.files[self.name]:
+            raise ChunkError("Chunk exceeds the declared file size")
+        self.file.write(data)
+        self.sha.update(data)
+        self.written += len(data)
+
+    def close(self, sha256: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Finish the chunk, anything after it in the file is discarded.
+
+        :raises ChunkError: When sha256 is given and does not match.
+        """
+        digest = self.sha.hexdigest()
+        if sha256 is not None and sha256.lower() != digest:
+            self.abort()
+            raise ChunkError("Chunk checksum mismatch")
+        self.file.truncate()
+        self.file.close()
+        with open(os.path.join(self.session.uploads_dir, self.name + ".chunks"), "a") as f:
+            f.write(f"{self.offset} {self.written} {digest}\n")
+        return self.session.file_status(self.name)
+
+    def abort(self) -> None:
+        """Drop what was written of the chunk."""
+        if not self.file.closed:
+            self.file.truncate(self.offset)
+            self.file.close()
+
+
+class UploadSession:
+    """
+    Resumable upload of the input files of a splat.
+
+    The session is stored as ``upload.json`` in the splat's workspace
+    directory and only written when it is created and finalized. Files are
+    received into ``uploads/<name>.part``; how much of a file has been
+    received is the size of its part file, and the checksum of every
+    accepted chunk is appended to ``uploads/<name>.chunks``. Different files
+    can therefore be uploaded concurrently without sharing any state.
+
+    Finalizing moves the files ("open" -> "ready"), then the caller creates
+    and starts the splat and closes the session, which removes its files. It
+    holds ``upload.lock`` exclusively while chunks are written under a
+    shared lock, and a call interrupted at any point can be repeated until
+    it succeeds.
+    """
+
+    def __init__(self, workspace_path: str):
+        self.workspace_path = workspace_path
+        self.path = os.path.join(workspace_path, SESSION_FILENAME)
+        self.uploads_dir = os.path.join(workspace_path, UPLOADS_DIRNAME)
+        self.data: Dict[str, Any] = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                self.data = json.load(f)
+
+    @classmethod
+    def create(cls, workspace_path: str, *, owner_id: int, title: str,
+               num_iterations: int, files: Dict[str, int]) -> "UploadSession":
+        session = cls(workspace_path)
+        session.data = {
+            "owner_id": owner_id,
+            "title": title,
+            "num_iterations": num_iterations,
+            "files": files,
+            "status": "open",
+            "created_at": datetime.now().isoformat(),
+        }
+        os.makedirs(session.uploads_dir, exist_ok=True)
+        session.save()
+        return session
+
+    def reload(self) -> None:
+        with open(self.path, "r") as f:
+            self.data = json.load(f)
+
+    @property
+    def exists(self) -> bool:
+        return bool(self.data)
+
+    @property
+    def files(self) -> Dict[str, int]:
+        return self.data["files"]
+
+    def part_path(self, name: str) -> str:
+        return os.path.join(self.uploads_dir, name + ".part")
+
+    def received(self, name: str) -> int:
+        try:
+            return os.path.getsize(self.part_path(name))
+        except FileNotFoundError:
+            return 0
+
+    def file_status(self, name: str) -> Dict[str, Any]:
+        received = self.received(name)
+        size = self.files[name]
+        return {"name": name, "size": size, "received": received, "complete": received == size}
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [self.file_status(name) for name in self.files]
+
+    def write_chunk(self, name: str, offset: int, data: bytes,
+                    sha256: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Write a chunk of a file at offset.
+
+        A chunk must start at or before the end of what was received so
+        far, so a client that lost the response to its last chunk can
+        simply send it again. Anything after the chunk is discarded.
+        """
+        with self.writing():
+            writer = self.open_chunk(name, offset)
+            try:
+                writer.write(data)
+            except BaseException:
+                writer.abort()
+                raise
+            return writer.close(sha256)
+
+    def open_chunk(self, name: str, offset: int) -> ChunkWriter:
+        """Start writing a chunk, call it while holding writing()."""
+        return ChunkWriter(self, name, offset)
+
+    @contextmanager
+    def _locked(self, operation: int, busy: str) -> Iterator[None]:
+        try:
+            fd = os.open(os.path.join(self.workspace_path, LOCK_FILENAME), os.O_CREAT | os.O_RDWR, 0o644)
+        except FileNotFoundError:
+            # The workspace of an expired session was removed
+            raise SessionClosed("Upload session was removed")
+        try:
+            try:
+                fcntl.flock(fd, operation | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise SessionBusy(busy)
+            if not os.path.exists(self.path):
+                raise SessionClosed("Upload already finalized")
+            self.reload()
+            yield
+        finally:
+            os.close(fd)
+
+    @contextmanager
+    def writing(self) -> Iterator[None]:
+        """
+        Hold the session, shared with other writers, while a chunk is written.
+
+        :raises SessionBusy: When the session is being finalized.
+        :raises SessionClosed: When it no longer accepts chunks.
+        """
+        with self._locked(fcntl.LOCK_SH, "Upload is being finalized"):
+            if self.data["status"] != "open":
+                raise SessionClosed("Upload already finalized")
+            yield
+
+    @contextmanager
+    def finalizing(self) -> Iterator[None]:
+        """
+        Hold the session while it is finalized, reloading it once held.
+
+        The lock is an flock on upload.lock: the kernel releases it when the
+        process dies, so a crashed finalize never leaves the session stuck,
+        while a concurrent one (in any worker of this host) or a chunk being
+        written gets SessionBusy.
+
+        :raises SessionBusy: When another request holds the session.
+        :raises SessionClosed: When it was already closed.
+        """
+        with self._locked(fcntl.LOCK_EX, "Upload is being finalized or receiving chunks"):
+            yield
+
+    def finalize(self, target_dirs: Dict[str, str]) -> None:
+        """
+        Move the complete files into their target directories.
+
+        Files an interrupted call already moved are skipped. Call it while
+        holding finalizing().
+
+        :param target_dirs: Target directory of each file.
+        """
+        moved = {name for name, target_dir in target_dirs.items()
+                 if not os.path.exists(self.part_path(name))
+                 and os.path.exists(os.path.join(target_dir, name))}
+        incomplete = [status["name"] for status in self.status()
+                      if not status["complete"] and status["name"] not in moved]
+        if incomplete:
+            raise ChunkError(f"Upload incomplete: {', '.join(incomplete)}")
+        for name, target_dir in target_dirs.items():
+            if name in moved:
+                continue
+            os.makedirs(target_dir, exist_ok=True)
+            os.replace(self.part_path(name), os.path.join(target_dir, name))
+        self.set_status("ready")
+
+    def close(self) -> None:
+        """
+        Mark the session finalized and remove its files.
+
+        Call it while holding finalizing(), once the splat was started.
+        """
+        # Finalized first: a crash before the files are gone leaves a
+        # session that is closed again on the next finalize
+        self.set_status("finalized")
+        shutil.rmtree(self.uploads_dir, ignore_errors=True)
+        for path in (self.path, os.path.join(self.workspace_path, LOCK_FILENAME)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def set_status(self, status: str) -> None:
+        self.data["status"] = status
+        self.data[f"{status}_at"] = datetime.now().isoformat()
+        self.save()
+
+    def last_activity(self) -> float:
+        """Time of the last change to the session or its files."""
+        times = [os.path.getmtime(self.path)]
+        if os.path.isdir(self.uploads_dir):
+            times += [entry.stat().st_mtime for entry in os.scandir(self.uploads_dir)]
+        return max(times)
+
+    def expires_at(self, max_age_seconds: float) -> Optional[float]:
+        """When an open session is abandoned, None once it was finalized."""
+        if self.data.get("status") != "open":
+            return None
+        return self.last_activity() + max_age_seconds
+
+    def expired(self, max_age_seconds: float, now: Optional[float] = None) -> bool:
+        expires_at = self.expires_at(max_age_seconds)
+        return expires_at is not None and (now or time.time()) > expires_at
+
+    def save(self) -> None:
+        os.makedirs(self.workspace_path, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def cleanup_expired_sessions(owner_dir: str, max_age_seconds: float) -> List[str]:
+    """
+    Remove the workspaces of the upload sessions of a user left open for max_age_seconds.
+
+    Sessions being finalized are left alone.
+
+    :return: The removed workspaces.
+    """
+    removed = []
+    if not os.path.isdir(owner_dir):
+        return removed
+    for entry in os.scandir(owner_dir):
+        if not os.path.exists(os.path.join(entry.path, SESSION_FILENAME)):
+            continue
+        session = UploadSession(entry.path)
+        if not session.expired(max_age_seconds):
+            continue
+        try:
+            with session.finalizing():
+                if session.expired(max_age_seconds):
+                    shutil.rmtree(entry.path)
+                    removed.append(entry.path)
+        except (SessionBusy, SessionClosed, FileNotFoundError):
+            continue
+    return removed
@@ -0,0 +1,78 @@
+import os
+import time
+import zipfile
+from typing import Iterable, Iterator, List, Tuple
+
+CHUNK_SIZE = 64 * 1024
+
+# Already compressed formats, deflating them only costs CPU
+STORED_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".zip", ".splat")
+
+
+class _ChunkSink:
+    """
+    Write-only, unseekable file object collecting what ZipFile writes.
+
+    Since it has no tell/seek, ZipFile writes every entry with a trailing
+    data descriptor instead of seeking back to patch the local header,
+    which is what makes the archive streamable.
+    """
+
+    def __init__(self) -> None:
+        self.chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        if data:
+            self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def compress_type_for(path: str) -> int:
+    if path.lower().endswith(STORED_EXTENSIONS):
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def iter_zip(entries: Iterable[Tuple[str, str]], chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Generate a ZIP archive of the given files piece by piece.
+
+    Files are read chunk by chunk and the archive bytes are yielded as soon
+    as they are produced, so memory use does not depend on the archive size
+    and the first bytes go out right away. JPEG/PNG images and other
+    compressed formats are stored, everything else is deflated.
+
+    :param entries: (path, arcname) pairs.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w") as archive:
+        for path, arcname in entries:
+            stat_result = os.stat(path)
+            info = zipfile.ZipInfo(arcname, date_time=time.localtime(stat_result.st_mtime)[:6])
+            info.compress_type = compress_type_for(path)
+            info.file_size = stat_result.st_size
+            info.external_attr = 0o644 << 16
+            with open(path, "rb") as src, archive.open(info, "w") as dest:
+                while True:
+                    chunk = src.read(chunk_size)
+                    if not chunk:
+                        break
+                    dest.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+    # Central directory
+    data = sink.drain()
+    if data:
+        yield data
@@ -0,0 +1,99 @@
+"""
+Latency of /splats/public while large models are being uploaded.
+
+Runs against a live API, e.g. the docker-compose stack:
+
+    python scripts/bench_upload_latency.py --base-url http://localhost/api/v1 \
+        --token <JWT> --uploads 4 --size-mb 200 --duration 60
+
+A probe requests /splats/public every --probe-interval seconds while
+--uploads clients repeatedly POST a random .splat of --size-mb megabytes to
+/splats/model-upload. The probe latency percentiles are printed at the end;
+run once with --uploads 0 for the idle baseline, and compare builds before
+and after a change with the same arguments. Uploaded splats are deleted
+afterwards.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from typing import List
+
+import httpx
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event, interval: float,
+                latencies: List[float]) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get("/splats/public", params={"page": 1, "size": 10})
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(interval)
+
+
+async def uploader(client: httpx.AsyncClient, stop: asyncio.Event, payload: bytes,
+                   thumbnail: bytes, created: List[str]) -> None:
+    while not stop.is_set():
+        response = await client.post(
+            "/splats/model-upload",
+            data={"title": "latency benchmark", "is_public": "false"},
+            files={
+                "model": ("bench.splat", payload, "application/octet-stream"),
+                "thumbnail": ("bench.jpg", thumbnail, "image/jpeg"),
+            },
+        )
+        response.raise_for_status()
+        created.append(response.json()["id"])
+
+
+async def main(args: argparse.Namespace) -> None:
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    # .splat records are 32 bytes
+    payload = os.urandom(args.size_mb * 1024 * 1024 // 32 * 32)
+    thumbnail = os.urandom(16 * 1024)
+    latencies: List[float] = []
+    created: List[str] = []
+    stop = asyncio.Event()
+
+    timeout = httpx.Timeout(None)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=timeout) as probe_client, \
+            httpx.AsyncClient(base_url=args.base_url, headers=headers, timeout=timeout) as upload_client:
+        tasks = [asyncio.create_task(probe(probe_client, stop, args.probe_interval, latencies))]
+        tasks += [
+            asyncio.create_task(uploader(upload_client, stop, payload, thumbnail, created))
+            for _ in range(args.uploads)
+        ]
+        await asyncio.sleep(args.duration)
+        stop.set()
+        await asyncio.gather(*tasks)
+
+        for splat_id in created:
+            await upload_client.delete(f"/splats/{splat_id}")
+
+    print(f"uploads: {args.uploads} concurrent x {args.size_mb} MB, {len(created)} completed")
+    print(f"probes:  {len(latencies)}")
+    if latencies:
+        print(f"latency ms: p50={statistics.median(latencies):.1f} "
+              f"p95={percentile(latencies, 95):.1f} "
+              f"p99={percentile(latencies, 99):.1f} "
+              f"max={max(latencies):.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost/api/v1")
+    parser.add_argument("--token", default=os.environ.get("BENCH_TOKEN"),
+                        help="JWT of the user uploading (default: $BENCH_TOKEN)")
+    parser.add_argument("--uploads", type=int, default=4)
+    parser.add_argument("--size-mb", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--probe-interval", type=float, default=0.05)
+    asyncio.run(main(parser.parse_args()))
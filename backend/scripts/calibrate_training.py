@@ -0,0 +1,88 @@
+"""
+Fit the OpenSplat cost model used by the training planner.
+
+Runs OpenSplat on a prepared dataset (a folder with cameras.bin,
+images.bin, points3D.bin and images/, e.g. the to_opensplat folder of a
+finished job) on the worker machine:
+
+    python scripts/calibrate_training.py /path/to/to_opensplat \
+        --downscale 1 2 4 --iterations 500 2000 --threads 8 \
+        --output cost_model.json
+
+Every downscale factor and thread count is run with each iteration count;
+the difference between two iteration counts gives the time per step
+without loading and start-up. Peak memory is the host memory of the
+OpenSplat process. On CUDA builds the Gaussians live on the GPU, pass
+--host-gaussians only for CPU builds. The Gaussians per sparse point are
+taken from the longest run, so make it long enough to cover most of the
+densification (half of the iterations with OpenSplat's defaults).
+
+Point TRAINING_COST_MODEL_PATH to the output file to use the fitted model.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.training_planner import CalibrationRun, fit_cost_model, scene_size  # noqa: E402
+
+
+def run_opensplat(dataset: str, downscale: int, iterations: int, threads: int,
+                  opensplat: str) -> tuple:
+    """Wall time, peak RSS in bytes and Gaussians in the model of one run."""
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, "model.splat")
+        cmd = [opensplat, dataset, "-n", str(iterations), "-o", output,
+               "--downscale-factor", str(downscale)]
+        env = dict(os.environ, OMP_NUM_THREADS=str(threads), MKL_NUM_THREADS=str(threads))
+        with open(os.path.join(tmp, "stderr.log"), "w+") as stderr:
+            started = time.perf_counter()
+            # wait4 gives the peak memory of this child alone
+            process = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=stderr)
+            _, status, usage = os.wait4(process.pid, 0)
+            seconds = time.perf_counter() - started
+            if status != 0:
+                stderr.seek(0)
+                raise RuntimeError(f"{' '.join(cmd)} failed: {stderr.read()[-2000:]}")
+        # .splat records are 32 bytes; ru_maxrss is in kilobytes on Linux
+        return seconds, usage.ru_maxrss * 1024, os.path.getsize(output) // 32
+
+
+def main(args: argparse.Namespace) -> None:
+    scene = scene_size(args.dataset)
+    print(f"Dataset: {scene._asdict()}")
+    runs: List[CalibrationRun] = []
+    for threads in args.threads:
+        for downscale in args.downscale:
+            pixels = (scene.width // downscale) * (scene.height // downscale)
+            for iterations in args.iterations:
+                seconds, peak, gaussians = run_opensplat(args.dataset, downscale, iterations, threads,
+                                                         args.opensplat)
+                print(f"threads={threads} downscale={downscale} iterations={iterations}: "
+                      f"{seconds:.1f} s, {peak / 1024 ** 2:.0f} MB peak, {gaussians} Gaussians")
+                runs.append(CalibrationRun(pixels, scene.num_images, threads, iterations,
+                                           scene.num_points, seconds, peak, gaussians))
+
+    cost = fit_cost_model(runs, threads=max(args.threads), host_gaussians=args.host_gaussians)
+    with open(args.output, "w") as f:
+        json.dump(cost._asdict(), f, indent=2)
+    print(f"Cost model written to {args.output}: {cost._asdict()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dataset", help="COLMAP dataset folder OpenSplat trains on")
+    parser.add_argument("--downscale", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--iterations", type=int, nargs="+", default=[500, 2000])
+    parser.add_argument("--threads", type=int, nargs="+", default=[os.cpu_count() or 1])
+    parser.add_argument("--host-gaussians", action="store_true",
+                        help="Fit the memory per Gaussian (CPU builds)")
+    parser.add_argument("--opensplat", default="opensplat", help="OpenSplat executable")
+    parser.add_argument("--output", default="cost_model.json")
+    main(parser.parse_args())